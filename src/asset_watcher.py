@@ -0,0 +1,378 @@
+import asyncio
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import data_loader
+from data_loader import Topic
+from mp4box import Mp4Error, find, read_boxes
+
+# ==========================================
+# 素材热更新 (Asset Hot Reload)
+# ==========================================
+#
+# 监护人在应用运行期间把新录制的视频拷进 assets/topic_* 时，无需重启即可在菜单中看到。
+# - Linux/Android 使用 inotify (ctypes 调用，无第三方依赖)，其他平台退回定时轮询
+# - 两种后端都只负责发现"哪个话题目录变了"，具体差异由文件快照比较得出
+# - 正在复制的文件不会被当成有效视频：收到 IN_CLOSE_WRITE / IN_MOVED_TO，
+#   或者大小和 mtime 在两次检查之间保持不变，并且 MP4 顶层 box 完整，才算写入完成
+
+# inotify 常量 (见 <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_DIR_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+_FILE_EVENTS = _DIR_EVENTS | IN_CLOSE_WRITE | IN_MODIFY
+_EVENT_HEADER = struct.Struct("iIII")
+
+# 文件签名: (大小, mtime_ns)
+FileSig = Tuple[int, int]
+
+# 判断"加载开始之后才改动"时留出的余量 (文件系统时间戳精度，FAT 为 2 秒)
+_CLOCK_MARGIN_NS = 2_000_000_000
+
+
+@dataclass
+class TopicChange:
+    """一个话题目录的变化。topic 为 None 表示话题目录已被删除"""
+    topic_id: str
+    topic: Optional[Topic]
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    renamed: List[Tuple[str, str]] = field(default_factory=list)  # (旧文件名, 新文件名)
+
+
+def _list_videos(topic_dir: str) -> Optional[Dict[str, FileSig]]:
+    """列出话题目录下所有 mp4 的 (大小, mtime)；目录不存在时返回 None"""
+    try:
+        with os.scandir(topic_dir) as it:
+            result = {}
+            for entry in it:
+                if entry.name.endswith(".mp4") and entry.is_file():
+                    st = entry.stat()
+                    result[entry.name] = (st.st_size, st.st_mtime_ns)
+            return result
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _mp4_complete(path: str, size: int) -> bool:
+    """
+    检查 MP4 顶层 box 是否完整：各 box 的长度必须正好铺满整个文件，且包含 moov。
+    复制到一半的文件最后一个 box 会越过文件末尾，因此不会通过。
+    """
+    try:
+        with open(path, "rb") as f:
+            boxes = read_boxes(f, size)
+    except (OSError, Mp4Error):
+        return False
+    return find(boxes, b"moov") is not None
+
+
+class _Inotify:
+    """最小化的 inotify 封装，初始化失败时抛出 OSError"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify 不可用")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._wd_to_path: Dict[int, str] = {}
+
+    def add_watch(self, path: str, mask: int) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd >= 0:
+            self._wd_to_path[wd] = path
+
+    def read_events(self, timeout: float) -> List[Tuple[str, int, str]]:
+        """等待最多 timeout 秒，返回 [(被监视目录, mask, 文件名)]"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            path = self._wd_to_path.get(wd)
+            if path is not None:
+                events.append((path, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class AssetWatcher:
+    """
+    在后台线程监视 assets 目录，按话题计算文件增删改名，
+    只重新解析受影响的话题，然后在事件循环里调用 on_change(changes)。
+    """
+
+    def __init__(
+        self,
+        assets_dir: str,
+        on_change: Callable[[List[TopicChange]], Awaitable[None]],
+        poll_interval: float = 2.0,
+        settle_delay: float = 1.0,
+        use_inotify: bool = True,
+    ):
+        self.assets_dir = assets_dir
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.settle_delay = settle_delay
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend = "none"
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self._dir_mtimes: Dict[str, int] = {}                # 轮询模式下的话题目录 mtime
+        self._settled: Dict[str, Dict[str, FileSig]] = {}    # 已确认写入完成的文件
+        self._pending: Dict[str, Dict[str, FileSig]] = {}    # 可能仍在复制中的文件
+        self._closed: Dict[str, Set[str]] = {}               # inotify 报告已关闭写入的文件
+        self._writing: Dict[str, Set[str]] = {}              # inotify 报告仍在写入的文件
+        self._dirty: Dict[str, float] = {}                   # 话题 -> 最早可以检查的时刻
+        self._forced: Set[str] = set()                       # 即使文件没有增删也要重新解析的话题
+        self._since_ns: Optional[int] = None                 # 目录加载开始的时刻 (time.time_ns)
+
+    # --- 生命周期 ---
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None, since_ns: Optional[int] = None) -> None:
+        """
+        启动后台监视线程，必须在事件循环所在线程调用 (或显式传入 loop)。
+        since_ns 为目录加载开始的时刻：初始快照在后台线程里才拍，加载开始之后才改动的文件和目录
+        不计入快照，之后按新文件检查，加载与快照之间的变化不会被漏掉。
+        """
+        if self._thread is not None:
+            return
+        self._since_ns = since_ns
+        self._loop = loop or asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._run, name="asset-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # --- 后台线程 ---
+
+    def _run(self) -> None:
+        self._snapshot_all()
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+            except OSError as e:
+                print(f"[Watch] inotify 不可用，改为轮询: {e}")
+
+        if inotify is not None:
+            self.backend = "inotify"
+            inotify.add_watch(self.assets_dir, _DIR_EVENTS)
+            for topic_id in self._settled:
+                inotify.add_watch(os.path.join(self.assets_dir, topic_id), _FILE_EVENTS)
+        else:
+            self.backend = "polling"
+        print(f"[Watch] 素材热更新已启动 ({self.backend})")
+
+        try:
+            while not self._stop.is_set():
+                if inotify is not None:
+                    self._handle_inotify(inotify, timeout=self._next_timeout())
+                else:
+                    self._stop.wait(self.poll_interval)
+                    self._poll_dirs()
+                self._process_dirty()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _next_timeout(self) -> float:
+        if not self._dirty:
+            return self.poll_interval
+        return max(0.05, min(self._dirty.values()) - time.monotonic())
+
+    def _snapshot_all(self) -> None:
+        try:
+            with os.scandir(self.assets_dir) as it:
+                dirs = [(e.name, e.path, e.stat().st_mtime_ns) for e in it
+                        if e.is_dir() and not e.name.startswith(".")]
+        except FileNotFoundError:
+            return
+        threshold = None if self._since_ns is None else self._since_ns - _CLOCK_MARGIN_NS
+        for topic_id, path, mtime_ns in dirs:
+            self._dir_mtimes[topic_id] = mtime_ns
+            videos = _list_videos(path) or {}
+            if threshold is None:
+                self._settled[topic_id] = videos
+                continue
+            # 加载开始后才写入的文件当作新文件，照常等待写入完成并检查 MP4 结构
+            self._settled[topic_id] = {n: sig for n, sig in videos.items() if sig[1] < threshold}
+            if mtime_ns >= threshold:
+                # 目录本身在加载期间有增删改名：无论快照比较结果如何都重新解析一次
+                self._forced.add(topic_id)
+            if mtime_ns >= threshold or len(self._settled[topic_id]) != len(videos):
+                self._mark_dirty(topic_id)
+
+    def _mark_dirty(self, topic_id: str, delay: float = 0.0) -> None:
+        due = time.monotonic() + delay
+        self._dirty[topic_id] = min(self._dirty.get(topic_id, due), due)
+
+    def _handle_inotify(self, inotify: _Inotify, timeout: float) -> None:
+        for path, mask, name in inotify.read_events(timeout):
+            if path == self.assets_dir:
+                # 话题目录本身被创建/删除/改名 (以点开头的缓存目录不是话题)
+                if mask & IN_ISDIR and name and not name.startswith("."):
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        inotify.add_watch(os.path.join(self.assets_dir, name), _FILE_EVENTS)
+                    self._mark_dirty(name)
+                continue
+
+            topic_id = os.path.basename(path)
+            writing = self._writing.setdefault(topic_id, set())
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                writing.discard(name)
+                self._closed.setdefault(topic_id, set()).add(name)
+                self._mark_dirty(topic_id)
+            elif mask & (IN_DELETE | IN_MOVED_FROM | IN_DELETE_SELF):
+                writing.discard(name)
+                self._mark_dirty(topic_id)
+            else:
+                # 创建/写入中：在收到 IN_CLOSE_WRITE 之前都不算完成
+                writing.add(name)
+                self._closed.get(topic_id, set()).discard(name)
+                self._mark_dirty(topic_id, self.settle_delay)
+
+    def _poll_dirs(self) -> None:
+        try:
+            with os.scandir(self.assets_dir) as it:
+                current = {e.name: e.stat().st_mtime_ns for e in it
+                           if e.is_dir() and not e.name.startswith(".")}
+        except FileNotFoundError:
+            current = {}
+
+        for topic_id in set(self._dir_mtimes) | set(current):
+            if self._dir_mtimes.get(topic_id) != current.get(topic_id):
+                self._mark_dirty(topic_id)
+        self._dir_mtimes = current
+
+        # 还有未稳定文件的话题每轮都要复查 (文件增长不会改变目录 mtime)
+        for topic_id in self._pending:
+            self._mark_dirty(topic_id)
+
+    def _process_dirty(self) -> None:
+        now = time.monotonic()
+        due = [t for t, at in self._dirty.items() if at <= now]
+        changes = []
+        for topic_id in due:
+            del self._dirty[topic_id]
+            change = self._check_topic(topic_id)
+            if change is not None:
+                changes.append(change)
+
+        if changes and self._loop is not None:
+            if self._loop.is_closed():
+                self._stop.set()
+                return
+            asyncio.run_coroutine_threadsafe(self.on_change(changes), self._loop)
+
+    def _check_topic(self, topic_id: str) -> Optional[TopicChange]:
+        """比较话题目录的新旧快照，返回变化 (没有实质变化时返回 None)"""
+        topic_dir = os.path.join(self.assets_dir, topic_id)
+        current = _list_videos(topic_dir)
+        previous = self._settled.get(topic_id, {})
+
+        if current is None:
+            # 话题目录被删除 (或者是一个从未见过就消失的目录)
+            known = topic_id in self._settled
+            self._forced.discard(topic_id)
+            self._settled.pop(topic_id, None)
+            self._pending.pop(topic_id, None)
+            self._closed.pop(topic_id, None)
+            self._writing.pop(topic_id, None)
+            if not known:
+                return None
+            return TopicChange(topic_id=topic_id, topic=None, removed=sorted(previous))
+
+        last_pending = self._pending.get(topic_id, {})
+        closed = self._closed.get(topic_id, set())
+        writing = self._writing.get(topic_id, set())
+        settled: Dict[str, FileSig] = {}
+        pending: Dict[str, FileSig] = {}
+        for name, sig in current.items():
+            if name in writing:
+                # inotify 明确告知仍有写入者未关闭文件 (复制可能只是暂停)
+                pending[name] = sig
+            elif previous.get(name) == sig:
+                settled[name] = sig
+            elif (
+                sig[0] > 0
+                and (name in closed or last_pending.get(name) == sig)
+                and _mp4_complete(os.path.join(topic_dir, name), sig[0])
+            ):
+                # 每个新文件名 (包括改名得到的) 都要：已关闭写入，或两次检查之间大小和 mtime 都没变
+                # (轮询模式的判断依据)，并且 MP4 box 结构完整。签名与旧文件相同不能说明写完了
+                settled[name] = sig
+            else:
+                pending[name] = sig
+
+        self._settled[topic_id] = settled
+        if pending:
+            self._pending[topic_id] = pending
+            if self.backend == "inotify":
+                self._mark_dirty(topic_id, self.settle_delay)
+        else:
+            self._pending.pop(topic_id, None)
+        closed.intersection_update(pending)
+
+        # 已确认的旧文件被改写后，在重新稳定前同样从目录中移除
+        removed = [n for n in previous if n not in settled]
+        added = [n for n in settled if previous.get(n) != settled[n]]
+        # 加载期间改动过的话题：等新文件都稳定后再重新解析，避免菜单上的数量先减后增
+        forced = topic_id in self._forced and not pending
+        if not added and not removed and not forced:
+            return None
+        self._forced.discard(topic_id)
+
+        # 大小和 mtime 都相同的一删一增视为改名 (rename 不改变这两项)
+        renamed = []
+        removed_by_sig = {previous[n]: n for n in removed}
+        for name in list(added):
+            old = removed_by_sig.pop(settled[name], None)
+            if old is not None and old != name:
+                renamed.append((old, name))
+                added.remove(name)
+                removed.remove(old)
+
+        topic = data_loader.scan_topic(topic_dir, only=set(settled))
+        return TopicChange(
+            topic_id=topic_id,
+            topic=topic,
+            added=sorted(added),
+            removed=sorted(removed),
+            renamed=renamed,
+        )
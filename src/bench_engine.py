@@ -0,0 +1,249 @@
+"""
+播放状态机的回放 / 负载测试：不启动界面，把成千上万个会话推过 PlayerEngine，
+测量每秒切换次数、每次切换的目录查找次数和内存分配，作为交互热路径的纯 CPU 回归基准。
+
+会话来源：
+  合成  随机进入一个话题，每一步在当前可用的按钮里随机选一个 (种子固定，结果可复现)
+  录制  --journal DIR 回放训练记录里的真实会话 (从 start 到 finish 或下一次 start)
+
+每次切换都按播放页的做法取当前视频和所有预取候选的 URI / 本地路径 (计入目录查找次数)。
+
+用法: python bench_engine.py [--sessions 5000] [--max-steps 60] [--journal DIR]
+                             [--topics 200] [--questions 10] [--assets DIR]
+                             [--profile tablet] [--seed 0] [--out 结果.json]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import data_loader
+import journal
+from create_files import generate_assets
+from device_profile import PROFILES, RenditionSelector
+from player_engine import PlayerEngine
+
+
+@dataclass
+class ReplaySession:
+    topic_id: str
+    start_question: Optional[int] = None   # 起始问题 id，None 为第一题
+    actions: Optional[List[str]] = None    # 录制的按钮动作；合成会话为 None
+    choices: Optional[List[float]] = None  # 合成会话每一步的随机数 (预先生成，不计入计时)
+
+
+# ==========================================
+# 会话来源
+# ==========================================
+
+def synthetic_sessions(catalog: data_loader.Catalog, count: int, max_steps: int, seed: int = 0) -> List[ReplaySession]:
+    rng = random.Random(seed)
+    topic_ids = [t.id for t in catalog]
+    return [
+        ReplaySession(rng.choice(topic_ids), choices=[rng.random() for _ in range(max_steps)])
+        for _ in range(count)
+    ]
+
+
+def recorded_sessions(directory: str) -> List[ReplaySession]:
+    """把训练记录切成会话：每个 start 开始一个新会话，之后同一话题的动作依次归入，finish 结束"""
+    sessions: List[ReplaySession] = []
+    current: Optional[ReplaySession] = None
+    for event in journal.read_events(directory):
+        if event.action == journal.ACTION_START:
+            current = ReplaySession(event.topic_id, start_question=event.question_id, actions=[])
+            sessions.append(current)
+        elif current is not None and event.topic_id == current.topic_id:
+            current.actions.append(event.action)
+            if event.action == journal.ACTION_FINISH:
+                current = None
+    return sessions
+
+
+# ==========================================
+# 回放
+# ==========================================
+
+def _render(engine: PlayerEngine) -> int:
+    """播放页每次切换要做的路径解析 (当前视频 + 预取候选)，返回查找次数"""
+    q, stage, rendition = engine.question, engine.stage, engine.rendition
+    q.uri(stage, rendition)
+    q.local_path(stage, rendition)
+    lookups = 2
+    for candidate_q, candidate_stage, candidate_rendition in engine.candidates():
+        candidate_q.uri(candidate_stage, candidate_rendition)
+        candidate_q.local_path(candidate_stage, candidate_rendition)
+        lookups += 2
+    return lookups
+
+
+def replay(catalog: data_loader.Catalog, sessions: List[ReplaySession], profile_name: str = "tablet",
+           probe: Optional[Callable[[], None]] = None) -> Dict[str, int]:
+    """
+    把所有会话推过状态机，返回计数 (切换 / 被拒绝的动作 / 目录查找 / 跳过的会话)。
+    probe 在每次切换 (含渲染) 完成后调用，用于内存统计。
+    """
+    profile = PROFILES[profile_name]
+    transitions = rejected = lookups = skipped = 0
+    for session in sessions:
+        topic = catalog.get(session.topic_id)
+        lookups += 1
+        if topic is None:
+            skipped += 1
+            continue
+        questions = topic.questions
+        start = 0
+        if session.start_question is not None:
+            start = next((i for i, q in enumerate(questions) if q.id == session.start_question), -1)
+            if start < 0:
+                # 录制之后问题被删除了
+                skipped += 1
+                continue
+        # 每个会话 (一台平板) 一个版本选择器，与 main.py 相同
+        engine = PlayerEngine(topic.id, questions, RenditionSelector(profile))
+        if not engine.start(start):
+            skipped += 1
+            continue
+        lookups += _render(engine)
+
+        recorded = session.actions is not None
+        for step in (session.actions if recorded else session.choices):
+            if not recorded:
+                actions = engine.actions
+                step = actions[int(step * len(actions))]
+            if not engine.press(step):
+                rejected += 1
+                continue
+            transitions += 1
+            if not engine.finished:
+                lookups += _render(engine)
+            if probe is not None:
+                probe()
+            if engine.finished:
+                break
+    return {"sessions": len(sessions), "transitions": transitions, "rejected": rejected,
+            "lookups": lookups, "skipped_sessions": skipped}
+
+
+def measure(catalog: data_loader.Catalog, sessions: List[ReplaySession], profile_name: str = "tablet",
+            repeat: int = 3) -> Dict[str, Any]:
+    """计时 (取 repeat 次中最快的一次) + 单独一遍 tracemalloc 统计内存"""
+    best_wall = best_cpu = float("inf")
+    counts: Dict[str, int] = {}
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        counts = replay(catalog, sessions, profile_name)
+        best_wall = min(best_wall, time.perf_counter() - started)
+        best_cpu = min(best_cpu, time.process_time() - cpu_started)
+
+    # 内存单独跑一遍 (tracemalloc 会拖慢计时)。每次切换期间的峰值减去切换前的用量，
+    # 即这次切换临时分配的字节数；回放结束后仍保留的部分除以切换次数即每次切换留下的内存
+    # [切换前的用量, 临时分配合计, 最大值, 样本数]；不保存逐次样本，避免列表扩容混进统计
+    acc = [0, 0, 0, 0]
+
+    def probe():
+        current, peak = tracemalloc.get_traced_memory()
+        used = peak - acc[0]
+        acc[0] = current
+        acc[1] += used
+        acc[2] = max(acc[2], used)
+        acc[3] += 1
+        tracemalloc.reset_peak()
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = acc[0] = tracemalloc.get_traced_memory()[0]
+    replay(catalog, sessions, profile_name, probe)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    n = max(1, counts["transitions"])
+    return {
+        **counts,
+        "profile": profile_name,
+        "wall_ms": round(best_wall * 1000, 3),
+        "cpu_ms": round(best_cpu * 1000, 3),
+        "transitions_per_sec": round(counts["transitions"] / best_wall) if best_wall > 0 else 0,
+        "us_per_transition": round(best_wall * 1e6 / n, 3),
+        "lookups_per_transition": round(counts["lookups"] / n, 3),
+        "transient_bytes_per_transition": round(acc[1] / max(1, acc[3]), 1),
+        "transient_bytes_max": acc[2],
+        "retained_bytes_per_transition": round((current - baseline) / n, 3),
+    }
+
+
+def run(assets_dir: str, args: argparse.Namespace) -> Dict[str, Any]:
+    # 完整加载 (不懒加载)，问题列表的解析不计入回放
+    with contextlib.redirect_stdout(io.StringIO()):
+        catalog = data_loader.Catalog(data_loader.load_topics(assets_dir))
+    if not len(catalog):
+        raise SystemExit(f"素材目录中没有有效话题: {assets_dir}")
+    if args.journal:
+        sessions = recorded_sessions(args.journal)
+        source = "recorded"
+    else:
+        sessions = synthetic_sessions(catalog, args.sessions, args.max_steps, args.seed)
+        source = "synthetic"
+    result = measure(catalog, sessions, args.profile, args.repeat)
+    result["source"] = source
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="GongGong 播放状态机回放 / 负载测试")
+    parser.add_argument("--sessions", type=int, default=5000, help="合成会话数 (默认 5000)")
+    parser.add_argument("--max-steps", type=int, default=60, help="每个合成会话最多按几次按钮 (默认 60)")
+    parser.add_argument("--journal", help="回放该训练记录目录里的会话，而不是合成会话")
+    parser.add_argument("--topics", type=int, default=200, help="合成话题数量 (默认 200)")
+    parser.add_argument("--questions", type=int, default=10, help="每个话题的问题数量 (默认 10)")
+    parser.add_argument("--assets", help="使用现有素材目录，而不是生成合成素材")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="tablet", help="设备档位 (默认 tablet)")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数，取最快的一次")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--out", help="结果 JSON 文件 (可选)")
+    args = parser.parse_args(argv)
+
+    if args.assets:
+        result = run(args.assets, args)
+    else:
+        workdir = tempfile.mkdtemp(prefix="gonggong_engine_")
+        cwd = os.getcwd()
+        try:
+            os.chdir(workdir)
+            generate_assets("assets", args.topics, args.questions, incomplete_ratio=0.0,
+                            misnamed_ratio=0.0, payload_bytes=256, verbose=False)
+            result = run("assets", args)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"会话 {result['sessions']} 个 ({result['source']}, 跳过 {result['skipped_sessions']}), "
+          f"切换 {result['transitions']} 次, 无效动作 {result['rejected']} 次")
+    print(f"吞吐: {result['transitions_per_sec']:,} 次切换/秒 ({result['us_per_transition']:.2f} µs/次)")
+    print(f"目录查找: {result['lookups_per_transition']:.2f} 次/切换")
+    print(f"内存: 临时分配 {result['transient_bytes_per_transition']:.1f} 字节/切换 "
+          f"(最大 {result['transient_bytes_max']}), 残留 {result['retained_bytes_per_transition']:.3f} 字节/切换")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "result": result},
+                      f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
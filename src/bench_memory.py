@@ -0,0 +1,110 @@
+"""
+目录内存占用基准：对比旧的字典版 Question 与现在的 __slots__ 定长版本。
+不访问文件系统，按 assets 的命名规则在内存中构造同样规模的目录。
+
+用法: python bench_memory.py [话题数] [每个话题的问题数]
+"""
+import gc
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from data_loader import STAGE_COUNT, Catalog, Question, Topic, TopicPaths
+
+STAGE_NAMES = ["ask", "repeat", "praise", "guide"]
+
+
+@dataclass
+class _LegacyQuestion:
+    """重构前的 Question：每个问题 4 个字典，路径/URI 都是完整字符串"""
+    id: int
+    videos: Dict[int, str]
+    sizes: Dict[int, int] = field(default_factory=dict)
+    uris: Dict[int, str] = field(default_factory=dict)
+    local_paths: Dict[int, str] = field(default_factory=dict)
+
+
+@dataclass
+class _LegacyTopic:
+    id: str
+    name: str
+    questions: List[_LegacyQuestion]
+
+
+def _file_name(q_id: int, type_id: int) -> str:
+    return f"q{q_id}_{type_id}_{STAGE_NAMES[type_id]}_memory_{q_id}.mp4"
+
+
+def _file_size(q_id: int, type_id: int) -> int:
+    return 1_000_000 + q_id * 10 + type_id
+
+
+def build_legacy(topic_count: int, question_count: int, root: Path):
+    topics = []
+    for i in range(topic_count):
+        topic_id = f"topic_{i:04d}"
+        questions = []
+        for q_id in range(1, question_count + 1):
+            videos, sizes, uris, local_paths = {}, {}, {}, {}
+            for t in range(STAGE_COUNT):
+                rel_path = f"assets/{topic_id}/{_file_name(q_id, t)}"
+                full_path = root / rel_path
+                videos[t] = rel_path
+                sizes[t] = _file_size(q_id, t)
+                local_paths[t] = str(full_path)
+                uris[t] = full_path.as_uri()
+            questions.append(_LegacyQuestion(q_id, videos, sizes, uris, local_paths))
+        topics.append(_LegacyTopic(topic_id, topic_id.title(), questions))
+    topic_map = {t.id: t for t in topics}
+    return topics, topic_map
+
+
+def build_compact(topic_count: int, question_count: int, root: Path) -> Catalog:
+    catalog = Catalog()
+    for i in range(topic_count):
+        topic_id = f"topic_{i:04d}"
+        paths = TopicPaths(Path("assets") / topic_id, root)
+        questions = tuple(
+            Question(
+                q_id,
+                paths,
+                [_file_name(q_id, t) for t in range(STAGE_COUNT)],
+                [_file_size(q_id, t) for t in range(STAGE_COUNT)],
+            )
+            for q_id in range(1, question_count + 1)
+        )
+        catalog.add(Topic(topic_id, topic_id.title(), len(questions), str(paths.rel), questions))
+    return catalog
+
+
+def measure(builder, *args) -> int:
+    """返回 builder 构建结果常驻内存的字节数 (tracemalloc 统计)"""
+    gc.collect()
+    tracemalloc.start()
+    result = builder(*args)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    topic_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    question_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    root = Path.cwd().resolve()
+    total = topic_count * question_count
+
+    legacy = measure(build_legacy, topic_count, question_count, root)
+    compact = measure(build_compact, topic_count, question_count, root)
+
+    print(f"目录规模: {topic_count} 个话题 x {question_count} 个问题 = {total} 个问题")
+    print(f"  字典版 : {legacy / 1024:10.1f} KB  ({legacy / total:6.0f} 字节/问题)")
+    print(f"  紧凑版 : {compact / 1024:10.1f} KB  ({compact / total:6.0f} 字节/问题)")
+    print(f"  节省   : {(1 - compact / legacy):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+多会话负载测试：模拟 N 个平板同时连接 Web 模式，每个会话加载目录并进入一个话题。
+对比两种方式：
+  per_session  每个会话各自扫描目录、各自解析话题 (共享目录之前的 main.py)
+  shared       进程内共享一份写时复制目录，只加载/解析一次
+
+用法: python bench_sessions.py [--sessions 1 10 50] [--topics 200] [--questions 10]
+                               [--assets DIR] [--out 结果.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import data_loader
+from create_files import generate_assets
+from shared_catalog import SharedCatalog
+
+
+async def _per_session(assets_dir: str, topic_id: str) -> data_loader.Catalog:
+    catalog = data_loader.Catalog()
+    async for topic in data_loader.iter_topics(assets_dir, lazy=True):
+        catalog.add(topic)
+    topic = catalog.get(topic_id)
+    if topic is not None:
+        await asyncio.to_thread(topic.resolve)
+    return catalog
+
+
+async def _shared_session(shared: SharedCatalog, topic_id: str) -> data_loader.Catalog:
+    # 与菜单一样通过话题流读取，加载完成后进入话题
+    async for _ in shared.topic_stream():
+        pass
+    topic = shared.snapshot.get(topic_id)
+    if topic is not None:
+        await shared.resolve(topic)
+    # 解析好的话题随新快照发布，会话持有的是解析之后的快照
+    return shared.snapshot
+
+
+async def _run_sessions(mode: str, assets_dir: str, topic_ids: List[str]) -> Dict[str, Any]:
+    """同时启动所有会话，返回每个会话完成的耗时和会话持有的目录"""
+    shared = SharedCatalog(assets_dir, watch=False) if mode == "shared" else None
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+
+    async def session(topic_id: str) -> float:
+        if shared is not None:
+            held.append(await _shared_session(shared, topic_id))
+        else:
+            held.append(await _per_session(assets_dir, topic_id))
+        return (time.perf_counter() - started) * 1000
+
+    held: List[data_loader.Catalog] = []
+    latencies = await asyncio.gather(*(session(t) for t in topic_ids))
+    return {
+        "latencies_ms": latencies,
+        "wall_ms": (time.perf_counter() - started) * 1000,
+        "cpu_ms": (time.process_time() - cpu_started) * 1000,
+        "held": held,
+    }
+
+
+def _measure(mode: str, assets_dir: str, topic_ids: List[str]) -> Dict[str, Any]:
+    n = len(topic_ids)
+    with contextlib.redirect_stdout(io.StringIO()):
+        timing = asyncio.run(_run_sessions(mode, assets_dir, topic_ids))
+    del timing["held"]
+    gc.collect()
+
+    # 内存单独跑一遍 (tracemalloc 会拖慢计时)：会话结束前仍持有的目录即常驻内存
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(_run_sessions(mode, assets_dir, topic_ids))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    latencies = timing["latencies_ms"]
+    return {
+        "sessions": n,
+        "mode": mode,
+        "latency_median_ms": round(statistics.median(latencies), 3),
+        "latency_max_ms": round(max(latencies), 3),
+        "wall_ms": round(timing["wall_ms"], 3),
+        "cpu_per_session_ms": round(timing["cpu_ms"] / n, 3),
+        "retained_kb": round((current - baseline) / 1024, 1),
+        "retained_per_session_kb": round((current - baseline) / 1024 / n, 1),
+        "peak_kb": round((peak - baseline) / 1024, 1),
+    }
+
+
+def run(assets_dir: str, session_counts: List[int], seed: int = 0) -> List[Dict[str, Any]]:
+    # 先加载一次写好目录索引，两种方式都走索引命中的启动路径
+    with contextlib.redirect_stdout(io.StringIO()):
+        topic_ids = [t.id for t in data_loader.load_topics(assets_dir, lazy=True)]
+    if not topic_ids:
+        raise SystemExit(f"素材目录中没有有效话题: {assets_dir}")
+
+    rng = random.Random(seed)
+    results = []
+    for n in session_counts:
+        # 每个会话进入一个随机话题，两种方式使用同一组话题
+        chosen = [rng.choice(topic_ids) for _ in range(n)]
+        for mode in ("per_session", "shared"):
+            results.append(_measure(mode, assets_dir, chosen))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="GongGong 多会话负载测试")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50], help="同时连接的会话数")
+    parser.add_argument("--topics", type=int, default=200, help="合成话题数量 (默认 200)")
+    parser.add_argument("--questions", type=int, default=10, help="每个话题的问题数量 (默认 10)")
+    parser.add_argument("--assets", help="使用现有素材目录，而不是生成合成素材")
+    parser.add_argument("--out", help="结果 JSON 文件 (可选)")
+    args = parser.parse_args(argv)
+
+    if args.assets:
+        results = run(args.assets, args.sessions)
+    else:
+        workdir = tempfile.mkdtemp(prefix="gonggong_sessions_")
+        cwd = os.getcwd()
+        try:
+            os.chdir(workdir)
+            generate_assets("assets", args.topics, args.questions, incomplete_ratio=0.0,
+                            misnamed_ratio=0.0, payload_bytes=256, verbose=False)
+            results = run("assets", args.sessions)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'会话数':>6} {'方式':<12} {'启动中位数':>10} {'启动最大':>10} {'CPU/会话':>10} "
+          f"{'常驻内存':>10} {'内存/会话':>10}")
+    for r in results:
+        print(f"{r['sessions']:>6} {r['mode']:<12} {r['latency_median_ms']:>8.1f}ms {r['latency_max_ms']:>8.1f}ms "
+              f"{r['cpu_per_session_ms']:>8.1f}ms {r['retained_kb']:>8.0f}KB {r['retained_per_session_kb']:>8.1f}KB")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+性能基准套件：启动导入、目录加载、播放状态机、菜单构建、播放页阶段切换 (无界面运行)。
+默认先用 create_files.generate_assets 生成一棵合成素材树，结果写成 JSON，
+便于在不同提交之间对比是否有性能回退。
+
+用法: python bench_suite.py [--topics 200] [--questions 10] [--repeat 5]
+                            [--transitions 200] [--assets DIR] [--out bench_results.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import data_loader
+from create_files import generate_assets
+
+
+# ==========================================
+# 计时工具
+# ==========================================
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    return {
+        "runs": len(samples_ms),
+        "min_ms": round(min(samples_ms), 3),
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+    }
+
+
+def _time(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """重复执行 fn 并汇总耗时；加载器的警告输出被丢弃，避免终端输出影响计时"""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+    return _summary(samples)
+
+
+# ==========================================
+# 无界面运行视图
+# ==========================================
+
+class _HeadlessPage:
+    """
+    运行视图所需的最小 page 接口：路由跳转只记录不执行；每次 update 统计需要对比的控件范围
+    (传入的控件子树，不传时为整页)，同时记下同一时刻整页对比的范围，用于对比局部推送的效果。
+    遍历并序列化子树的耗时作为服务端对比开销的近似 (没有 Flet 客户端时测不到真实往返延迟)
+    """
+
+    def __init__(self):
+        self.updates = 0
+        self.routes: List[str] = []
+        self.views: List[Any] = []
+        # 每次 update 的 (控件数, 估算字节数, 序列化耗时 ms)：实际推送的范围 / 假设整页推送的范围
+        self.pushed: List[Tuple[int, int, float]] = []
+        self.full: List[Tuple[int, int, float]] = []
+
+    def update(self, *controls):
+        self.updates += 1
+        self.pushed.append(_timed_payload(controls or self.views))
+        self.full.append(_timed_payload(self.views))
+
+    def run_task(self, handler, *args):
+        return asyncio.ensure_future(handler(*args))
+
+    async def push_route(self, route: str):
+        self.routes.append(route)
+
+
+def _children(control) -> List[Any]:
+    children = list(getattr(control, "controls", None) or [])
+    content = getattr(control, "content", None)
+    if content is not None:
+        children.append(content)
+    return children
+
+
+def _payload(roots) -> Tuple[int, int]:
+    """
+    估算推送这些控件需要对比的范围：子树中的控件数，以及各控件简单属性按 JSON 序列化后的字节数。
+    Flet 只发送有变化的属性，所以字节数是上界，用于比较局部推送和整页推送的差距。
+    """
+    count = 0
+    size = 0
+    stack = list(roots)
+    while stack:
+        control = stack.pop()
+        count += 1
+        fields = vars(control) if hasattr(control, "__dict__") else {}
+        props = {k: v for k, v in fields.items()
+                 if not k.startswith("_") and isinstance(v, (str, int, float, bool))}
+        size += len(json.dumps(props, ensure_ascii=False, default=str))
+        stack.extend(_children(control))
+    return count, size
+
+
+def _timed_payload(roots) -> Tuple[int, int, float]:
+    started = time.perf_counter()
+    count, size = _payload(roots)
+    return count, size, (time.perf_counter() - started) * 1000
+
+
+def _find_button_row(control) -> Optional[Any]:
+    """在视图的控件树里找到播放页的按钮行 (子控件全部是 FilledButton 的 Row)"""
+    import flet as ft
+
+    if isinstance(control, ft.Row) and control.controls and all(
+        isinstance(c, ft.FilledButton) for c in control.controls
+    ):
+        return control
+    for child in _children(control):
+        found = _find_button_row(child)
+        if found is not None:
+            return found
+    return None
+
+
+async def _walk_player(view, page: _HeadlessPage, transitions: int, seed: int) -> Dict[str, Any]:
+    """
+    按随机但可复现的顺序点击播放页上当前可见的按钮，记录每次阶段切换的耗时。
+    点到 "完成" 时调用视图的 reset 钩子回到第一题，继续计数。
+    """
+    rng = random.Random(seed)
+    row = _find_button_row(view)
+    samples = []
+    resets = 0
+    for _ in range(transitions):
+        button = rng.choice(row.controls)
+        started = time.perf_counter()
+        await button.on_click(None)
+        if page.routes:
+            page.routes.clear()
+            view.data.reset()
+            resets += 1
+        samples.append((time.perf_counter() - started) * 1000)
+    result: Dict[str, Any] = _summary(samples)
+    result["resets"] = resets
+    result["page_updates"] = page.updates
+    # 每次切换推送的控件数、估算字节数和序列化耗时：局部推送 (当前实现) 与整页推送的对比
+    for key, samples in (("pushed", page.pushed), ("full_page", page.full)):
+        if samples:
+            result[f"{key}_controls_mean"] = round(statistics.fmean(c for c, _, _ in samples), 1)
+            result[f"{key}_bytes_mean"] = round(statistics.fmean(b for _, b, _ in samples), 1)
+            result[f"{key}_ms_mean"] = round(statistics.fmean(ms for _, _, ms in samples), 3)
+    return result
+
+
+def _bench_views(topics: List[data_loader.Topic], repeat: int, transitions: int) -> Dict[str, Any]:
+    try:
+        import views
+        # 播放页依赖是延迟导入的，先导入好，player.build 只测视图本身
+        import player_pool  # noqa: F401
+    except ImportError as e:
+        reason = f"视图依赖未安装: {e}"
+        return {"menu.build": {"skipped": reason}, "player.build": {"skipped": reason},
+                "player.transitions": {"skipped": reason}}
+    # 视图与应用里一样运行在事件循环中 (构建播放页时预取器会创建后台任务)
+    return asyncio.run(_bench_views_async(views, topics, repeat, transitions))
+
+
+async def _bench_views_async(views, topics: List[data_loader.Topic], repeat: int,
+                             transitions: int) -> Dict[str, Any]:
+    async def on_topic_click(topic):
+        pass
+
+    results: Dict[str, Any] = {}
+    results["menu.build"] = _time(
+        lambda: views.get_menu_view(_HeadlessPage(), topics, on_topic_click), repeat)
+
+    # 播放页：挑问题最多的话题，先解析好问题列表，只测视图本身
+    topic = max(topics, key=lambda t: t.question_count)
+    topic.resolve()
+    built = []
+
+    def build_player():
+        built.append(views.get_player_view(_HeadlessPage(), topic))
+
+    def release_built():
+        with contextlib.redirect_stdout(io.StringIO()):
+            while built:
+                built.pop().data.release()
+
+    results["player.build"] = _time(build_player, repeat, setup=release_built)
+    release_built()
+
+    page = _HeadlessPage()
+    view = views.get_player_view(page, topic)
+    page.views.append(view)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["player.transitions"] = await _walk_player(view, page, transitions, seed=0)
+        view.data.release()
+    results["player.transitions"]["topic_questions"] = topic.question_count
+    return results
+
+
+def _bench_engine(topics: List[data_loader.Topic], transitions: int) -> Dict[str, Any]:
+    """播放状态机的纯 CPU 基准 (不需要 Flet)：合成会话的切换吞吐、查找次数和内存分配"""
+    import bench_engine
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for topic in topics:
+            topic.resolve()
+    catalog = data_loader.Catalog(topics)
+    # 与播放页基准的切换次数同一量级：transitions 个会话，每个最多 60 步
+    sessions = bench_engine.synthetic_sessions(catalog, transitions, max_steps=60, seed=0)
+    return bench_engine.measure(catalog, sessions)
+
+
+def _bench_startup(repeat: int) -> Dict[str, Any]:
+    """
+    在子进程里导入 views (菜单所需的全部模块)，记录模块导入总耗时，
+    并检查播放页依赖 (flet_video) 没有被提前导入。
+    """
+    try:
+        import flet  # noqa: F401
+    except ImportError as e:
+        return {"startup.import_views": {"skipped": f"视图依赖未安装: {e}"}}
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    code = "import startup_profile, views; startup_profile.report()"
+    samples = []
+    deferred = True
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            out_path = os.path.join(tmp, "startup.json")
+            env = dict(os.environ, GONGGONG_PROFILE_STARTUP="1", GONGGONG_PROFILE_STARTUP_FILE=out_path)
+            subprocess.run([sys.executable, "-c", code], cwd=src_dir, env=env,
+                           capture_output=True, timeout=120, check=True)
+            with open(out_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        samples.append(data["import_total_ms"])
+        deferred = deferred and "flet_video" not in data["loaded"]
+    result: Dict[str, Any] = _summary(samples)
+    result["player_deferred"] = deferred
+    return {"startup.import_views": result}
+
+
+# ==========================================
+# 基准套件
+# ==========================================
+
+def run_suite(assets_dir: str, repeat: int, transitions: int) -> Dict[str, Any]:
+    """在 assets_dir 上运行全部基准，返回 {基准名: 统计结果}"""
+    index_path = os.path.join(assets_dir, data_loader.INDEX_FILENAME)
+
+    def drop_index():
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+    results: Dict[str, Any] = _bench_startup(repeat)
+    results["load_topics.no_index"] = _time(
+        lambda: data_loader.load_topics(assets_dir, use_index=False), repeat)
+    results["load_topics.index_miss"] = _time(
+        lambda: data_loader.load_topics(assets_dir), repeat, setup=drop_index)
+    results["load_topics.index_hit"] = _time(
+        lambda: data_loader.load_topics(assets_dir), repeat)
+    results["load_topics.lazy_hit"] = _time(
+        lambda: data_loader.load_topics(assets_dir, lazy=True), repeat)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        topics = data_loader.load_topics(assets_dir, lazy=True)
+    results["topic.resolve_all"] = _time(
+        lambda: [data_loader.Topic(t.id, t.name, path=t.path).resolve() for t in topics], repeat)
+
+    if topics:
+        results["engine.transitions"] = _bench_engine(topics, transitions)
+        results.update(_bench_views(topics, repeat, transitions))
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=5,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="GongGong 性能基准套件")
+    parser.add_argument("--topics", type=int, default=200, help="合成话题数量 (默认 200)")
+    parser.add_argument("--questions", type=int, default=10, help="每个话题的问题数量 (默认 10)")
+    parser.add_argument("--incomplete", type=float, default=0.05, help="不完整问题比例")
+    parser.add_argument("--misnamed", type=float, default=0.01, help="命名不规范的视频比例")
+    parser.add_argument("--repeat", type=int, default=5, help="每项基准的重复次数")
+    parser.add_argument("--transitions", type=int, default=200, help="播放页随机切换次数")
+    parser.add_argument("--assets", help="使用现有素材目录，而不是生成合成素材")
+    parser.add_argument("--out", default="bench_results.json", help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    meta: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+    }
+    out_path = os.path.abspath(args.out)
+
+    if args.assets:
+        meta["assets"] = os.path.abspath(args.assets)
+        results = run_suite(args.assets, args.repeat, args.transitions)
+    else:
+        # 合成素材放在临时目录里，并切换工作目录 (加载器按工作目录解析相对路径)
+        workdir = tempfile.mkdtemp(prefix="gonggong_bench_")
+        cwd = os.getcwd()
+        try:
+            os.chdir(workdir)
+            meta["generated"] = generate_assets(
+                "assets", args.topics, args.questions,
+                incomplete_ratio=args.incomplete, misnamed_ratio=args.misnamed, verbose=False)
+            results = run_suite("assets", args.repeat, args.transitions)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+
+    for name, stats in results.items():
+        if "skipped" in stats:
+            print(f"{name:<24} 跳过 ({stats['skipped']})")
+        elif "transitions_per_sec" in stats:
+            print(f"{name:<24} {stats['transitions_per_sec']:,} 次/秒  ({stats['us_per_transition']:.2f} µs/次, "
+                  f"查找 {stats['lookups_per_transition']:.2f} 次, 临时分配 {stats['transient_bytes_per_transition']:.0f} 字节)")
+        else:
+            print(f"{name:<24} 中位数 {stats['median_ms']:9.3f} ms  (最小 {stats['min_ms']:.3f}, "
+                  f"最大 {stats['max_ms']:.3f}, {stats['runs']} 次)")
+    print(f"结果已写入: {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
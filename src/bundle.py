@@ -0,0 +1,365 @@
+"""
+打包素材格式：把所有话题的视频合并成一个文件，文件头部是 (话题, 问题, 阶段, 偏移, 长度) 索引。
+打包在构建时完成；运行时通过 mmap 读取索引，不需要遍历目录，视频数据按字节区间读取。
+
+用法: python bundle.py build [assets目录] [输出文件]   (默认输出 assets/videos.ggb)
+      python bundle.py list  [打包文件]
+"""
+import os
+import sys
+import mmap
+import shutil
+import struct
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import data_loader
+from data_loader import STAGE_COUNT, Question, Rendition, Topic, TopicPaths
+
+# 放在 assets 目录下时，data_loader 会优先从它加载
+BUNDLE_FILENAME = "videos.ggb"
+
+MAGIC = b"GGBUNDLE"
+VERSION = 1
+# 每个视频的起始位置按页对齐，按区间读取和预读时不会跨页浪费
+ALIGN = 4096
+# 解包缓存中存放共用视频的子目录 (以点开头，不会和话题 id 冲突)
+SHARED_CACHE_DIRNAME = ".shared"
+
+# 文件头: 魔数, 版本, 话题数, 条目数, 字符串表长度, 数据区起始偏移
+_HEADER = struct.Struct("<8sIIIIQ")
+# 话题表: 话题 id 在字符串表中的 (偏移, 长度)
+_TOPIC = struct.Struct("<II")
+# 条目表: 话题序号, 问题 id, 阶段, 文件名 (偏移, 长度), 数据 (偏移, 长度)
+_ENTRY = struct.Struct("<IIBIHQQ")
+
+
+class BundleError(ValueError):
+    """打包文件格式不正确"""
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ==========================================
+# 1. 构建 (Build Time)
+# ==========================================
+
+def build_bundle(assets_dir: str, out_path: str) -> Dict[str, int]:
+    """
+    扫描 assets_dir 下的所有有效问题，写出打包文件 (先写临时文件再原子替换)。
+    只打包完整的问题，返回统计信息。
+    """
+    topics = data_loader.load_topics(assets_dir, use_index=False, use_bundle=False)
+    topics.sort(key=lambda t: t.id)
+
+    strings = bytearray()
+
+    def add_string(value: str) -> Tuple[int, int]:
+        data = value.encode("utf-8")
+        strings.extend(data)
+        return len(strings) - len(data), len(data)
+
+    topic_rows = [add_string(t.id) for t in topics]
+    # (话题序号, 问题 id, 阶段, 文件名位置, 源文件路径, 长度)
+    pending = []
+    for topic_no, topic in enumerate(topics):
+        for q in topic.questions:
+            for stage in range(STAGE_COUNT):
+                # 同一阶段的多个版本各占一个条目 (文件名不同)
+                for rendition in range(len(q.rendition_labels(stage))):
+                    name_off, name_len = add_string(q.rendition_name(stage, rendition))
+                    pending.append((topic_no, q.id, stage, name_off, name_len,
+                                    q.local_path(stage, rendition), q.size(stage, rendition)))
+
+    index_end = _HEADER.size + _TOPIC.size * len(topics) + _ENTRY.size * len(pending) + len(strings)
+    data_offset = _align(index_end)
+
+    entries = []
+    # 去重后多个阶段指向同一个规范文件，打包文件里也只存一份
+    offsets_by_src: Dict[str, int] = {}
+    copies = []
+    offset = data_offset
+    for topic_no, q_id, stage, name_off, name_len, src, length in pending:
+        target = offsets_by_src.get(src)
+        if target is None:
+            target = offsets_by_src[src] = offset
+            copies.append((src, target, length))
+            offset = _align(offset + length)
+        entries.append(_ENTRY.pack(topic_no, q_id, stage, name_off, name_len, target, length))
+
+    tmp_path = out_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(topics), len(entries), len(strings), data_offset))
+            for row in topic_rows:
+                f.write(_TOPIC.pack(*row))
+            f.write(b"".join(entries))
+            f.write(strings)
+            # 数据区从 data_offset 开始；没有视频时也补齐，文件长度正好等于 data_offset
+            f.write(b"\0" * (data_offset - f.tell()))
+            for src, target, length in copies:
+                f.write(b"\0" * (target - f.tell()))
+                with open(src, "rb") as video:
+                    shutil.copyfileobj(video, f, 1024 * 1024)
+                if f.tell() != target + length:
+                    raise BundleError(f"打包过程中文件大小发生变化: {src}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {"topics": len(topics), "videos": len(entries), "bytes": os.path.getsize(out_path)}
+
+
+# ==========================================
+# 2. 运行时读取 (Runtime)
+# ==========================================
+
+class _Entry:
+    __slots__ = ("question_id", "stage", "name", "offset", "length")
+
+    def __init__(self, question_id: int, stage: int, name: str, offset: int, length: int):
+        self.question_id = question_id
+        self.stage = stage
+        self.name = name
+        self.offset = offset
+        self.length = length
+
+
+def default_cache_dir(bundle_path: str) -> str:
+    """
+    解包视频的缓存目录：Flet 提供的应用临时目录优先 (Android 上可写)，
+    否则放在打包文件旁边。
+    """
+    base = os.environ.get("FLET_APP_STORAGE_TEMP")
+    if base:
+        return os.path.join(base, "gonggong_bundle")
+    return os.path.join(os.path.dirname(bundle_path), ".bundle_cache")
+
+
+class Bundle:
+    """
+    只读打开的打包文件。索引通过 mmap 解析，数据按字节区间读取。
+    file:// 播放需要真实文件，所以话题第一次解析时才把它的视频解包到缓存目录 (只解包一次)。
+    运行时请用 open_bundle() 取得进程内共享的实例；单独打开时用 with 语句或 close() 释放映射。
+    """
+
+    def __init__(self, path: str, cache_dir: Optional[str] = None):
+        self.path = os.path.abspath(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            st = os.fstat(f.fileno())
+        try:
+            self._entries = self._parse_index()
+        except (struct.error, UnicodeDecodeError) as e:
+            self._mm.close()
+            raise BundleError(f"打包文件索引损坏: {path}") from e
+        # 被多个条目共用的数据区间 (打包前已去重的视频)，解包时只写一份
+        refs = Counter(e.offset for entries in self._entries.values() for e in entries)
+        self._shared_offsets = {offset for offset, n in refs.items() if n > 1}
+        # (话题, 文件名) -> (偏移, 长度)，视频服务按需建立
+        self._by_name: Optional[Dict[Tuple[str, str], Tuple[int, int]]] = None
+        # 打开时的文件签名，open_bundle 据此判断是否需要重新打开
+        self.signature = (st.st_size, st.st_mtime_ns)
+        # 缓存子目录按打包文件的大小和 mtime 区分，重新打包后旧缓存自动失效
+        self.cache_root = cache_dir or default_cache_dir(self.path)
+        self.cache_dir = os.path.join(self.cache_root, f"{st.st_size:x}-{st.st_mtime_ns:x}")
+
+    def _parse_index(self) -> Dict[str, List[_Entry]]:
+        mm = self._mm
+        if len(mm) < _HEADER.size:
+            raise BundleError(f"不是打包文件: {self.path}")
+        magic, version, topic_count, entry_count, strings_size, data_offset = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise BundleError(f"不支持的打包文件格式: {self.path}")
+
+        topics_at = _HEADER.size
+        entries_at = topics_at + _TOPIC.size * topic_count
+        strings_at = entries_at + _ENTRY.size * entry_count
+        # 没有条目时数据区为空：data_offset 可以等于文件长度 (旧版本打包的空文件没有补齐，也可以超出)
+        index_end = strings_at + strings_size
+        if index_end > data_offset or index_end > len(mm) or (entry_count and data_offset > len(mm)):
+            raise BundleError(f"打包文件索引越界: {self.path}")
+
+        def string(offset: int, length: int) -> str:
+            return bytes(mm[strings_at + offset: strings_at + offset + length]).decode("utf-8")
+
+        topic_ids = [string(*_TOPIC.unpack_from(mm, topics_at + i * _TOPIC.size)) for i in range(topic_count)]
+        entries: Dict[str, List[_Entry]] = {topic_id: [] for topic_id in topic_ids}
+        for topic_no, q_id, stage, name_off, name_len, offset, length in _ENTRY.iter_unpack(
+            mm[entries_at:strings_at]
+        ):
+            if offset + length > len(mm) or stage >= STAGE_COUNT:
+                raise BundleError(f"打包文件条目越界: {self.path}")
+            entries[topic_ids[topic_no]].append(_Entry(q_id, stage, string(name_off, name_len), offset, length))
+        return entries
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- 目录 ---
+
+    @property
+    def topic_ids(self) -> List[str]:
+        return list(self._entries)
+
+    def question_count(self, topic_id: str) -> int:
+        return len({e.question_id for e in self._entries.get(topic_id, ())})
+
+    def topics(self) -> List[Topic]:
+        """
+        按话题 id 排序返回 Topic，问题数量直接来自索引。
+        问题列表总是在 Topic.resolve() 时才构建并解包该话题的视频 (不区分懒加载)：
+        一次性解包所有话题就失去了打包的意义。
+        """
+        return [
+            Topic(
+                id=topic_id,
+                name=data_loader._display_name(topic_id),
+                question_count=self.question_count(topic_id),
+                path=os.path.join(self.cache_dir, topic_id),
+                bundle=self,
+            )
+            for topic_id in self._entries
+        ]
+
+    # --- 数据 ---
+
+    def locate(self, topic_id: str, name: str) -> Optional[Tuple[int, int]]:
+        """按话题和文件名查找视频在打包文件中的 (偏移, 长度)，找不到返回 None"""
+        if self._by_name is None:
+            self._by_name = {
+                (t, e.name): (e.offset, e.length) for t, entries in self._entries.items() for e in entries
+            }
+        return self._by_name.get((topic_id, name))
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """按字节区间读取打包文件中的数据"""
+        return self._mm[offset: offset + length]
+
+    def questions(self, topic_id: str, root: Path) -> Tuple[Question, ...]:
+        """构建该话题的 Question (路径指向解包缓存)，必要时先解包视频"""
+        topic_dir = Path(self.cache_dir) / topic_id
+        self._extract(topic_id, topic_dir)
+
+        paths = TopicPaths(topic_dir, root)
+        grouped: Dict[int, List[_Entry]] = {}
+        for entry in self._entries.get(topic_id, ()):
+            grouped.setdefault(entry.question_id, []).append(entry)
+
+        questions = []
+        for q_id, entries in sorted(grouped.items()):
+            stages: List[List[Rendition]] = [[] for _ in range(STAGE_COUNT)]
+            for e in entries:
+                link = None
+                if e.offset in self._shared_offsets:
+                    link = data_loader._alias_link(Path(self.cache_dir), self._shared_name(e), root)
+                stages[e.stage].append(Rendition(e.name, e.length, link))
+            q = data_loader.question_from_renditions(q_id, paths, stages)
+            if q.is_valid():
+                questions.append(q)
+        return tuple(questions)
+
+    @staticmethod
+    def _shared_name(entry: _Entry) -> str:
+        return f"{SHARED_CACHE_DIRNAME}/{entry.offset:x}.mp4"
+
+    def _extract(self, topic_id: str, topic_dir: Path) -> None:
+        """把话题的视频按区间复制到缓存目录，大小一致的已解包文件直接跳过"""
+        self._prune_stale_caches()
+        os.makedirs(topic_dir, exist_ok=True)
+        for entry in self._entries.get(topic_id, ()):
+            if entry.offset in self._shared_offsets:
+                target = Path(self.cache_dir) / self._shared_name(entry)
+                os.makedirs(target.parent, exist_ok=True)
+            else:
+                target = topic_dir / entry.name
+            try:
+                if target.stat().st_size == entry.length:
+                    continue
+            except OSError:
+                pass
+            tmp = target.parent / f".{target.name}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._mm[entry.offset: entry.offset + entry.length])
+            os.replace(tmp, target)
+
+    def _prune_stale_caches(self) -> None:
+        """删除旧版本打包文件留下的解包缓存"""
+        if not os.path.isdir(self.cache_root):
+            return
+        current = os.path.basename(self.cache_dir)
+        for name in os.listdir(self.cache_root):
+            if name != current:
+                shutil.rmtree(os.path.join(self.cache_root, name), ignore_errors=True)
+
+
+def find_bundle(assets_dir: str) -> Optional[str]:
+    """assets 目录下存在打包文件时返回其路径"""
+    path = os.path.join(assets_dir, BUNDLE_FILENAME)
+    return path if os.path.isfile(path) else None
+
+
+# 进程内已打开的打包文件: 绝对路径 -> Bundle
+_opened: Dict[str, Bundle] = {}
+
+
+def open_bundle(path: str) -> Bundle:
+    """
+    进程内共享的打包文件实例 (目录加载和视频服务共用一个映射)。
+    文件没变时直接复用；重新打包后关闭旧的映射再打开新文件，重复加载不会累积映射和文件描述符。
+    打开失败时抛出 OSError / BundleError。
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    bundle = _opened.get(path)
+    if bundle is not None:
+        if bundle.signature == (st.st_size, st.st_mtime_ns):
+            return bundle
+        del _opened[path]
+        bundle.close()
+    bundle = _opened[path] = Bundle(path)
+    return bundle
+
+
+# ==========================================
+# 3. 命令行
+# ==========================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="构建或查看视频打包文件")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="把 assets 下的所有话题打包成单个文件")
+    build.add_argument("assets_dir", nargs="?", default="assets")
+    build.add_argument("out", nargs="?", help=f"输出文件 (默认 <assets_dir>/{BUNDLE_FILENAME})")
+    show = sub.add_parser("list", help="列出打包文件中的话题")
+    show.add_argument("bundle", nargs="?", default=os.path.join("assets", BUNDLE_FILENAME))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        out = args.out or os.path.join(args.assets_dir, BUNDLE_FILENAME)
+        stats = build_bundle(args.assets_dir, out)
+        print(f"打包完成: {stats['topics']} 个话题, {stats['videos']} 个视频, "
+              f"{stats['bytes'] / 1024 / 1024:.1f} MB -> {out}")
+    else:
+        with Bundle(args.bundle) as bundle:
+            for topic_id in bundle.topic_ids:
+                print(f"{topic_id}: {bundle.question_count(topic_id)} 个问题")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,9 @@
 import os
+import sys
+import random
+import struct
+import argparse
+from typing import Dict, List, Optional
 
 def create_empty_files():
     base_dir = "assets"
@@ -44,7 +49,175 @@ def create_empty_files():
     print(f"完成！已创建 {len(topics)} 个主题的空文件")
     print(f"位置: {os.path.abspath(base_dir)}")
 
+
+# ==========================================
+# 合成素材生成器 (用于性能测试)
+# ==========================================
+
+STAGE_NAMES = ["ask", "repeat", "praise", "guide"]
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _full_box(box_type: bytes, version: int, flags: int, payload: bytes) -> bytes:
+    return _box(box_type, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+_MATRIX = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+
+
+def _moov(chunk_offset: int, sample_size: int, duration_ms: int) -> bytes:
+    """构建只有一条视频轨、一个样本的 moov (timescale 为 1000)"""
+    mvhd = _full_box(b"mvhd", 0, 0, struct.pack(">IIIIIH10x", 0, 0, 1000, duration_ms, 0x10000, 0x100)
+                     + _MATRIX + bytes(24) + struct.pack(">I", 2))
+    tkhd = _full_box(b"tkhd", 0, 3, struct.pack(">IIIII8xHHH2x", 0, 0, 1, 0, duration_ms, 0, 0, 0)
+                     + _MATRIX + struct.pack(">II", 320 << 16, 180 << 16))
+    mdhd = _full_box(b"mdhd", 0, 0, struct.pack(">IIIIHH", 0, 0, 1000, duration_ms, 0x55C4, 0))
+    hdlr = _full_box(b"hdlr", 0, 0, struct.pack(">I4s12x", 0, b"vide") + b"VideoHandler\0")
+    vmhd = _full_box(b"vmhd", 0, 1, bytes(8))
+    dinf = _box(b"dinf", _full_box(b"dref", 0, 0, struct.pack(">I", 1) + _full_box(b"url ", 0, 1, b"")))
+    stbl = _box(b"stbl", b"".join([
+        _full_box(b"stsd", 0, 0, struct.pack(">I", 0)),
+        _full_box(b"stts", 0, 0, struct.pack(">III", 1, 1, duration_ms)),
+        _full_box(b"stsc", 0, 0, struct.pack(">IIII", 1, 1, 1, 1)),
+        _full_box(b"stsz", 0, 0, struct.pack(">III", sample_size, 1, sample_size)),
+        _full_box(b"stco", 0, 0, struct.pack(">II", 1, chunk_offset)),
+    ]))
+    minf = _box(b"minf", vmhd + dinf + stbl)
+    mdia = _box(b"mdia", mdhd + hdlr + minf)
+    trak = _box(b"trak", tkhd + mdia)
+    return _box(b"moov", mvhd + trak)
+
+
+def mp4_stub(payload: bytes, duration_ms: int = 1000, faststart: bool = True) -> bytes:
+    """
+    生成一个结构合法的极小 MP4 (ftyp + moov + mdat，一条视频轨，stco 偏移指向 mdat 数据)。
+    只用于测试目录扫描、盒子解析和文件传输，并不能真正解码出画面。
+    faststart=False 时把 moov 放在 mdat 之后 (手机直接录制的常见布局)。
+    """
+    ftyp = _box(b"ftyp", b"isom" + struct.pack(">I", 0x200) + b"isomiso2mp41")
+    mdat = _box(b"mdat", payload)
+    # moov 的长度与偏移值无关，先用占位偏移算出长度
+    moov_size = len(_moov(0, len(payload), duration_ms))
+    if faststart:
+        return ftyp + _moov(len(ftyp) + moov_size + 8, len(payload), duration_ms) + mdat
+    return ftyp + mdat + _moov(len(ftyp) + 8, len(payload), duration_ms)
+
+
+def _misname(q_id: int, type_id: int, desc: str, rng: random.Random) -> str:
+    """生成一个不符合 q{id}_{type}_{desc}.mp4 命名规范的文件名"""
+    return rng.choice([
+        f"Q{q_id}-{type_id} {desc}.mp4",
+        f"q{q_id}_{type_id}.mp4",
+        f"q{q_id}_{type_id}_{desc}.MP4",
+        f"question{q_id}_{type_id}_{desc}.mp4",
+    ])
+
+
+def generate_assets(
+    base_dir: str,
+    topic_count: int,
+    questions_per_topic: int,
+    incomplete_ratio: float = 0.0,
+    misnamed_ratio: float = 0.0,
+    stub: str = "mp4",
+    payload_bytes: int = 1024,
+    faststart: bool = True,
+    seed: Optional[int] = 0,
+    verbose: bool = True,
+) -> Dict[str, int]:
+    """
+    生成一棵合成的素材目录树，返回统计信息 (含预期的有效话题数和有效问题数，便于核对加载结果)。
+    - incomplete_ratio: 随机缺少一个阶段视频的问题比例
+    - misnamed_ratio:   文件名不符合命名规范的视频比例 (该问题也会因此不完整)
+    - stub: "mp4" 写入极小的合法 MP4，"empty" 只写入 1 字节 (加载器会跳过 0 字节文件)
+    """
+    rng = random.Random(seed)
+    stats = {"topics": 0, "files": 0, "bytes": 0, "misnamed_files": 0,
+             "valid_topics": 0, "valid_questions": 0}
+
+    for i in range(topic_count):
+        topic_dir = os.path.join(base_dir, f"topic_synthetic_{i:04d}")
+        os.makedirs(topic_dir, exist_ok=True)
+        stats["topics"] += 1
+        valid_in_topic = 0
+
+        for q_id in range(1, questions_per_topic + 1):
+            stages = list(range(4))
+            if rng.random() < incomplete_ratio:
+                stages.remove(rng.randrange(4))
+            complete = len(stages) == 4
+
+            for type_id in stages:
+                desc = f"{STAGE_NAMES[type_id]}_{i}_{q_id}"
+                filename = f"q{q_id}_{type_id}_{desc}.mp4"
+                if rng.random() < misnamed_ratio:
+                    filename = _misname(q_id, type_id, desc, rng)
+                    stats["misnamed_files"] += 1
+                    complete = False
+
+                if stub == "mp4":
+                    # 每个文件的内容都不同，避免被当成重复文件
+                    seed_bytes = filename.encode("utf-8") + bytes([i % 256, type_id])
+                    payload = (seed_bytes * (payload_bytes // len(seed_bytes) + 1))[:payload_bytes]
+                    data = mp4_stub(payload, faststart=faststart)
+                else:
+                    data = b"\0"
+                with open(os.path.join(topic_dir, filename), "wb") as f:
+                    f.write(data)
+                stats["files"] += 1
+                stats["bytes"] += len(data)
+
+            if complete:
+                valid_in_topic += 1
+
+        stats["valid_questions"] += valid_in_topic
+        if valid_in_topic:
+            stats["valid_topics"] += 1
+        if verbose:
+            print(f"创建目录: {topic_dir} ({valid_in_topic}/{questions_per_topic} 个完整问题)")
+
+    if verbose:
+        print("=" * 50)
+        print(f"完成！共 {stats['topics']} 个话题、{stats['files']} 个文件 "
+              f"({stats['bytes'] / 1024:.0f} KB)，预期有效问题 {stats['valid_questions']} 个")
+        print(f"位置: {os.path.abspath(base_dir)}")
+    return stats
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="生成素材目录。不带参数时创建两个示例话题的空占位文件；"
+                    "指定 --topics 时生成大规模合成素材 (默认写入 bench_assets/)。")
+    parser.add_argument("--topics", type=int, help="合成话题数量")
+    parser.add_argument("--questions", type=int, default=10, help="每个话题的问题数量 (默认 10)")
+    parser.add_argument("--incomplete", type=float, default=0.0, help="缺少阶段视频的问题比例 (0-1)")
+    parser.add_argument("--misnamed", type=float, default=0.0, help="命名不规范的视频比例 (0-1)")
+    parser.add_argument("--stub", choices=["mp4", "empty"], default="mp4", help="文件内容 (默认极小 MP4)")
+    parser.add_argument("--payload", type=int, default=1024, help="每个 MP4 的 mdat 数据字节数")
+    parser.add_argument("--moov-last", action="store_true", help="把 moov 放在文件末尾 (非 faststart 布局)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同参数生成相同的目录")
+    parser.add_argument("--out", default="bench_assets", help="输出目录")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    print("正在创建空文件结构...")
-    print("=" * 50)
-    create_empty_files()
\ No newline at end of file
+    args = _parse_args(sys.argv[1:])
+    if args.topics is None:
+        print("正在创建空文件结构...")
+        print("=" * 50)
+        create_empty_files()
+    else:
+        print(f"正在生成合成素材: {args.topics} 个话题 x {args.questions} 个问题")
+        print("=" * 50)
+        generate_assets(
+            args.out, args.topics, args.questions,
+            incomplete_ratio=args.incomplete,
+            misnamed_ratio=args.misnamed,
+            stub=args.stub,
+            payload_bytes=args.payload,
+            faststart=not args.moov_last,
+            seed=args.seed,
+        )
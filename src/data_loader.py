@@ -1,112 +1,1070 @@
 import os
 import re
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import sys
+import json
+import time
+import asyncio
+import functools
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 from pathlib import Path
+from urllib.parse import quote
+
+import metrics
+
+if TYPE_CHECKING:
+    from bundle import Bundle
+
+# 视频文件命名规则: q{sequence_id}_{type_id}_{desc}.mp4
+VIDEO_NAME_PATTERN = re.compile(r"^q(\d+)_(\d+)_(.+)\.mp4$")
+
+# 同一阶段的其他版本 (rendition)：扩展名前加 "@{高度}p" 或 "@{码率}k"，例如 q1_0_ask_snack@720p.mp4。
+# 不带后缀的是原始版本；每个阶段至少有一个版本即可，不要求各版本齐全
+RENDITION_PATTERN = re.compile(r"@(\d+[pk])\.mp4$")
+
+# 目录索引文件 (放在 assets 目录内，以点开头，扫描时会被跳过)
+INDEX_FILENAME = ".catalog_index.json"
+INDEX_VERSION = 6
+
+# 可信清单 (由 validate_assets.py 生成)：条目格式与目录索引相同，只包含校验通过的问题和版本
+MANIFEST_FILENAME = ".manifest.json"
+MANIFEST_VERSION = 2
+
+# 每个问题固定的阶段数量 (type_id 0-3)
+STAGE_COUNT = 4
+
+# 去重后的别名表 (由 dedupe.py 生成)：{"话题/文件名": "指向的规范文件 (相对 assets 目录)"}
+ALIASES_FILENAME = ".aliases.json"
+ALIASES_VERSION = 1
 
 # ==========================================
 # 1. Data Structures
 # ==========================================
 
-@dataclass
+class TopicPaths:
+    """
+    同一话题下所有视频共享的路径前缀 (每个话题只存一份，字符串经过 intern)。
+    Question 只保存文件名，完整路径/URI 由前缀 + 文件名拼出。
+    来自打包文件的话题，前缀指向解包缓存目录。
+    """
+    __slots__ = ("rel", "local", "uri")
+
+    def __init__(self, topic_dir: Path, root: Path):
+        full_dir = root / topic_dir
+        # 相对路径前缀：Flet 需要正斜杠 "/"，as_posix() 会处理 Windows 反斜杠
+        self.rel = sys.intern(topic_dir.as_posix() + "/")
+        self.local = sys.intern(os.path.join(str(full_dir), ""))
+        # URI 前缀 (file:///...)，文件名部分在 Question 里单独转义
+        self.uri = sys.intern(full_dir.as_uri() + "/")
+
+
+def rendition_label(name: str) -> str:
+    """文件名中的版本标签 ("720p" / "800k")；原始版本 (没有后缀) 返回空字符串"""
+    match = RENDITION_PATTERN.search(name)
+    return match.group(1) if match else ""
+
+
+def rendition_rank(label: str) -> Tuple[int, int, int]:
+    """版本的排序键，越大越清晰：原始版本最高，其次按分辨率、再按码率从高到低"""
+    if not label:
+        return (1, 0, 0)
+    return (0, 1 if label[-1] == "p" else 0, int(label[:-1]))
+
+
+class Rendition:
+    """
+    阶段视频的一个版本。只有存在多个版本的阶段才会创建，
+    link 与 Question.links 相同：去重后指向的规范文件 (相对路径, 本地路径, URI)，没有为 None。
+    """
+    __slots__ = ("label", "name", "size", "link", "uri_name")
+
+    def __init__(self, name: str, size: int, link: Optional[Tuple[str, str, str]] = None):
+        self.label = rendition_label(name)
+        self.name = name
+        self.size = size
+        self.link = link
+        self.uri_name = quote(name)
+
+    def __repr__(self) -> str:
+        return f"Rendition({self.name!r}, {self.size})"
+
+
 class Question:
-    id: int                 # 对应文件名中的 sequence_id
-    videos: Dict[int, str]  # Key是type_id (0-3), Value是视频文件的相对路径
-    
+    """
+    单个问题的 4 个阶段视频，按 type_id (0-3) 存放在定长元组里。
+    使用 __slots__，不再为每个问题保存 4 个字典；路径前缀由同话题的问题共享。
+    去重后被别名表接管的阶段，路径改为指向共享的规范文件 (links)。
+    names/sizes/links 是每个阶段最清晰的版本；有多个版本时全部版本另存在 renditions 里。
+    """
+    __slots__ = ("id", "paths", "names", "sizes", "links", "renditions", "_uri_names")
+
+    def __init__(
+        self,
+        id: int,
+        paths: TopicPaths,
+        names: Sequence[Optional[str]],
+        sizes: Sequence[int] = (),
+        links: Optional[Sequence[Optional[Tuple[str, str, str]]]] = None,
+        renditions: Optional[Sequence[Sequence[Rendition]]] = None,
+    ):
+        self.id = id                    # 对应文件名中的 sequence_id
+        self.paths = paths              # 所属话题的共享路径前缀
+        # 第 type_id 个位置是该阶段的文件名，缺失为 None
+        self.names: Tuple[Optional[str], ...] = tuple(names) + (None,) * (STAGE_COUNT - len(names))
+        # 第 type_id 个位置是文件字节数 (加载时检查过一次)，缺失为 0
+        self.sizes = array("q", list(sizes) + [0] * (STAGE_COUNT - len(sizes)))
+        # 第 type_id 个位置是规范文件的 (相对路径, 本地路径, URI)，没有别名为 None；全部没有时整体为 None
+        self.links = tuple(links) if links is not None and any(links) else None
+        # 第 type_id 个位置是该阶段按清晰度从高到低排列的全部版本 (第一个即 names 中的文件)；
+        # 所有阶段都只有一个版本时整体为 None
+        self.renditions = (
+            tuple(tuple(r) for r in renditions)
+            if renditions is not None and any(len(r) > 1 for r in renditions) else None
+        )
+        # 文件名需要 URI 转义时才额外保存一份，绝大多数文件名可以直接复用
+        quoted = tuple(quote(n) if n is not None else None for n in self.names)
+        self._uri_names = None if quoted == self.names else quoted
+
+    def __repr__(self) -> str:
+        return f"Question(id={self.id}, names={self.names!r})"
+
     def is_valid(self) -> bool:
         """
         验证该问题是否完整。
         必须包含所有4个必要阶段的视频 (type_id: 0, 1, 2, 3) 才能返回 True。
         """
-        required_types = {0, 1, 2, 3}
-        # 检查 required_types 是否是 self.videos.keys() 的子集
-        return required_types.issubset(self.videos.keys())
+        return None not in self.names
 
-@dataclass
+    def missing_stages(self) -> Set[int]:
+        return {t for t, name in enumerate(self.names) if name is None}
+
+    def _name(self, type_id: int) -> Optional[str]:
+        return self.names[type_id] if 0 <= type_id < STAGE_COUNT else None
+
+    def _rendition(self, type_id: int, rendition: int) -> Optional[Rendition]:
+        """第 rendition 个版本 (超出范围时取最低的)；该阶段只有一个版本时返回 None，即使用 names 中的文件"""
+        if self.renditions is None or self._name(type_id) is None:
+            return None
+        stage = self.renditions[type_id]
+        return stage[min(rendition, len(stage) - 1)] if len(stage) > 1 else None
+
+    def rendition_labels(self, type_id: int) -> Tuple[str, ...]:
+        """该阶段所有版本的标签，按清晰度从高到低排列；阶段缺失时为空"""
+        name = self._name(type_id)
+        if name is None:
+            return ()
+        if self.renditions is None or len(self.renditions[type_id]) == 1:
+            return (rendition_label(name),)
+        return tuple(r.label for r in self.renditions[type_id])
+
+    def rendition_name(self, type_id: int, rendition: int = 0) -> Optional[str]:
+        if rendition:
+            r = self._rendition(type_id, rendition)
+            if r is not None:
+                return r.name
+        return self._name(type_id)
+
+    def uri(self, type_id: int, rendition: int = 0) -> Optional[str]:
+        """
+        返回该阶段视频的 file:// URI，没有则返回 None (纯字符串拼接，不访问文件系统)。
+        rendition 为版本序号 (0 为最清晰的版本)，只有一个版本的阶段忽略该参数。
+        """
+        if rendition:
+            r = self._rendition(type_id, rendition)
+            if r is not None:
+                return r.link[2] if r.link is not None else self.paths.uri + r.uri_name
+        if self._name(type_id) is None:
+            return None
+        if self.links is not None and self.links[type_id] is not None:
+            return self.links[type_id][2]
+        names = self._uri_names or self.names
+        return self.paths.uri + names[type_id]
+
+    def local_path(self, type_id: int, rendition: int = 0) -> Optional[str]:
+        """返回该阶段视频的本地绝对路径，没有则返回 None"""
+        if rendition:
+            r = self._rendition(type_id, rendition)
+            if r is not None:
+                return r.link[1] if r.link is not None else self.paths.local + r.name
+        name = self._name(type_id)
+        if name is None:
+            return None
+        if self.links is not None and self.links[type_id] is not None:
+            return self.links[type_id][1]
+        return self.paths.local + name
+
+    def size(self, type_id: int, rendition: int = 0) -> Optional[int]:
+        if rendition:
+            r = self._rendition(type_id, rendition)
+            if r is not None:
+                return r.size
+        return self.sizes[type_id] if self._name(type_id) is not None else None
+
+    @property
+    def videos(self) -> Dict[int, str]:
+        """type_id -> 视频文件的相对路径 (兼容旧接口，每次访问都会新建字典，热路径请用 uri())"""
+        links = self.links or (None,) * STAGE_COUNT
+        return {
+            t: links[t][0] if links[t] is not None else self.paths.rel + name
+            for t, name in enumerate(self.names)
+            if name is not None
+        }
+
+
+@dataclass(slots=True)
 class Topic:
-    id: str                    # 文件夹名称 (例如 "topic_family")
-    name: str                  # 话题展示名称
-    questions: List[Question]  # 该话题下所有 Question 的列表，按 id 升序排列
+    id: str                  # 文件夹名称 (例如 "topic_family")
+    name: str                # 话题展示名称
+    question_count: int = 0  # 有效问题数量，菜单只需要这个
+    path: str = ""           # 话题文件夹路径，懒加载模式下用于解析问题
+    # 该话题下所有 Question，按 id 升序排列；懒加载模式下首次访问时才解析
+    _questions: Optional[Tuple[Question, ...]] = field(default=None, repr=False)
+    # 来自打包文件的话题由 bundle.Bundle 负责解析，目录布局下为 None
+    bundle: Optional["Bundle"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def questions(self) -> Tuple[Question, ...]:
+        if self._questions is None:
+            self.resolve()
+        return self._questions
+
+    @property
+    def is_resolved(self) -> bool:
+        return self._questions is not None
+
+    def resolve(self) -> Tuple[Question, ...]:
+        """
+        扫描话题文件夹，构建并校验所有 Question，结果会被缓存。
+        懒加载模式下由播放页在首次进入该话题时调用。
+        """
+        if self._questions is None:
+            questions = self._build_questions()
+            self.question_count = len(questions)
+            self._questions = questions
+        return self._questions
+
+    def resolved(self) -> "Topic":
+        """
+        返回已解析的话题：自身已解析时返回自身，否则返回解析好的副本，自身不变。
+        已经发布到共享快照 (shared_catalog) 里的 Topic 由多个会话读取，只能用这个方法。
+        """
+        if self._questions is not None:
+            return self
+        questions = self._build_questions()
+        return replace(self, question_count=len(questions), _questions=questions)
+
+    def _build_questions(self) -> Tuple[Question, ...]:
+        with metrics.span("catalog.resolve"):
+            if self.bundle is not None:
+                return self.bundle.questions(self.id, _resolved_root())
+            return _scan_questions(Path(self.path), self.id, _resolved_root())
+
+
+class Catalog:
+    """
+    按加载顺序排列的话题集合，自带 id 索引 (取代调用方各自维护的 topic_map)。
+    菜单按顺序遍历，路由按 id 查找，两者始终一致。
+    """
+    __slots__ = ("_topics", "_by_id")
+
+    def __init__(self, topics: Iterable[Topic] = ()):
+        self._topics: List[Topic] = []
+        self._by_id: Dict[str, Topic] = {}
+        for topic in topics:
+            self.add(topic)
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def __iter__(self) -> Iterator[Topic]:
+        return iter(self._topics)
+
+    def __contains__(self, topic_id: str) -> bool:
+        return topic_id in self._by_id
+
+    def get(self, topic_id: str) -> Optional[Topic]:
+        return self._by_id.get(topic_id)
+
+    def copy(self) -> "Catalog":
+        """浅拷贝 (共享 Topic 对象)，用于写时复制：在副本上修改后整体替换，旧副本保持不变"""
+        clone = Catalog.__new__(Catalog)
+        clone._topics = list(self._topics)
+        clone._by_id = dict(self._by_id)
+        return clone
+
+    @property
+    def topics(self) -> List[Topic]:
+        """按顺序排列的话题列表 (只读视图，请不要直接修改)"""
+        return self._topics
+
+    def add(self, topic: Topic) -> bool:
+        """追加新话题；id 已存在时不做任何修改并返回 False"""
+        if topic.id in self._by_id:
+            return False
+        self._topics.append(topic)
+        self._by_id[topic.id] = topic
+        return True
+
+    def upsert(self, topic: Topic) -> Optional[Topic]:
+        """替换同 id 的话题 (保持原位置) 或追加到末尾，返回被替换的旧话题"""
+        old = self._by_id.get(topic.id)
+        self._by_id[topic.id] = topic
+        if old is None:
+            self._topics.append(topic)
+        else:
+            self._topics[self._topics.index(old)] = topic
+        return old
+
+    def remove(self, topic_id: str) -> Optional[Topic]:
+        old = self._by_id.pop(topic_id, None)
+        if old is not None:
+            self._topics.remove(old)
+        return old
+
+
+@dataclass
+class LoadStats:
+    """最近一次 load_topics 的目录索引使用情况，用于观察冷启动耗时来源"""
+    index_status: str = "disabled"  # hit / partial / miss / corrupt / disabled / bundle
+    reused_dirs: int = 0            # 直接复用索引的话题目录数
+    trusted_dirs: int = 0           # 按可信清单直接构建 (不检查单个文件) 的话题目录数
+    rescanned_dirs: int = 0         # 因 mtime 变化或无索引而重新扫描的目录数
+
+
+_last_load_stats = LoadStats()
+
+
+def get_last_load_stats() -> LoadStats:
+    """返回最近一次 load_topics 的索引命中统计"""
+    return _last_load_stats
 
 
 # ==========================================
 # 2. Scanning & Parsing Logic
 # ==========================================
 
-def load_topics(assets_dir: str) -> List[Topic]:
+def _display_name(topic_id: str) -> str:
+    # 简单的名称处理：去掉 "topic_" 前缀并大写首字母，提升可读性
+    # 例如: "topic_family" -> "Family"
+    return topic_id.replace("topic_", "").replace("_", " ").title()
+
+
+def _resolved_root() -> Path:
+    """相对路径的基准目录 (当前工作目录的真实路径)，每次加载只解析一次"""
+    return Path.cwd().resolve()
+
+
+# 别名表缓存：{别名表路径: (mtime_ns, {话题: {文件名: 规范文件}})}，文件没变时不重复解析
+_alias_cache: Dict[str, Tuple[int, Dict[str, Dict[str, str]]]] = {}
+
+
+def read_aliases(assets_dir: Path) -> Dict[str, Dict[str, str]]:
+    """读取 assets 目录的去重别名表，按话题分组；没有别名表或格式不对时返回空字典"""
+    path = Path(assets_dir) / ALIASES_FILENAME
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    cached = _alias_cache.get(str(path))
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    grouped: Dict[str, Dict[str, str]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != ALIASES_VERSION:
+            raise ValueError(f"不支持的版本: {data.get('version')}")
+        for alias, target in data["aliases"].items():
+            topic_id, _, name = str(alias).partition("/")
+            target = str(target)
+            # 规范文件必须留在 assets 目录内
+            if not name or Path(target).is_absolute() or ".." in Path(target).parts:
+                raise ValueError(f"非法条目: {alias} -> {target}")
+            grouped.setdefault(topic_id, {})[name] = target
+    except (OSError, ValueError, KeyError, AttributeError) as e:
+        print(f"[Warn] 别名表不可用，忽略: {path.as_posix()} ({e})")
+        grouped = {}
+    _alias_cache[str(path)] = (mtime_ns, grouped)
+    return grouped
+
+
+@functools.lru_cache(maxsize=4096)
+def _alias_link(assets_dir: Path, target: str, root: Path) -> Tuple[str, str, str]:
+    """规范文件的 (相对路径, 本地路径, URI)，同一个规范文件的字符串在所有别名之间共享"""
+    rel = assets_dir / target
+    full = root / rel
+    return sys.intern(rel.as_posix()), sys.intern(str(full)), sys.intern(full.as_uri())
+
+
+def _question_links(
+    names: Sequence[Optional[str]], aliases: Optional[Dict[str, str]], assets_dir: Path, root: Path
+) -> Optional[List[Optional[Tuple[str, str, str]]]]:
+    """按别名表为问题的各阶段生成规范文件路径，没有任何别名时返回 None"""
+    if not aliases:
+        return None
+    links = [
+        _alias_link(assets_dir, aliases[n], root) if n is not None and n in aliases else None
+        for n in names
+    ]
+    return links if any(links) else None
+
+
+def _alias_size(assets_dir: Path, target: str) -> int:
+    """规范文件的字节数，文件不存在时返回 0 (按空文件处理)"""
+    try:
+        return os.stat(assets_dir / target).st_size
+    except OSError:
+        print(f"[Warn] 别名指向的文件不存在: {(assets_dir / target).as_posix()}")
+        return 0
+
+
+def _make_rendition(
+    name: str, size: int, aliases: Optional[Dict[str, str]], assets_dir: Path, root: Path
+) -> Rendition:
+    link = _alias_link(assets_dir, aliases[name], root) if aliases and name in aliases else None
+    return Rendition(name, size, link)
+
+
+def question_from_renditions(
+    q_id: int,
+    paths: TopicPaths,
+    stages: Sequence[Sequence[Rendition]],
+) -> Question:
+    """由每个阶段的版本列表构建 Question (顺序不限)：最清晰的版本作为该阶段的主文件，缺少的阶段传空列表"""
+    ordered = [sorted(stage, key=lambda r: rendition_rank(r.label), reverse=True) for stage in stages]
+    primary = [stage[0] if stage else None for stage in ordered]
+    return Question(
+        q_id,
+        paths,
+        [r.name if r is not None else None for r in primary],
+        [r.size if r is not None else 0 for r in primary],
+        links=[r.link if r is not None else None for r in primary],
+        renditions=ordered,
+    )
+
+
+def _scan_questions(
+    topic_dir: Path,
+    topic_id: str,
+    root: Path,
+    only: Optional[Set[str]] = None,
+    skipped: Optional[List[list]] = None,
+) -> Tuple[Question, ...]:
+    """
+    扫描单个话题文件夹，构建并筛选有效的 Question，按 id 升序返回。
+    每个文件的存在性和大小在这里检查一次，空文件视为缺失。
+    only 不为 None 时只考虑其中列出的文件名 (热更新时用来排除仍在复制中的文件)。
+    别名表中列出的文件即使已被删除，也按规范文件参与构建。
+    skipped 不为 None 时追加被跳过的空文件 [文件名, 字节数, mtime_ns]，写入索引后下次启动复查。
+    """
+    # 临时存储: { sequence_id: [文件名 x4] } 和 { sequence_id: [字节数 x4] }
+    temp_names: Dict[int, List[Optional[str]]] = {}
+    temp_sizes: Dict[int, List[int]] = {}
+    # 有多个版本的阶段: { (sequence_id, type_id): {版本标签: (文件名, 字节数)} }
+    temp_renditions: Dict[Tuple[int, int], Dict[str, Tuple[str, int]]] = {}
+
+    # 扫描 MP4 文件 (os.scandir 在 Windows 上可直接拿到文件大小)
+    with os.scandir(topic_dir) as it:
+        video_entries = [
+            e for e in it
+            if e.name.endswith(".mp4") and (only is None or e.name in only) and e.is_file()
+        ]
+
+    # (文件名, 目录项)；去重后只存在于别名表中的文件没有目录项
+    files: List[Tuple[str, Optional[os.DirEntry]]] = [(e.name, e) for e in video_entries]
+    assets_dir = topic_dir.parent
+    aliases = read_aliases(assets_dir).get(topic_id)
+    if aliases:
+        present = {e.name for e in video_entries}
+        files.extend((name, None) for name in sorted(aliases) if name not in present)
+
+    for name, entry in files:
+        # 正则匹配: q{sequence_id}_{type_id}_{desc}.mp4
+        # 示例: q1_0_ask.mp4
+        match = VIDEO_NAME_PATTERN.match(name)
+
+        if match:
+            try:
+                seq_id = int(match.group(1))
+                type_id = int(match.group(2))
+
+                if type_id >= STAGE_COUNT:
+                    print(f"[Warn] 跳过未知阶段的视频: {name}")
+                    continue
+
+                if aliases and name in aliases:
+                    size = _alias_size(assets_dir, aliases[name])
+                else:
+                    st = entry.stat()
+                    size = st.st_size
+                    if size == 0 and skipped is not None:
+                        # 原地写完不会改变目录 mtime，只能靠索引里记下的签名发现
+                        skipped.append([name, size, st.st_mtime_ns])
+                if size == 0:
+                    print(f"[Warn] 跳过空文件: {(topic_dir / name).as_posix()}")
+                    continue
+
+                if seq_id not in temp_names:
+                    temp_names[seq_id] = [None] * STAGE_COUNT
+                    temp_sizes[seq_id] = [0] * STAGE_COUNT
+
+                previous = temp_names[seq_id][type_id]
+                key = (seq_id, type_id)
+                if key in temp_renditions or (
+                    previous is not None and rendition_label(previous) != rendition_label(name)
+                ):
+                    # 同一阶段的另一个版本；标签相同的文件仍是后出现的覆盖先出现的
+                    stage = temp_renditions.setdefault(
+                        key, {rendition_label(previous): (previous, temp_sizes[seq_id][type_id])}
+                    )
+                    stage[rendition_label(name)] = (name, size)
+                    continue
+
+                temp_names[seq_id][type_id] = name
+                temp_sizes[seq_id][type_id] = size
+
+            except ValueError:
+                print(f"[Warn] 解析数字失败: {name}")
+        else:
+            print(f"[Warn] 跳过不符合命名规范的文件: {(topic_dir / name).as_posix()}")
+
+    # 构建并筛选有效的 Question 对象 (同一话题的问题共享一份路径前缀)
+    paths = TopicPaths(topic_dir, root)
+    valid_questions: List[Question] = []
+
+    for seq_id, names in temp_names.items():
+        if temp_renditions and any((seq_id, t) in temp_renditions for t in range(STAGE_COUNT)):
+            stages = [
+                list(temp_renditions[(seq_id, t)].values()) if (seq_id, t) in temp_renditions
+                else [(names[t], temp_sizes[seq_id][t])] if names[t] is not None else []
+                for t in range(STAGE_COUNT)
+            ]
+            q = question_from_renditions(seq_id, paths, [
+                [_make_rendition(n, size, aliases, assets_dir, root) for n, size in stage] for stage in stages
+            ])
+        else:
+            links = _question_links(names, aliases, assets_dir, root)
+            q = Question(seq_id, paths, names, temp_sizes[seq_id], links=links)
+        if q.is_valid():
+            valid_questions.append(q)
+        else:
+            print(f"[Warn] Topic '{topic_id}' Question {seq_id} 不完整，缺少阶段: {q.missing_stages()}")
+
+    # 按 id 升序排列
+    valid_questions.sort(key=lambda x: x.id)
+    return tuple(valid_questions)
+
+
+def _count_questions(topic_dir: Path, skipped: Optional[List[list]] = None) -> int:
+    """
+    只统计完整问题的数量，不构建 Question 对象 (懒加载模式的启动路径)。
+    每个 sequence_id 用一个 4 位掩码记录已出现的阶段，四位齐全才算有效。
+    与 _scan_questions 的筛选一致 (只算普通文件，空文件视为缺失)，解析前后的数量才不会对不上；
+    只 stat 符合命名规范的文件。skipped 的含义同 _scan_questions。
+    """
+    stage_masks: Dict[int, int] = {}
+    assets_dir = topic_dir.parent
+    aliases = read_aliases(assets_dir).get(topic_dir.name) or {}
+    present: Set[str] = set()
+    with os.scandir(topic_dir) as it:
+        for entry in it:
+            match = VIDEO_NAME_PATTERN.match(entry.name)
+            if not match or int(match.group(2)) >= STAGE_COUNT:
+                continue
+            present.add(entry.name)
+            if entry.name in aliases:
+                size = _alias_size(assets_dir, aliases[entry.name])
+            elif entry.is_file():
+                st = entry.stat()
+                size = st.st_size
+                if size == 0 and skipped is not None:
+                    skipped.append([entry.name, size, st.st_mtime_ns])
+            else:
+                continue
+            if size:
+                seq_id = int(match.group(1))
+                stage_masks[seq_id] = stage_masks.get(seq_id, 0) | (1 << int(match.group(2)))
+    # 去重后只存在于别名表中的文件同样计入
+    for name, target in aliases.items():
+        match = VIDEO_NAME_PATTERN.match(name)
+        if name in present or not match or int(match.group(2)) >= STAGE_COUNT:
+            continue
+        if _alias_size(assets_dir, target):
+            seq_id = int(match.group(1))
+            stage_masks[seq_id] = stage_masks.get(seq_id, 0) | (1 << int(match.group(2)))
+    return sum(1 for mask in stage_masks.values() if mask == 0b1111)
+
+
+def scan_topic(topic_dir: str, only: Optional[Set[str]] = None) -> Topic:
+    """
+    重新扫描单个话题文件夹并返回完整解析的 Topic (热更新使用)。
+    only 为允许参与解析的文件名集合，None 表示全部。
+    """
+    path = Path(topic_dir)
+    questions = _scan_questions(path, path.name, _resolved_root(), only)
+    return Topic(
+        id=path.name,
+        name=_display_name(path.name),
+        question_count=len(questions),
+        path=str(path),
+        _questions=questions,
+    )
+
+
+def _scan_topic_dir(topic_dir: Path, root: Path, lazy: bool = False) -> Tuple[Topic, List[list]]:
+    """
+    扫描单个话题文件夹，返回 (Topic, 被跳过的文件)，Topic 可能没有有效问题。
+    lazy=True 时只统计问题数量，问题列表留到 Topic.resolve() 时再构建。
+    被跳过的文件为 [文件名, 字节数, mtime_ns]，见 _pending_changed。
+    """
+    topic_id = topic_dir.name
+    skipped: List[list] = []
+    with metrics.span("catalog.topic.scan"):
+        if lazy:
+            topic = Topic(
+                id=topic_id,
+                name=_display_name(topic_id),
+                question_count=_count_questions(topic_dir, skipped),
+                path=str(topic_dir),
+            )
+            return topic, skipped
+        questions = _scan_questions(topic_dir, topic_id, root, skipped=skipped)
+    topic = Topic(
+        id=topic_id,
+        name=_display_name(topic_id),
+        question_count=len(questions),
+        path=str(topic_dir),
+        _questions=questions,
+    )
+    return topic, skipped
+
+
+def _pending_changed(dir_path: str, pending: Optional[list]) -> bool:
+    """
+    索引记录的被跳过文件 (空文件、复制到一半) 是否已经变化。
+    文件在原地写完不会改变目录 mtime，只靠目录 mtime 判断会让这些问题一直被排除。
+    """
+    for name, size, mtime_ns in pending or ():
+        try:
+            st = os.stat(os.path.join(dir_path, name))
+        except OSError:
+            return True
+        if st.st_size != size or st.st_mtime_ns != mtime_ns:
+            return True
+    return False
+
+
+def _topic_to_entry(topic: Topic, mtime_ns: int, pending: Optional[List[list]] = None) -> dict:
+    """
+    把 Topic 序列化为索引条目 (JSON 的 key 只能是字符串)。
+    未解析的懒加载话题只记录数量，questions 为 null。
+    pending 为扫描时被跳过的文件 [文件名, 字节数, mtime_ns]，复用条目前逐个复查。
+    """
+    questions = None
+    renditions = None
+    if topic.is_resolved:
+        # 每个问题只记录 [id, [文件名 x4], [字节数 x4]]，目录前缀由话题路径还原
+        questions = [[q.id, list(q.names), list(q.sizes)] for q in topic.questions]
+        # 各阶段最清晰版本以外的其他版本: [id, type_id, 文件名, 字节数]
+        renditions = [
+            [q.id, t, r.name, r.size]
+            for q in topic.questions if q.renditions is not None
+            for t, stage in enumerate(q.renditions) for r in stage[1:]
+        ]
+    entry = {
+        "mtime_ns": mtime_ns,
+        "name": topic.name,
+        "question_count": topic.question_count,
+        "questions": questions,
+    }
+    if renditions:
+        entry["renditions"] = renditions
+    if pending:
+        entry["pending"] = pending
+    return entry
+
+
+def _topic_from_entry(topic_id: str, dir_path: str, entry: dict, lazy: bool, root: Path) -> Topic:
+    """
+    从索引条目还原 Topic，条目格式不对时抛出 ValueError。
+    lazy=True 时不还原 Question 对象；非懒加载但条目里没有问题列表时同样视为不可用。
+    """
+    try:
+        name = str(entry["name"])
+        count = int(entry["question_count"])
+        raw_questions = entry["questions"]
+        if lazy:
+            return Topic(id=topic_id, name=name, question_count=count, path=dir_path)
+        if raw_questions is None:
+            raise ValueError("缺少问题列表")
+        paths = TopicPaths(Path(dir_path), root)
+        # 别名不写进索引，还原时按当前别名表重新套用
+        assets_dir = Path(dir_path).parent
+        aliases = read_aliases(assets_dir).get(topic_id)
+        extra: Dict[int, List[Tuple[int, str, int]]] = {}
+        for q_id, type_id, r_name, r_size in entry.get("renditions") or ():
+            extra.setdefault(int(q_id), []).append((int(type_id), str(r_name), int(r_size)))
+        questions = []
+        # 可信清单的条目在后面附带时长等校验信息，这里用不到
+        for q_id, names, sizes, *_ in raw_questions:
+            q_id = int(q_id)
+            names = [None if n is None else str(n) for n in names]
+            sizes = [int(n) for n in sizes]
+            if q_id in extra:
+                stages = [
+                    [_make_rendition(n, size, aliases, assets_dir, root)] if n is not None else []
+                    for n, size in zip(names, sizes)
+                ]
+                for type_id, r_name, r_size in extra[q_id]:
+                    stages[type_id].append(_make_rendition(r_name, r_size, aliases, assets_dir, root))
+                questions.append(question_from_renditions(q_id, paths, stages))
+                continue
+            questions.append(Question(
+                q_id,
+                paths,
+                names,
+                sizes,
+                links=_question_links(names, aliases, assets_dir, root),
+            ))
+        questions = tuple(questions)
+        if any(len(q.names) != STAGE_COUNT or not q.is_valid() for q in questions):
+            raise ValueError("问题列表不完整")
+        return Topic(
+            id=topic_id,
+            name=name,
+            question_count=len(questions),
+            path=dir_path,
+            _questions=questions,
+        )
+    except (KeyError, TypeError, AttributeError, IndexError, ValueError) as e:
+        raise ValueError(f"索引条目不可用: {topic_id}") from e
+
+
+def _read_index(index_path: Path, assets_dir: str) -> Tuple[Dict[str, dict], str]:
+    """
+    读取目录索引。
+    返回 (条目字典, 状态)，状态为 "ok" / "missing" / "corrupt"。
+    """
+    if not index_path.exists():
+        return {}, "missing"
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION or data.get("assets_dir") != assets_dir:
+            return {}, "corrupt"
+        entries = data["topics"]
+        if not isinstance(entries, dict):
+            return {}, "corrupt"
+        return entries, "ok"
+    except (OSError, ValueError, KeyError, AttributeError):
+        return {}, "corrupt"
+
+
+def _read_manifest(manifest_path: Path) -> Dict[str, dict]:
+    """读取可信清单，返回 {topic_id: 条目}；没有清单或格式不对时返回空字典"""
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION or not isinstance(data.get("topics"), dict):
+            raise ValueError(f"不支持的版本: {data.get('version')}")
+        return data["topics"]
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"[Warn] 可信清单不可用，忽略: {e}")
+        return {}
+
+
+def _write_index(index_path: Path, assets_dir: str, entries: Dict[str, dict]) -> None:
+    """原子写入目录索引 (先写临时文件再替换)，失败只打印警告"""
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    data = {"version": INDEX_VERSION, "assets_dir": assets_dir, "topics": entries}
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"[Warn] 目录索引写入失败: {e}")
+
+
+class _CatalogScan:
+    """
+    一次目录扫描的上下文：负责读取索引、判断哪些话题目录可以复用、
+    记录扫描结果并在结束时回写索引。同步和异步加载共用这套逻辑。
+    扫描本身 (_scan_topic_dir) 可以放到线程里执行，其余方法只在调用方线程里使用。
+    """
+
+    def __init__(self, assets_dir: str, use_index: bool, lazy: bool, use_manifest: bool = True):
+        global _last_load_stats
+        self.assets_dir = assets_dir
+        self.base_path = Path(assets_dir)
+        self.use_index = use_index
+        self.use_manifest = use_manifest
+        self.lazy = lazy
+        self.index_path = self.base_path / INDEX_FILENAME
+        self.manifest_entries: Dict[str, dict] = {}
+        self.root = _resolved_root()
+        self.stats = LoadStats()
+        self.new_entries: Dict[str, dict] = {}
+        self.cached_entries: Dict[str, dict] = {}
+        self.index_state = "disabled"
+        self.started = time.perf_counter()
+        _last_load_stats = self.stats
+
+    def list_dirs(self) -> List[Tuple[str, str, int]]:
+        """
+        读取索引并列出所有话题目录，返回 [(topic_id, 目录路径, mtime_ns)]。
+        使用 os.scandir：目录类型和 mtime 都来自同一次遍历，避免额外的 stat。
+        """
+        if self.use_index:
+            self.cached_entries, self.index_state = _read_index(self.index_path, self.assets_dir)
+        if self.use_manifest:
+            self.manifest_entries = _read_manifest(self.base_path / MANIFEST_FILENAME)
+
+        with os.scandir(self.base_path) as it:
+            # 以点开头的目录 (例如打包文件的解包缓存) 不是话题
+            return [
+                (e.name, e.path, e.stat().st_mtime_ns)
+                for e in it if e.is_dir() and not e.name.startswith(".")
+            ]
+
+    def try_cached(self, topic_id: str, dir_path: str, mtime_ns: int) -> Optional[Topic]:
+        """
+        mtime 未变化时直接从可信清单或索引还原 Topic，否则返回 None (需要重新扫描)。
+        可信清单里的视频已经逐个校验过，即使是懒加载也直接构建完整的问题列表，之后不再访问单个文件。
+        """
+        cached = self.cached_entries.get(topic_id)
+        trusted = self.manifest_entries.get(topic_id)
+        if trusted is not None and trusted.get("mtime_ns") == mtime_ns:
+            topic = self.from_manifest(topic_id, dir_path, mtime_ns)
+            if topic is not None:
+                return topic
+
+        if cached is None or cached.get("mtime_ns") != mtime_ns:
+            return None
+        if not self.lazy and cached.get("questions") is None:
+            # 上次是懒加载写入的条目，只有数量没有问题列表
+            return None
+        try:
+            if _pending_changed(dir_path, cached.get("pending")):
+                return None
+        except (TypeError, ValueError):
+            print(f"[Warn] 索引条目不可用: {topic_id}，重新扫描")
+            return None
+        try:
+            with metrics.span("catalog.topic.index"):
+                topic = _topic_from_entry(topic_id, dir_path, cached, self.lazy, self.root)
+        except ValueError as e:
+            print(f"[Warn] {e}，重新扫描")
+            return None
+        self.new_entries[topic_id] = cached
+        self.stats.reused_dirs += 1
+        return topic
+
+    def manifest_matches(self, topic_id: str, dir_path: str) -> bool:
+        """
+        索引也没有命中时 (例如素材随 APK 解压后目录 mtime 全部改变)，
+        目录里的视频文件名与校验时完全一致也可以信任清单；只列目录，不检查单个文件。
+        只读，可以在线程里执行。
+        """
+        trusted = self.manifest_entries.get(topic_id)
+        if trusted is None or not isinstance(trusted.get("files"), list):
+            return False
+        with os.scandir(dir_path) as it:
+            names = sorted(e.name for e in it if VIDEO_NAME_PATTERN.match(e.name))
+        return names == trusted["files"]
+
+    def try_manifest(self, topic_id: str, dir_path: str, mtime_ns: int) -> Optional[Topic]:
+        if not self.manifest_matches(topic_id, dir_path):
+            return None
+        return self.from_manifest(topic_id, dir_path, mtime_ns)
+
+    def from_manifest(self, topic_id: str, dir_path: str, mtime_ns: int) -> Optional[Topic]:
+        """按可信清单构建 Topic 并记录对应的索引条目，条目不可用时返回 None"""
+        trusted = self.manifest_entries[topic_id]
+        try:
+            with metrics.span("catalog.topic.manifest"):
+                topic = _topic_from_entry(topic_id, dir_path, trusted, False, self.root)
+        except ValueError as e:
+            print(f"[Warn] 可信清单{e}，重新扫描")
+            return None
+        cached = self.cached_entries.get(topic_id)
+        if cached is None or cached.get("mtime_ns") != mtime_ns:
+            cached = _topic_to_entry(topic, mtime_ns)
+        self.new_entries[topic_id] = cached
+        self.stats.trusted_dirs += 1
+        return topic
+
+    def record_scanned(self, topic: Topic, mtime_ns: int, pending: Optional[List[list]] = None) -> None:
+        """记录一个重新扫描得到的话题 (及被跳过的文件)，稍后写入索引"""
+        self.new_entries[topic.id] = _topic_to_entry(topic, mtime_ns, pending)
+        self.stats.rescanned_dirs += 1
+
+    def finish(self, topic_count: int) -> None:
+        """汇总命中情况，必要时回写索引并打印加载结果"""
+        stats = self.stats
+        if self.index_state == "disabled":
+            stats.index_status = "disabled"
+        elif self.index_state != "ok":
+            stats.index_status = "corrupt" if self.index_state == "corrupt" else "miss"
+        elif stats.rescanned_dirs == 0:
+            stats.index_status = "hit"
+        else:
+            stats.index_status = "partial"
+
+        # 有目录被重新扫描或被删除时才回写索引
+        if self.use_index and (
+            stats.rescanned_dirs > 0 or set(self.cached_entries) != set(self.new_entries)
+        ):
+            _write_index(self.index_path, self.assets_dir, self.new_entries)
+
+        trusted = f", 可信清单 {stats.trusted_dirs} 个" if stats.trusted_dirs else ""
+        print(f"[Cache] 目录索引: {stats.index_status} "
+              f"(复用 {stats.reused_dirs} 个{trusted}, 重新扫描 {stats.rescanned_dirs} 个)")
+        print(f"数据加载完成: 共加载 {topic_count} 个话题。")
+        metrics.record("catalog.load", (time.perf_counter() - self.started) * 1000)
+
+
+def _load_bundle(assets_dir: str) -> Optional[List[Topic]]:
+    """
+    assets 目录下有打包文件时直接从它的索引构建话题 (不遍历目录)；
+    没有打包文件或打包文件损坏时返回 None，由调用方退回目录扫描。
+    打包文件在进程内只映射一次 (bundle.open_bundle)，重复加载复用同一个实例。
+    """
+    global _last_load_stats
+    from bundle import BundleError, find_bundle, open_bundle
+
+    path = find_bundle(assets_dir)
+    if path is None:
+        return None
+    started = time.perf_counter()
+    try:
+        topics = [t for t in open_bundle(path).topics() if t.question_count]
+    except (OSError, BundleError) as e:
+        print(f"[Warn] 打包文件不可用，改为扫描目录: {e}")
+        return None
+    _last_load_stats = LoadStats(index_status="bundle")
+    print(f"[Bundle] 从打包文件加载: {path}")
+    print(f"数据加载完成: 共加载 {len(topics)} 个话题。")
+    metrics.record("catalog.load", (time.perf_counter() - started) * 1000)
+    return topics
+
+
+def load_topics(
+    assets_dir: str,
+    use_index: bool = True,
+    lazy: bool = False,
+    use_bundle: bool = True,
+    use_manifest: bool = True,
+) -> List[Topic]:
     """
     扫描指定目录，构建 Topic 和 Question 对象列表。
+    use_index=True 时复用 assets 目录下的索引文件，只重新扫描 mtime 变化的话题文件夹；
+    索引缺失或损坏时退回全量扫描。命中情况见 get_last_load_stats()。
+    lazy=True 时只产出话题名称和问题数量，问题列表在首次访问 Topic.questions 时才解析。
+    use_bundle=True 且 assets 目录下有打包文件 (bundle.BUNDLE_FILENAME) 时改为从打包文件加载；
+    打包文件的话题总是在首次访问时才解析并解包 (与 lazy 无关)。
+    use_manifest=True 时 mtime 未变化的话题直接按可信清单 (MANIFEST_FILENAME) 构建，不检查单个文件。
     """
+    if use_bundle:
+        bundled = _load_bundle(assets_dir)
+        if bundled is not None:
+            return bundled
+
     topics: List[Topic] = []
-    base_path = Path(assets_dir)
+    scan = _CatalogScan(assets_dir, use_index, lazy, use_manifest)
 
-    if not base_path.exists():
+    if not scan.base_path.exists():
         print(f"Warning: Assets directory '{assets_dir}' not found.")
         return []
 
     # 遍历 assets 下的所有子文件夹 (每个都是一个 Topic)
-    for topic_dir in base_path.iterdir():
-        if not topic_dir.is_dir():
-            continue
-
-        topic_id = topic_dir.name
-        # 简单的名称处理：去掉 "topic_" 前缀并大写首字母，提升可读性
-        # 例如: "topic_family" -> "Family"
-        display_name = topic_id.replace("topic_", "").replace("_", " ").title()
-
-        # 临时存储字典: { sequence_id: { type_id: file_path } }
-        temp_questions: Dict[int, Dict[int, str]] = {}
-
-        # 扫描 MP4 文件
-        for video_file in topic_dir.glob("*.mp4"):
-            # 正则匹配: q{sequence_id}_{type_id}_{desc}.mp4
-            # 示例: q1_0_ask.mp4
-            match = re.match(r"^q(\d+)_(\d+)_(.+)\.mp4$", video_file.name)
-
-            if match:
-                try:
-                    seq_id = int(match.group(1))
-                    type_id = int(match.group(2))
-                    
-                    # 关键点：Flet 需要相对路径且使用正斜杠 "/"
-                    # Path.as_posix() 会自动处理 Windows 反斜杠问题
-                    rel_path = video_file.as_posix()
-
-                    if seq_id not in temp_questions:
-                        temp_questions[seq_id] = {}
-                    
-                    temp_questions[seq_id][type_id] = rel_path
-
-                except ValueError:
-                    print(f"[Warn] 解析数字失败: {video_file.name}")
-            else:
-                print(f"[Warn] 跳过不符合命名规范的文件: {video_file.as_posix()}")
-
-        # 构建并筛选有效的 Question 对象
-        valid_questions: List[Question] = []
-        
-        for seq_id, videos_map in temp_questions.items():
-            q = Question(id=seq_id, videos=videos_map)
-            if q.is_valid():
-                valid_questions.append(q)
-            else:
-                missing = {0, 1, 2, 3} - set(videos_map.keys())
-                print(f"[Warn] Topic '{topic_id}' Question {seq_id} 不完整，缺少阶段: {missing}")
+    for topic_id, dir_path, mtime_ns in scan.list_dirs():
+        topic = scan.try_cached(topic_id, dir_path, mtime_ns) or scan.try_manifest(topic_id, dir_path, mtime_ns)
+        if topic is None:
+            topic, skipped = _scan_topic_dir(Path(dir_path), scan.root, lazy)
+            scan.record_scanned(topic, mtime_ns, skipped)
 
         # 如果该 Topic 下有有效问题，才添加到结果列表
-        if valid_questions:
-            # 按 id 升序排列
-            valid_questions.sort(key=lambda x: x.id)
-            topics.append(Topic(
-                id=topic_id, 
-                name=display_name, 
-                questions=valid_questions
-            ))
+        if topic.question_count:
+            topics.append(topic)
 
-    print(f"数据加载完成: 共加载 {len(topics)} 个话题。")
+    scan.finish(len(topics))
     return topics
 
 
+async def iter_topics(
+    assets_dir: str,
+    use_index: bool = True,
+    lazy: bool = False,
+    max_workers: Optional[int] = None,
+    use_bundle: bool = True,
+    use_manifest: bool = True,
+) -> AsyncIterator[Topic]:
+    """
+    异步版本的 load_topics：在线程池中并行扫描各个话题目录，
+    每完成一个就立即 yield，调用方可以边加载边刷新界面。
+    索引命中的话题不进线程池，最先产出；产出顺序不保证与 load_topics 一致。
+    有打包文件时一次性读取其索引后依次产出。
+    """
+    loop = asyncio.get_running_loop()
+    if use_bundle:
+        bundled = await loop.run_in_executor(None, _load_bundle, assets_dir)
+        if bundled is not None:
+            for topic in bundled:
+                yield topic
+            return
+
+    scan = _CatalogScan(assets_dir, use_index, lazy, use_manifest)
+
+    if not await loop.run_in_executor(None, scan.base_path.exists):
+        print(f"Warning: Assets directory '{assets_dir}' not found.")
+        return
+
+    dirs = await loop.run_in_executor(None, scan.list_dirs)
+    topic_count = 0
+    pending: List[Tuple[str, int]] = []
+
+    for topic_id, dir_path, mtime_ns in dirs:
+        topic = scan.try_cached(topic_id, dir_path, mtime_ns)
+        if topic is None:
+            pending.append((dir_path, mtime_ns))
+        elif topic.question_count:
+            topic_count += 1
+            yield topic
+
+    if pending:
+        workers = max_workers or min(8, len(pending), (os.cpu_count() or 1) + 4)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topic-scan")
+
+        async def scan_one(dir_path: str, mtime_ns: int) -> Tuple[Topic, int, Optional[List[list]]]:
+            """返回 (Topic, mtime_ns, 被跳过的文件)；按可信清单构建的话题不需要记录，第三项为 None"""
+            topic_id = os.path.basename(dir_path)
+            if await loop.run_in_executor(pool, scan.manifest_matches, topic_id, dir_path):
+                topic = scan.from_manifest(topic_id, dir_path, mtime_ns)
+                if topic is not None:
+                    return topic, mtime_ns, None
+            topic, skipped = await loop.run_in_executor(pool, _scan_topic_dir, Path(dir_path), scan.root, lazy)
+            return topic, mtime_ns, skipped
+
+        try:
+            for fut in asyncio.as_completed([scan_one(p, m) for p, m in pending]):
+                topic, mtime_ns, skipped = await fut
+                if skipped is not None:
+                    scan.record_scanned(topic, mtime_ns, skipped)
+                if topic.question_count:
+                    topic_count += 1
+                    yield topic
+        finally:
+            # 调用方提前放弃迭代时不等待剩余扫描，避免阻塞事件循环
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    await loop.run_in_executor(None, scan.finish, topic_count)
+
+
 # ==========================================
 # 4. Verification (Test Code)
 # ==========================================
@@ -0,0 +1,258 @@
+"""
+素材去重工具：按内容哈希找出不同话题/阶段之间完全相同的视频 (例如各话题共用的表扬视频)。
+
+用法: python dedupe.py [assets目录] [--apply] [--workers N]
+  默认只报告重复组；--apply 把每组重复文件合并为 .shared/ 下的一个规范文件，
+  原文件删除，并写入别名表 .aliases.json，data_loader 通过别名表把对应阶段指向规范文件。
+
+哈希结果按 (大小, mtime) 缓存在 .hash_cache.json 中，再次运行只计算新增或修改过的文件；
+大小独一无二的文件不可能重复，不需要计算哈希。
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from data_loader import ALIASES_FILENAME, ALIASES_VERSION, VIDEO_NAME_PATTERN, read_aliases
+
+# 规范文件所在目录 (以点开头，加载话题时会被跳过)
+SHARED_DIRNAME = ".shared"
+HASH_CACHE_FILENAME = ".hash_cache.json"
+HASH_CACHE_VERSION = 1
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class VideoFile:
+    rel: str          # 相对 assets 目录的路径，例如 "topic_family/q1_2_praise.mp4"
+    path: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class DuplicateGroup:
+    digest: str
+    size: int
+    files: List[str]  # 相对路径，规范文件 (若已存在) 排在最前
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * (len(self.files) - 1)
+
+
+# ==========================================
+# 1. 收集与哈希
+# ==========================================
+
+def collect_videos(assets_dir: str) -> List[VideoFile]:
+    """列出所有话题文件夹下的视频，以及已有的规范文件"""
+    videos = []
+    with os.scandir(assets_dir) as topics:
+        for topic in sorted(topics, key=lambda e: e.name):
+            if not topic.is_dir() or (topic.name.startswith(".") and topic.name != SHARED_DIRNAME):
+                continue
+            shared = topic.name == SHARED_DIRNAME
+            with os.scandir(topic.path) as files:
+                for e in sorted(files, key=lambda e: e.name):
+                    if not e.is_file() or not (e.name.endswith(".mp4") if shared else VIDEO_NAME_PATTERN.match(e.name)):
+                        continue
+                    st = e.stat()
+                    if st.st_size:
+                        videos.append(VideoFile(f"{topic.name}/{e.name}", e.path, st.st_size, st.st_mtime_ns))
+    return videos
+
+
+def _hash_file(path: str) -> str:
+    # hashlib 在计算大块数据时会释放 GIL，线程池即可并行
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load_hash_cache(path: Path) -> Dict[str, list]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == HASH_CACHE_VERSION and isinstance(data.get("files"), dict):
+            return data["files"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+
+def _write_json(path: Path, data: dict) -> None:
+    """先写临时文件再原子替换"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def hash_videos(
+    assets_dir: str, videos: List[VideoFile], workers: Optional[int] = None
+) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    计算可能重复的文件 (大小相同的至少两个) 的哈希，返回 ({相对路径: 哈希}, 统计)。
+    (大小, mtime) 没变的文件直接复用缓存。
+    """
+    cache_path = Path(assets_dir) / HASH_CACHE_FILENAME
+    cache = _load_hash_cache(cache_path)
+
+    by_size: Dict[int, List[VideoFile]] = {}
+    for v in videos:
+        by_size.setdefault(v.size, []).append(v)
+    candidates = [v for group in by_size.values() if len(group) > 1 for v in group]
+
+    digests: Dict[str, str] = {}
+    pending: List[VideoFile] = []
+    for v in candidates:
+        cached = cache.get(v.rel)
+        if cached and cached[0] == v.size and cached[1] == v.mtime_ns:
+            digests[v.rel] = cached[2]
+        else:
+            pending.append(v)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for v, digest in zip(pending, pool.map(_hash_file, (v.path for v in pending))):
+                digests[v.rel] = digest
+
+    # 缓存只保留仍然存在的文件
+    new_cache = {v.rel: [v.size, v.mtime_ns, digests[v.rel]] for v in candidates}
+    if new_cache != cache:
+        try:
+            _write_json(cache_path, {"version": HASH_CACHE_VERSION, "files": new_cache})
+        except OSError as e:
+            print(f"[Warn] 哈希缓存写入失败: {e}")
+
+    stats = {"files": len(videos), "candidates": len(candidates),
+             "hashed": len(pending), "cached": len(candidates) - len(pending)}
+    return digests, stats
+
+
+def find_duplicates(
+    assets_dir: str, workers: Optional[int] = None
+) -> Tuple[List[DuplicateGroup], Dict[str, int]]:
+    """返回内容完全相同的文件组 (按浪费的空间从大到小) 和哈希统计"""
+    videos = collect_videos(assets_dir)
+    digests, stats = hash_videos(assets_dir, videos, workers)
+    sizes = {v.rel: v.size for v in videos}
+
+    by_digest: Dict[str, List[str]] = {}
+    for rel in sorted(digests):
+        by_digest.setdefault(digests[rel], []).append(rel)
+
+    shared_prefix = SHARED_DIRNAME + "/"
+    groups = []
+    for digest, files in by_digest.items():
+        if len(files) < 2:
+            continue
+        files.sort(key=lambda rel: (not rel.startswith(shared_prefix), rel))
+        groups.append(DuplicateGroup(digest, sizes[files[0]], files))
+    groups.sort(key=lambda g: (-g.wasted_bytes, g.files[0]))
+    return groups, stats
+
+
+# ==========================================
+# 2. 合并为规范文件
+# ==========================================
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """优先用硬链接 (不占额外空间)，跨设备或不支持时复制"""
+    tmp_path = dst + ".tmp"
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def apply_dedupe(assets_dir: str, groups: List[DuplicateGroup]) -> Dict[str, int]:
+    """
+    把每组重复文件合并为 .shared/<哈希>.mp4 并写入别名表，最后删除原文件。
+    顺序保证中途中断也不会丢视频：先有规范文件，再写别名表，最后才删除。
+    """
+    base = Path(assets_dir)
+    shared_dir = base / SHARED_DIRNAME
+    shared_dir.mkdir(exist_ok=True)
+
+    aliases_path = base / ALIASES_FILENAME
+    aliases = {
+        f"{topic_id}/{name}": target
+        for topic_id, names in read_aliases(base).items()
+        for name, target in names.items()
+    }
+
+    to_remove: List[str] = []
+    for group in groups:
+        if group.files[0].startswith(SHARED_DIRNAME + "/"):
+            canonical, members = group.files[0], group.files[1:]
+        else:
+            canonical, members = f"{SHARED_DIRNAME}/{group.digest[:32]}.mp4", group.files
+            _link_or_copy(str(base / members[0]), str(base / canonical))
+        for rel in members:
+            if rel.startswith(SHARED_DIRNAME + "/"):
+                # 同一内容出现了两个规范文件 (手工复制导致)，多余的那个直接删除
+                to_remove.append(rel)
+                continue
+            aliases[rel] = canonical
+            to_remove.append(rel)
+
+    _write_json(aliases_path, {"version": ALIASES_VERSION, "aliases": aliases})
+
+    removed_bytes = 0
+    for rel in to_remove:
+        path = base / rel
+        try:
+            removed_bytes += path.stat().st_size
+            path.unlink()
+        except OSError as e:
+            print(f"[Warn] 删除失败: {path.as_posix()} ({e})")
+
+    return {"groups": len(groups), "removed": len(to_remove), "aliases": len(aliases),
+            "removed_bytes": removed_bytes}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="按内容哈希查找并合并 assets 中重复的视频")
+    parser.add_argument("assets_dir", nargs="?", default="assets", help="素材目录 (默认 assets)")
+    parser.add_argument("--apply", action="store_true", help="合并重复文件并写入别名表 (默认只报告)")
+    parser.add_argument("--workers", type=int, default=None, help="哈希线程数 (默认自动)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.assets_dir):
+        print(f"Warning: Assets directory '{args.assets_dir}' not found.")
+        return 2
+
+    groups, stats = find_duplicates(args.assets_dir, args.workers)
+    print(f"[Dedupe] 视频 {stats['files']} 个, 大小相同需比对 {stats['candidates']} 个 "
+          f"(新计算哈希 {stats['hashed']} 个, 复用缓存 {stats['cached']} 个)")
+    for group in groups:
+        print(f"[Dedupe] {group.digest[:12]}  {group.size} 字节 x {len(group.files)}")
+        for rel in group.files:
+            print(f"    {rel}")
+
+    wasted = sum(g.wasted_bytes for g in groups)
+    print(f"重复组 {len(groups)} 个, 可节省 {wasted / 1024 / 1024:.1f} MB")
+
+    if args.apply and groups:
+        result = apply_dedupe(args.assets_dir, groups)
+        print(f"[Dedupe] 已合并: 删除 {result['removed']} 个文件 ({result['removed_bytes'] / 1024 / 1024:.1f} MB), "
+              f"别名表共 {result['aliases']} 条")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
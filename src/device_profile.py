@@ -0,0 +1,98 @@
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from data_loader import Question
+
+# ==========================================
+# 设备档位与视频版本选择 (Rendition Selection)
+# ==========================================
+#
+# 素材可以为同一阶段提供多个版本 (q1_0_ask@720p.mp4 / q1_0_ask@480p.mp4 / 原始版本)。
+# 播放页按设备档位挑选不超过上限的最清晰版本，再根据最近几次的加载耗时自动降档或回升。
+# GONGGONG_DEVICE_PROFILE=low|tablet|desktop  手动指定档位，默认按平台判断
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    name: str
+    max_height: Optional[int] = None  # "@720p" 这类分辨率版本的上限，None 为不限
+    max_kbps: Optional[int] = None    # "@800k" 这类码率版本的上限，None 为不限
+
+    def allows(self, label: str) -> bool:
+        """该版本是否在档位上限内；原始版本 (没有标签) 的清晰度未知，只有不限档位才使用"""
+        if not label:
+            return self.max_height is None and self.max_kbps is None
+        value = int(label[:-1])
+        limit = self.max_height if label[-1] == "p" else self.max_kbps
+        return limit is None or value <= limit
+
+
+PROFILES: Dict[str, DeviceProfile] = {
+    "low": DeviceProfile("low", max_height=480, max_kbps=1000),
+    "tablet": DeviceProfile("tablet", max_height=720, max_kbps=2500),
+    "desktop": DeviceProfile("desktop"),
+}
+
+
+def detect(page=None) -> DeviceProfile:
+    """
+    环境变量优先；否则手机/平板 (Android / iOS) 和浏览器模式 (病房平板) 用 tablet 档，
+    桌面端不限清晰度
+    """
+    name = os.environ.get("GONGGONG_DEVICE_PROFILE", "").lower()
+    if name in PROFILES:
+        return PROFILES[name]
+    if name:
+        print(f"[Warn] 未知的设备档位 '{name}'，可选: {', '.join(PROFILES)}")
+    if page is None:
+        return PROFILES["desktop"]
+    platform = getattr(page, "platform", None)
+    platform = str(getattr(platform, "value", platform) or "").lower()
+    if getattr(page, "web", False) or platform in ("android", "ios"):
+        return PROFILES["tablet"]
+    return PROFILES["desktop"]
+
+
+class RenditionSelector:
+    """
+    为每次播放挑选版本序号 (Question.uri 的 rendition 参数)。
+    档位决定起点；最近 window 次加载耗时的平均值超过 slow_ms 时再降一档，
+    全部低于 fast_ms 时回升一档，最多回到档位的起点。一个会话共用一个实例。
+    """
+
+    def __init__(self, profile: DeviceProfile, slow_ms: float = 1500.0, fast_ms: float = 400.0,
+                 window: int = 3, max_step_down: int = 3):
+        self.profile = profile
+        self.slow_ms = slow_ms
+        self.fast_ms = fast_ms
+        self.max_step_down = max_step_down
+        # 在档位起点之上额外降低的档数
+        self.step_down = 0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def choose(self, q: Question, type_id: int) -> int:
+        """返回该阶段要播放的版本序号；只有一个版本时恒为 0 (不做任何计算)"""
+        if q.renditions is None:
+            return 0
+        labels = q.rendition_labels(type_id)
+        if len(labels) <= 1:
+            return 0
+        # 版本按清晰度从高到低排列：取第一个在档位内的，都超出时取最低的
+        start = next((i for i, label in enumerate(labels) if self.profile.allows(label)), len(labels) - 1)
+        return min(start + self.step_down, len(labels) - 1)
+
+    def report(self, load_ms: float) -> None:
+        """记录一次加载耗时 (按下按钮到播放器就绪)，必要时调整档位"""
+        self._recent.append(load_ms)
+        if len(self._recent) < self._recent.maxlen:
+            return
+        if sum(self._recent) / len(self._recent) > self.slow_ms and self.step_down < self.max_step_down:
+            self.step_down += 1
+            self._recent.clear()
+            print(f"[Rendition] 加载偏慢，降低一档 (档位 {self.profile.name}, 下调 {self.step_down})")
+        elif self.step_down and max(self._recent) < self.fast_ms:
+            self.step_down -= 1
+            self._recent.clear()
+            print(f"[Rendition] 加载恢复，回升一档 (档位 {self.profile.name}, 下调 {self.step_down})")
@@ -0,0 +1,189 @@
+"""
+MP4 faststart 优化工具：把 moov 移到 mdat 之前，播放器不必先跳到文件末尾读取索引，
+每次切换阶段都能更快出首帧。纯 Python 实现，不依赖 ffmpeg，可以在打包机和 APK 工作流中运行。
+
+用法: python faststart.py [assets目录] [--dry-run]
+  默认原地改写所有不是 faststart 布局的视频 (先写临时文件再原子替换)；
+  --dry-run 只报告，存在需要改写的文件时退出码为 1。
+"""
+import os
+import sys
+import shutil
+import struct
+import argparse
+from dataclasses import dataclass
+from typing import List, Optional
+
+from data_loader import VIDEO_NAME_PATTERN
+from dedupe import SHARED_DIRNAME
+from mp4box import Box, Mp4Error, find, read_boxes, walk
+
+# 复制 mdat 等大块数据时的缓冲区大小
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class FaststartInfo:
+    path: str
+    status: str               # ok / needs_faststart / fragmented / invalid
+    reason: str = ""
+    moov_size: int = 0
+
+
+def analyze(path: str) -> FaststartInfo:
+    """检查单个文件的盒子布局"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            boxes = read_boxes(f, f.tell())
+    except (OSError, Mp4Error) as e:
+        return FaststartInfo(path, "invalid", str(e))
+
+    moov = find(boxes, b"moov")
+    mdat = find(boxes, b"mdat")
+    if moov is None:
+        return FaststartInfo(path, "invalid", "缺少 moov")
+    if find(boxes, b"moof") is not None:
+        # 分片 MP4 的索引分散在各个 moof 里，不需要也不应该搬动
+        return FaststartInfo(path, "fragmented", "分片 MP4", moov.size)
+    if mdat is None or moov.offset < mdat.offset:
+        return FaststartInfo(path, "ok", moov_size=moov.size)
+    return FaststartInfo(path, "needs_faststart", "moov 位于 mdat 之后", moov.size)
+
+
+def _patch_chunk_offsets(moov: bytearray, moov_box: Box, start: int, end: int, delta: int) -> int:
+    """
+    把 moov 里所有 stco/co64 中落在 [start, end) 的块偏移加上 delta，返回修改的条目数。
+    moov_box 的 offset 需相对于 moov 缓冲区 (即 0)。
+    """
+    patched = 0
+    for box in walk(moov, moov_box):
+        if box.type not in (b"stco", b"co64"):
+            continue
+        # 完整盒子头之后是 version/flags (4 字节) 和条目数 (4 字节)
+        pos = box.payload_offset + 4
+        (count,) = struct.unpack_from(">I", moov, pos)
+        pos += 4
+        fmt, width = (">I", 4) if box.type == b"stco" else (">Q", 8)
+        if pos + count * width > box.end:
+            raise Mp4Error(f"{box.type.decode()} 条目数 {count} 超出盒子范围")
+        for i in range(count):
+            entry = pos + i * width
+            (value,) = struct.unpack_from(fmt, moov, entry)
+            if start <= value < end:
+                value += delta
+                if box.type == b"stco" and value > 0xFFFFFFFF:
+                    raise Mp4Error("移动后的块偏移超过 4GB，需要 co64，暂不支持")
+                struct.pack_into(fmt, moov, entry, value)
+                patched += 1
+    return patched
+
+
+def _copy_range(src, dst, offset: int, length: int) -> None:
+    src.seek(offset)
+    while length > 0:
+        chunk = src.read(min(COPY_CHUNK_BYTES, length))
+        if not chunk:
+            raise Mp4Error("读取时文件意外结束")
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def make_faststart(path: str) -> bool:
+    """
+    把 moov 移到第一个 mdat 之前并修正块偏移，原子替换原文件。
+    返回 True 表示文件被改写，已经是 faststart 布局时返回 False。
+    """
+    info = analyze(path)
+    if info.status != "needs_faststart":
+        if info.status == "invalid":
+            raise Mp4Error(info.reason)
+        return False
+
+    with open(path, "rb") as src:
+        src.seek(0, 2)
+        boxes = read_boxes(src, src.tell())
+        moov_box = find(boxes, b"moov")
+        first_mdat = find(boxes, b"mdat")
+
+        src.seek(moov_box.offset)
+        moov = bytearray(src.read(moov_box.size))
+        # moov 插到第一个 mdat 之前：两者之间的数据整体后移 moov 的长度，moov 之后的数据位置不变
+        _patch_chunk_offsets(
+            moov, Box(b"moov", 0, moov_box.size, moov_box.header_size),
+            first_mdat.offset, moov_box.offset, moov_box.size,
+        )
+
+        tmp_path = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.faststart.tmp")
+        try:
+            with open(tmp_path, "wb") as dst:
+                for box in boxes:
+                    if box is first_mdat:
+                        dst.write(moov)
+                    if box is not moov_box:
+                        _copy_range(src, dst, box.offset, box.size)
+                dst.flush()
+                os.fsync(dst.fileno())
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return True
+
+
+def find_videos(assets_dir: str) -> List[str]:
+    """按 data_loader 的命名规则列出所有话题文件夹下的视频，以及去重后共享的规范文件"""
+    videos = []
+    with os.scandir(assets_dir) as topics:
+        for topic in sorted(topics, key=lambda e: e.name):
+            if not topic.is_dir() or (topic.name.startswith(".") and topic.name != SHARED_DIRNAME):
+                continue
+            with os.scandir(topic.path) as files:
+                videos.extend(
+                    e.path for e in sorted(files, key=lambda e: e.name)
+                    if e.is_file() and (VIDEO_NAME_PATTERN.match(e.name) or
+                                        (topic.name == SHARED_DIRNAME and e.name.endswith(".mp4")))
+                )
+    return videos
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="把 assets 中的 MP4 改写为 faststart 布局 (moov 在前)")
+    parser.add_argument("assets_dir", nargs="?", default="assets", help="素材目录 (默认 assets)")
+    parser.add_argument("--dry-run", action="store_true", help="只报告，不改写")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.assets_dir):
+        print(f"Warning: Assets directory '{args.assets_dir}' not found.")
+        return 2
+
+    counts = {"ok": 0, "needs_faststart": 0, "fragmented": 0, "invalid": 0, "rewritten": 0, "failed": 0}
+    for path in find_videos(args.assets_dir):
+        info = analyze(path)
+        counts[info.status] += 1
+        if info.status == "invalid":
+            print(f"[Warn] 无法解析: {path} ({info.reason})")
+        elif info.status == "needs_faststart":
+            if args.dry_run:
+                print(f"[Faststart] 需要改写: {path} (moov {info.moov_size} 字节)")
+                continue
+            try:
+                make_faststart(path)
+                counts["rewritten"] += 1
+                print(f"[Faststart] 已改写: {path}")
+            except (OSError, Mp4Error) as e:
+                counts["failed"] += 1
+                print(f"[Warn] 改写失败: {path} ({e})")
+
+    print(f"检查完成: faststart {counts['ok']} 个, 需要改写 {counts['needs_faststart']} 个, "
+          f"已改写 {counts['rewritten']} 个, 失败 {counts['failed']} 个, "
+          f"分片 {counts['fragmented']} 个, 无法解析 {counts['invalid']} 个")
+    if counts["failed"] or (args.dry_run and counts["needs_faststart"]):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+"""
+训练记录 (Session Journal)：把播放页的每次状态切换 (话题, 问题, 阶段, 按钮, 时间) 追加写入日志。
+
+- append() 只把事件放进队列，由后台线程批量写盘，不会阻塞界面回调。
+- 每个话题最后停留的问题保存在内存里，重新进入 /play/<topic_id> 时可以直接续播。
+- 日志超过 COMPACT_BYTES、累计 COMPACT_EVENTS 条或最早一条记录超过 COMPACT_AGE 时压缩：
+  按话题累计的统计写入快照 (snapshot.json)，旧日志删除。
+  启动时只需读快照 + 重放当前这一代日志，几个月的记录也能很快汇总。
+- 主程序在首屏画出后才在后台打开记录 (ensure_open)，进入播放页前会等它打开完成。
+
+用法: python journal.py [记录目录]   # 打印每个话题的统计
+"""
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import atexit
+import threading
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SNAPSHOT_FILENAME = "snapshot.json"
+SNAPSHOT_VERSION = 1
+# 日志超过这个大小时在后台压缩进快照
+COMPACT_BYTES = 256 * 1024
+# 条数或时间到了也压缩：平时用得少的设备日志长不到 COMPACT_BYTES，也不会一直重放几个月的记录
+COMPACT_EVENTS = 2000
+COMPACT_AGE = 7 * 24 * 3600
+# 后台线程最长攒多久再写盘 (秒)；应用被杀时最多丢失这段时间的记录
+FLUSH_INTERVAL = 0.5
+
+# 按钮动作 (日志里只存这些短字符串)
+ACTION_START = "start"
+ACTION_REPEAT = "repeat"
+ACTION_FORGET = "forget"
+ACTION_CORRECT = "correct"
+ACTION_RETRY = "retry"
+ACTION_NEXT = "next"
+ACTION_SKIP = "skip"
+ACTION_FINISH = "finish"
+
+
+@dataclass
+class Event:
+    ts: float          # Unix 时间戳 (秒)
+    topic_id: str
+    question_id: int
+    stage: int         # 动作之后进入的阶段 (0-3)
+    action: str
+
+    def to_line(self) -> str:
+        # 制表符分隔的一行，比 JSON 紧凑；话题 id 是文件夹名，不含制表符和换行
+        return f"{int(self.ts * 1000)}\t{self.topic_id}\t{self.question_id}\t{self.stage}\t{self.action}\n"
+
+    @classmethod
+    def from_line(cls, line: str) -> Optional["Event"]:
+        """解析一行日志，格式不对 (例如被杀进程时只写了半行) 返回 None"""
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) != 5 or not line.endswith("\n"):
+            return None
+        try:
+            return cls(int(parts[0]) / 1000, parts[1], int(parts[2]), int(parts[3]), parts[4])
+        except ValueError:
+            return None
+
+
+@dataclass
+class TopicStats:
+    """单个话题的累计统计"""
+    sessions: int = 0        # 进入播放页的次数
+    finished: int = 0        # 完成全部问题的次数
+    correct: int = 0
+    forgot: int = 0
+    repeated: int = 0
+    skipped: int = 0
+    last_ts: float = 0.0
+    # 最后停留的位置 (问题 id, 阶段)；完成话题后清空，下次从头开始
+    last_question: Optional[int] = None
+    last_stage: int = 0
+
+    def apply(self, event: Event) -> None:
+        action = event.action
+        if action == ACTION_START:
+            self.sessions += 1
+        elif action == ACTION_CORRECT:
+            self.correct += 1
+        elif action == ACTION_FORGET:
+            self.forgot += 1
+        elif action == ACTION_REPEAT:
+            self.repeated += 1
+        elif action == ACTION_SKIP:
+            self.skipped += 1
+        elif action == ACTION_FINISH:
+            self.finished += 1
+        self.last_ts = max(self.last_ts, event.ts)
+        if action == ACTION_FINISH:
+            self.last_question = None
+            self.last_stage = 0
+        else:
+            self.last_question = event.question_id
+            self.last_stage = event.stage
+
+
+@dataclass
+class _Snapshot:
+    generation: int = 0
+    topics: Dict[str, TopicStats] = field(default_factory=dict)
+
+
+_STAT_FIELDS = {f.name for f in fields(TopicStats)}
+
+
+def default_dir() -> str:
+    """记录目录：优先使用 Flet 提供的应用数据目录，桌面调试时放在用户主目录下"""
+    base = os.environ.get("FLET_APP_STORAGE_DATA") or os.path.join(os.path.expanduser("~"), ".gonggong")
+    return os.path.join(base, "journal")
+
+
+class Journal:
+    """
+    追加写入的训练记录。append() 和 resume_point() 在界面线程调用，
+    写盘、统计累计和压缩都在后台线程里完成。
+    """
+
+    def __init__(self, directory: str, compact_bytes: int = COMPACT_BYTES, flush_interval: float = FLUSH_INTERVAL,
+                 compact_events: int = COMPACT_EVENTS, compact_age: float = COMPACT_AGE):
+        self.directory = directory
+        self.compact_bytes = compact_bytes
+        self.compact_events = compact_events
+        self.compact_age = compact_age
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._snapshot = self._load_snapshot()
+        self._lock = threading.Lock()
+        replayed = self._replay_log()
+        self._remove_old_generations()
+        # 每个话题最后停留的位置，在界面线程里同步更新，续播时不需要等待写盘
+        self._positions: Dict[str, Optional[Tuple[int, int]]] = {
+            topic_id: (s.last_question, s.last_stage) if s.last_question is not None else None
+            for topic_id, s in self._snapshot.topics.items()
+        }
+
+        self._queue: "queue.SimpleQueue[Optional[Event]]" = queue.SimpleQueue()
+        self._log = open(self._log_path(self._snapshot.generation), "a", encoding="utf-8")
+        self._log_size = self._log.tell()
+        # 当前这一代日志的条数和最早一条的时间，决定何时压缩
+        self._log_events = replayed
+        if self._torn_tail:
+            # 上次被杀进程时留下半行，先补上换行，避免和新记录粘在一起
+            self._log.write("\n")
+            self._log.flush()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+        if replayed:
+            print(f"[Journal] 已重放 {replayed} 条未压缩的记录")
+
+    # --- 文件 ---
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal.{generation}.log")
+
+    def _load_snapshot(self) -> _Snapshot:
+        path = os.path.join(self.directory, SNAPSHOT_FILENAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"不支持的版本: {data.get('version')}")
+            topics = {
+                str(topic_id): TopicStats(**{k: v for k, v in stats.items() if k in _STAT_FIELDS})
+                for topic_id, stats in data["topics"].items()
+            }
+            return _Snapshot(int(data["generation"]), topics)
+        except FileNotFoundError:
+            return _Snapshot()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"[Warn] 训练记录快照不可用，重新开始统计: {e}")
+            return _Snapshot()
+
+    def _write_snapshot(self, snapshot: _Snapshot) -> None:
+        """原子写入快照 (先写临时文件再替换)"""
+        path = os.path.join(self.directory, SNAPSHOT_FILENAME)
+        tmp_path = path + ".tmp"
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "generation": snapshot.generation,
+            "topics": {topic_id: asdict(s) for topic_id, s in sorted(snapshot.topics.items())},
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _replay_log(self) -> int:
+        """把当前这一代日志里的记录累计进快照统计，返回条数"""
+        count = 0
+        self._torn_tail = False
+        self._log_first_ts: Optional[float] = None
+        try:
+            with open(self._log_path(self._snapshot.generation), "r", encoding="utf-8") as f:
+                for line in f:
+                    self._torn_tail = not line.endswith("\n")
+                    event = Event.from_line(line)
+                    if event is not None:
+                        self._apply(event)
+                        count += 1
+                        if self._log_first_ts is None:
+                            self._log_first_ts = event.ts
+        except FileNotFoundError:
+            pass
+        return count
+
+    def _remove_old_generations(self) -> None:
+        """删除压缩时留下的旧日志 (快照写完但旧日志还没删时进程被杀)"""
+        current = os.path.basename(self._log_path(self._snapshot.generation))
+        for name in os.listdir(self.directory):
+            if name.startswith("journal.") and name.endswith(".log") and name != current:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _apply(self, event: Event) -> None:
+        stats = self._snapshot.topics.get(event.topic_id)
+        if stats is None:
+            stats = self._snapshot.topics[event.topic_id] = TopicStats()
+        stats.apply(event)
+
+    # --- 界面线程 ---
+
+    def append(self, topic_id: str, question_id: int, stage: int, action: str) -> None:
+        """记录一次动作 (只入队，不做任何 IO)"""
+        if self._closed:
+            return
+        event = Event(time.time(), topic_id, question_id, stage, action)
+        self._positions[topic_id] = None if action == ACTION_FINISH else (question_id, stage)
+        self._queue.put(event)
+
+    def resume_point(self, topic_id: str) -> Optional[Tuple[int, int]]:
+        """该话题上次停留的 (问题 id, 阶段)；从未进入或已经完成时返回 None"""
+        return self._positions.get(topic_id)
+
+    def stats(self) -> Dict[str, TopicStats]:
+        """已写盘记录的按话题统计 (副本)"""
+        with self._lock:
+            return {topic_id: TopicStats(**asdict(s)) for topic_id, s in self._snapshot.topics.items()}
+
+    # --- 后台线程 ---
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            batch: List[Event] = []
+            stop = event is None
+            if event is not None:
+                batch.append(event)
+                # 攒一小段时间再写，连续点击只产生一次写盘
+                deadline = time.monotonic() + self.flush_interval
+                while not stop:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        event = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if event is None:
+                        stop = True
+                    else:
+                        batch.append(event)
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: List[Event]) -> None:
+        data = "".join(e.to_line() for e in batch)
+        try:
+            self._log.write(data)
+            self._log.flush()
+            self._log_size += len(data.encode("utf-8"))
+        except OSError as e:
+            print(f"[Warn] 训练记录写入失败: {e}")
+            return
+        with self._lock:
+            for event in batch:
+                self._apply(event)
+        self._log_events += len(batch)
+        if self._log_first_ts is None:
+            self._log_first_ts = batch[0].ts
+        if self._should_compact(batch[-1].ts):
+            self._compact()
+
+    def _should_compact(self, now: float) -> bool:
+        return (
+            self._log_size >= self.compact_bytes
+            or self._log_events >= self.compact_events
+            or (self._log_first_ts is not None and now - self._log_first_ts >= self.compact_age)
+        )
+
+    def _compact(self) -> None:
+        """把当前日志累计进快照并开始新一代日志 (快照先落盘，再删除旧日志)"""
+        with self._lock:
+            snapshot = _Snapshot(
+                self._snapshot.generation + 1,
+                {topic_id: TopicStats(**asdict(s)) for topic_id, s in self._snapshot.topics.items()},
+            )
+        old_path = self._log_path(self._snapshot.generation)
+        try:
+            os.fsync(self._log.fileno())
+            self._write_snapshot(snapshot)
+        except OSError as e:
+            print(f"[Warn] 训练记录压缩失败: {e}")
+            return
+        self._log.close()
+        self._snapshot.generation = snapshot.generation
+        self._log = open(self._log_path(snapshot.generation), "a", encoding="utf-8")
+        self._log_size = 0
+        self._log_events = 0
+        self._log_first_ts = None
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+        print(f"[Journal] 已压缩记录 (第 {snapshot.generation} 代)")
+
+    def close(self) -> None:
+        """写完队列中剩余的记录后停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        try:
+            self._log.close()
+        except OSError:
+            pass
+
+
+def read_events(directory: str) -> Iterator[Event]:
+    """
+    按写入顺序读出目录里尚未压缩的原始记录 (用于回放)；已压缩进快照的部分只剩统计，无法回放。
+    被杀进程时写了一半的行跳过。
+    """
+    generations = []
+    for name in os.listdir(directory):
+        if name.startswith("journal.") and name.endswith(".log") and name[8:-4].isdigit():
+            generations.append(int(name[8:-4]))
+    for generation in sorted(generations):
+        with open(os.path.join(directory, f"journal.{generation}.log"), "r", encoding="utf-8") as f:
+            for line in f:
+                event = Event.from_line(line)
+                if event is not None:
+                    yield event
+
+
+# ==========================================
+# 进程内共享的记录 (由 main.py 打开)
+# ==========================================
+
+_current: Optional[Journal] = None
+_open_lock = threading.Lock()
+
+
+def current() -> Optional[Journal]:
+    """已打开的训练记录，未打开 (例如基准测试) 时为 None"""
+    return _current
+
+
+def open_default(directory: Optional[str] = None) -> Optional[Journal]:
+    """打开默认目录下的训练记录；目录不可写时只打印警告，应用照常运行"""
+    global _current
+    # 后台打开和进入播放页可能同时调用，只打开一次
+    with _open_lock:
+        if _current is None:
+            try:
+                _current = Journal(directory or default_dir())
+            except OSError as e:
+                print(f"[Warn] 训练记录不可用: {e}")
+                return None
+            atexit.register(_current.close)
+    return _current
+
+
+async def ensure_open() -> Optional[Journal]:
+    """open_default 的异步版本：读快照、重放日志放到线程里，不阻塞事件循环；已打开时直接返回"""
+    if _current is not None:
+        return _current
+    return await asyncio.to_thread(open_default)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    journal = Journal(args[0] if args else default_dir())
+    try:
+        stats = journal.stats()
+    finally:
+        journal.close()
+    if not stats:
+        print("暂无训练记录")
+        return 0
+    for topic_id, s in sorted(stats.items(), key=lambda item: -item[1].last_ts):
+        last = time.strftime("%Y-%m-%d %H:%M", time.localtime(s.last_ts)) if s.last_ts else "-"
+        position = f"停在问题 {s.last_question}" if s.last_question is not None else "已完成"
+        print(f"{topic_id}: 进入 {s.sessions} 次, 完成 {s.finished} 次, 正确 {s.correct}, "
+              f"忘记 {s.forgot}, 重复 {s.repeated}, 跳过 {s.skipped}, 最近 {last} ({position})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
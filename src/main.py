@@ -1,19 +1,51 @@
 # V5.0 FINAL FIX
+# 启动分析必须最先导入，之后每个模块的导入耗时才会被统计 (GONGGONG_PROFILE_STARTUP=1)
+import startup_profile
+import time
 import flet as ft
 import data_loader
 import views
+import metrics
+import video_server
+import journal
+import shared_catalog
+import device_profile
+from view_cache import ViewCache
+
+startup_profile.mark("imports")
 
 async def main(page: ft.Page):
     # 1. 初始化设置
     page.title = "阿尔兹海默症回忆疗法"
     page.theme_mode = ft.ThemeMode.LIGHT
     
-    # 2. 加载数据
-    topics = data_loader.load_topics("assets")
-    topic_map = {t.id: t for t in topics}
+    # 2. 加载数据 (异步渐进式：菜单先画出来，话题边扫描边追加)
+    # 话题目录在进程内只加载一次，所有会话 (Web 模式下的每个平板) 共享只读快照
+    catalog = shared_catalog.get("assets")
+
+    # 视图缓存：菜单只构建一次，播放页按 LRU 复用
+    view_cache = ViewCache(max_players=3)
+
+    # 视频版本选择：按设备档位挑选清晰度，本会话所有播放页共用，加载耗时统计跨话题延续
+    selector = device_profile.RenditionSelector(device_profile.detect(page))
+
+    # 素材热更新：共享目录已换成新快照，这里只刷新本会话的菜单，对应播放页标记过期
+    async def on_catalog_changed(snapshot: data_loader.Catalog, changes):
+        for change in changes:
+            view_cache.mark_stale(f"/play/{change.topic_id}")
+
+        menu_view = view_cache.peek("/")
+        if menu_view is not None and menu_view.data and menu_view.data.refresh:
+            changed = menu_view.data.refresh(snapshot.topics)
+            # 菜单不在屏幕上时不推送，下次切回菜单的路由更新会带上这些变化
+            if menu_view in page.views:
+                metrics.page_update(page, *changed)
+
+    unsubscribe = catalog.subscribe(on_catalog_changed)
 
     # 3. 路由变换逻辑
     async def route_change(e):
+        route_started = time.perf_counter()
         page.views.clear()
         
         # 技巧：如果是手动调用，e 可能是 page 对象
@@ -27,36 +59,80 @@ async def main(page: ft.Page):
         if current_route == "/":
             async def on_topic_select(topic):
                 await page.push_route(f"/play/{topic.id}")
-            
-            page.views.append(
-                views.get_menu_view(page, topics, on_topic_select)
-            )
+
+            menu_view = view_cache.get("/")
+            if menu_view is None:
+                # 目录还在加载时带着话题流构建，菜单自己在后台追加话题；
+                # 加载完成后 (例如后连接的平板) 直接使用当前快照
+                stream = None if catalog.loaded else catalog.topic_stream()
+                with metrics.span("view.menu.build"):
+                    menu_view = views.get_menu_view(
+                        page, catalog.snapshot.topics, on_topic_select, topic_stream=stream
+                    )
+                view_cache.put("/", menu_view)
+            page.views.append(menu_view)
 
         # 路由 2: 播放页
         elif current_route.startswith("/play/"):
             topic_id = current_route.split("/")[-1]
-            selected_topic = topic_map.get(topic_id)
-            
+            selected_topic = catalog.snapshot.get(topic_id)
             if selected_topic:
-                page.views.append(
-                    views.get_player_view(page, selected_topic)
-                )
+                # 首次进入该话题时才解析并校验问题列表 (放到线程里，避免阻塞事件循环；
+                # 多个会话同时进入同一话题时只扫描一次)
+                selected_topic = await catalog.resolve(selected_topic)
+
+            # 解析后没有有效问题 (文件已被删除或清空) 时同样退回菜单，不构建播放页
+            if selected_topic and selected_topic.question_count:
+                player_view = view_cache.get(current_route)
+                if player_view is None:
+                    # 续播位置来自训练记录；首屏后的后台打开还没完成时在这里等它
+                    await journal.ensure_open()
+                    with metrics.span("view.player.build"):
+                        player_view = views.get_player_view(page, selected_topic, selector)
+                    view_cache.put(current_route, player_view)
+                page.views.append(player_view)
             else:
                 await page.push_route("/")
 
-        page.update()
+        metrics.page_update(page)
+        metrics.record("route.change", (time.perf_counter() - route_started) * 1000)
 
     async def view_pop(e):
         page.views.pop()
         top_view = page.views[-1]
         await page.push_route(top_view.route)
 
+    def on_close(e):
+        # 会话结束：不再接收目录变化通知，释放缓存的播放页
+        unsubscribe()
+        view_cache.invalidate()
+
     page.on_route_change = route_change
     page.on_view_pop = view_pop
+    page.on_close = on_close
+
+    # 浏览器模式：页面无法访问 file:// 地址，视频改由进程内的 HTTP 服务提供 (多个会话共用)
+    if page.web:
+        await video_server.ensure_started("assets")
 
     # [关键修复] 手动触发一次路由逻辑，解决白屏问题
     # 这里传入 page 替代 event，避免构造 RouteChangeEvent 的报错
     await route_change(page)
+    startup_profile.mark("first_paint")
+
+    # 训练记录：首屏之后再在后台读取快照、重放未压缩的日志
+    page.run_task(journal.ensure_open)
+
+    # 菜单已经画出来，在后台导入播放页依赖，第一次进入话题时不用再等
+    if views.WARMUP:
+        page.run_task(views.warm_up_player)
+
+    if startup_profile.ENABLED:
+        async def finish_startup_profile():
+            await catalog.wait_loaded()
+            startup_profile.mark("catalog_loaded")
+            startup_profile.report()
+        page.run_task(finish_startup_profile)
 
 if __name__ == "__main__":
     ft.run(main, assets_dir="assets")
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import atexit
+import bisect
+import threading
+from typing import Dict, List, Optional
+
+# ==========================================
+# 计时埋点 (Lightweight Timing Instrumentation)
+# ==========================================
+#
+# GONGGONG_METRICS=1        记录各环节耗时 (内存直方图)
+# GONGGONG_METRICS=overlay  同上，并在播放页顶部显示统计浮层 (取代黄色调试框)
+# GONGGONG_METRICS_FILE=路径 退出时把统计结果写成 JSON
+#
+# 未开启时 span() 返回共享的空上下文，record() 直接返回，正式版可以一直保留埋点。
+
+_MODE = os.environ.get("GONGGONG_METRICS", "").lower()
+ENABLED = _MODE in ("1", "overlay")
+OVERLAY = _MODE == "overlay"
+DUMP_PATH = os.environ.get("GONGGONG_METRICS_FILE", "")
+
+# 直方图桶的上界 (毫秒)，大致按 1-2.5-5 递增，最后一个桶收纳所有更慢的样本
+BUCKET_BOUNDS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class Histogram:
+    """固定桶的耗时直方图：只保存计数，不保存原始样本，内存占用恒定"""
+
+    __slots__ = ("counts", "count", "total_ms", "min_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = float("inf")
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms < self.min_ms:
+            self.min_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """按桶估算分位数，返回所在桶的上界 (最后一个桶返回最大值)"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = min(BUCKET_BOUNDS_MS[i], self.max_ms) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return round(bound, 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min_ms, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets": {
+                (f"<={b}" if i < len(BUCKET_BOUNDS_MS) else f">{BUCKET_BOUNDS_MS[-1]}"): n
+                for i, (b, n) in enumerate(zip(BUCKET_BOUNDS_MS + [None], self.counts))
+                if n
+            },
+        }
+
+
+_histograms: Dict[str, Histogram] = {}
+# 目录扫描在线程池里执行，记录时需要加锁
+_lock = threading.Lock()
+
+
+def record(name: str, ms: float) -> None:
+    """记录一次耗时 (毫秒)"""
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(ms)
+
+
+class _Span:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, (time.perf_counter() - self.started) * 1000)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """计时上下文：with metrics.span("route.change"): ..."""
+    return _Span(name) if ENABLED else _NULL_SPAN
+
+
+def page_update(page, *controls, name: str = "page.update") -> None:
+    """
+    推送界面变化并记录耗时。传入 controls 时只对比并发送这些控件 (及其子树)，
+    一次用户操作改动的多个控件合并成一次 page.update(*controls)；不传时整页对比。
+    """
+    if not ENABLED:
+        page.update(*controls)
+        return
+    with _Span(f"{name}.partial" if controls else name):
+        page.update(*controls)
+
+
+# --- 导出 ---
+
+def snapshot() -> Dict[str, dict]:
+    with _lock:
+        return {name: hist.to_dict() for name, hist in sorted(_histograms.items())}
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+
+
+def summary_lines(prefixes: Optional[List[str]] = None) -> List[str]:
+    """浮层显示用的简要统计，每个埋点一行：次数 / 平均 / p95 / 最大"""
+    lines = []
+    for name, stats in snapshot().items():
+        if prefixes and not name.startswith(tuple(prefixes)):
+            continue
+        lines.append(f"{name}: {stats['count']} 次, 平均 {stats['mean_ms']:.1f} ms, "
+                     f"p95 ≤{stats['p95_ms']:.1f} ms, 最大 {stats['max_ms']:.1f} ms")
+    return lines
+
+
+def dump(path: Optional[str] = None) -> Optional[str]:
+    """把当前统计写成 JSON (先写临时文件再替换)，返回写入的路径"""
+    path = path or DUMP_PATH
+    if not path:
+        return None
+    data = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "histograms": snapshot()}
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[Warn] 统计结果写入失败: {e}")
+        return None
+    return path
+
+
+if ENABLED and DUMP_PATH:
+    atexit.register(dump)
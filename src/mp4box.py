@@ -0,0 +1,92 @@
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, List, Optional
+
+# ==========================================
+# MP4 盒子结构解析 (ISO BMFF Box Parser)
+# ==========================================
+#
+# 只解析盒子头 (长度 + 类型)，不解码音视频数据，纯 Python 实现，不依赖 ffmpeg。
+
+# 只包含子盒子的容器类型，解析 moov 时需要向下递归。
+# udta 不在其中：QuickTime / 手机录制的 udta 以 4 字节的 0 结尾，不能按盒子解析，里面也没有 stco/co64
+CONTAINER_TYPES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"mvex"}
+
+
+class Mp4Error(ValueError):
+    """文件不是结构完整的 MP4"""
+
+
+@dataclass(frozen=True)
+class Box:
+    type: bytes        # 四字符类型，例如 b"moov"
+    offset: int        # 盒子在文件 (或缓冲区) 中的起始位置
+    size: int          # 盒子总长度，包含盒子头
+    header_size: int   # 盒子头长度：8，或 16 (64 位长度)
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+    @property
+    def payload_offset(self) -> int:
+        return self.offset + self.header_size
+
+
+def _parse_header(header: bytes, offset: int, limit: int) -> Box:
+    """解析一个盒子头；limit 为所在范围的末尾，用于处理长度为 0 (延伸到末尾) 的盒子"""
+    if len(header) < 8:
+        raise Mp4Error(f"偏移 {offset} 处的盒子头不完整")
+    size, box_type = struct.unpack(">I4s", header[:8])
+    header_size = 8
+    if size == 1:
+        if len(header) < 16:
+            raise Mp4Error(f"偏移 {offset} 处的 64 位盒子头不完整")
+        size = struct.unpack(">Q", header[8:16])[0]
+        header_size = 16
+    elif size == 0:
+        size = limit - offset
+    if size < header_size or offset + size > limit:
+        raise Mp4Error(f"偏移 {offset} 处的 {box_type!r} 长度 {size} 超出范围")
+    return Box(box_type, offset, size, header_size)
+
+
+def read_boxes(f: BinaryIO, file_size: int, start: int = 0, end: Optional[int] = None) -> List[Box]:
+    """读取 [start, end) 范围内的同级盒子 (默认是整个文件的顶层盒子)，结构不完整时抛出 Mp4Error"""
+    end = file_size if end is None else end
+    boxes = []
+    offset = start
+    while offset < end:
+        f.seek(offset)
+        box = _parse_header(f.read(16), offset, end)
+        boxes.append(box)
+        offset = box.end
+    return boxes
+
+
+def read_top_level(path: str) -> List[Box]:
+    """读取文件的顶层盒子列表"""
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        return read_boxes(f, f.tell())
+
+
+def iter_children(data: bytes, parent: Box) -> Iterator[Box]:
+    """在内存缓冲区 (例如整个 moov) 中遍历 parent 的直接子盒子"""
+    offset = parent.payload_offset
+    while offset < parent.end:
+        box = _parse_header(data[offset:offset + 16], offset, parent.end)
+        yield box
+        offset = box.end
+
+
+def walk(data: bytes, parent: Box) -> Iterator[Box]:
+    """深度优先遍历 parent 下的所有盒子 (只进入容器类型)"""
+    for box in iter_children(data, parent):
+        yield box
+        if box.type in CONTAINER_TYPES:
+            yield from walk(data, box)
+
+
+def find(boxes: List[Box], box_type: bytes) -> Optional[Box]:
+    return next((b for b in boxes if b.type == box_type), None)
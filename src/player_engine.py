@@ -0,0 +1,140 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import journal
+from data_loader import Question
+from device_profile import RenditionSelector
+from prefetch import predict_next_stages
+
+# ==========================================
+# 播放页状态机 (Headless Player Engine)
+# ==========================================
+#
+# 问题/阶段的切换规则都在这里，不依赖 Flet：播放页把引擎的状态渲染成控件，
+# 基准工具 (bench_engine.py) 可以在没有界面的情况下成千上万次地驱动它。
+#
+#   State 0/1: 重复 -> 1, 忘记了 -> 3, 回答正确 -> 2
+#   State 2:   下一题 -> 下一题的 0；最后一题为 完成
+#   State 3:   重试 -> 本题的 0, 跳过 -> 下一题的 0 (最后一题没有下一题，跳过不起作用)
+
+# 各状态可用的按钮 (动作名与训练记录相同)，按显示顺序排列；元组常量，切换时不新建
+ANSWER_ACTIONS = (journal.ACTION_REPEAT, journal.ACTION_FORGET, journal.ACTION_CORRECT)
+GUIDE_ACTIONS = (journal.ACTION_RETRY, journal.ACTION_SKIP)
+NEXT_ACTIONS = (journal.ACTION_NEXT,)
+FINISH_ACTIONS = (journal.ACTION_FINISH,)
+
+# State 0/1 的按钮 -> 目标阶段
+_ANSWER_TARGETS: Dict[str, int] = {
+    journal.ACTION_REPEAT: 1,
+    journal.ACTION_FORGET: 3,
+    journal.ACTION_CORRECT: 2,
+}
+
+
+class PlayerEngine:
+    """
+    一个话题的播放状态。
+    - q_index / stage: 当前问题下标和阶段 (0-3)；rendition: 当前阶段播放的视频版本序号
+    - finished: 最后一题按下 "完成" 之后为 True
+    - session: 训练记录 (journal.Journal)，为 None 时不记录也不续播
+    - selector: 视频版本选择，为 None 时总是播放最清晰的版本
+    """
+
+    __slots__ = ("topic_id", "questions", "total", "selector", "session",
+                 "q_index", "stage", "rendition", "finished")
+
+    def __init__(
+        self,
+        topic_id: str,
+        questions: Sequence[Question],
+        selector: Optional[RenditionSelector] = None,
+        session: Optional[journal.Journal] = None,
+    ):
+        self.topic_id = topic_id
+        self.questions = questions
+        self.total = len(questions)
+        self.selector = selector
+        self.session = session
+        self.q_index = 0
+        self.stage = 0
+        self.rendition = 0
+        self.finished = False
+
+    @property
+    def question(self) -> Question:
+        return self.questions[self.q_index]
+
+    @property
+    def actions(self) -> Tuple[str, ...]:
+        """当前状态可用的按钮"""
+        if self.stage <= 1:
+            return ANSWER_ACTIONS
+        if self.stage == 2:
+            return NEXT_ACTIONS if self.q_index < self.total - 1 else FINISH_ACTIONS
+        return GUIDE_ACTIONS
+
+    def resume_index(self) -> int:
+        """上次在该话题停留的问题序号；没有记录、已完成或问题已被删除时从第一题开始"""
+        point = self.session.resume_point(self.topic_id) if self.session is not None else None
+        if point is None:
+            return 0
+        return next((i for i, q in enumerate(self.questions) if q.id == point[0]), 0)
+
+    def start(self, q_index: Optional[int] = None) -> bool:
+        """
+        回到起始问题的 State 0 并记录一次进入。起始问题默认是训练记录里上次停留的问题，
+        没有记录时为第一题。话题没有问题时返回 False。
+        """
+        self.finished = False
+        self.q_index = self.resume_index() if q_index is None else q_index
+        if self.total == 0:
+            return False
+        self._enter(0)
+        self._record(journal.ACTION_START)
+        return True
+
+    def press(self, action: str) -> bool:
+        """按下一个按钮；状态发生变化时返回 True，当前不可用的按钮返回 False"""
+        if self.finished or self.total == 0:
+            return False
+        stage = self.stage
+        if stage <= 1:
+            target = _ANSWER_TARGETS.get(action)
+            if target is None:
+                return False
+            self._enter(target)
+        elif stage == 3 and action == journal.ACTION_RETRY:
+            self._enter(0)
+        elif (stage == 2 and action == journal.ACTION_NEXT) or (stage == 3 and action == journal.ACTION_SKIP):
+            if self.q_index >= self.total - 1:
+                return False
+            self.q_index += 1
+            self._enter(0)
+        elif stage == 2 and action == journal.ACTION_FINISH and self.q_index == self.total - 1:
+            self.finished = True
+        else:
+            return False
+        self._record(action)
+        return True
+
+    def candidates(self) -> List[Tuple[Question, int, int]]:
+        """下一步可能播放的 (问题, 阶段, 版本序号)，按可能性从高到低排列 (用于预取)"""
+        selector = self.selector
+        result = []
+        for q_idx, stage in predict_next_stages(self.stage, self.q_index, self.total):
+            q = self.questions[q_idx]
+            result.append((q, stage, selector.choose(q, stage) if selector is not None else 0))
+        return result
+
+    def report_load(self, load_ms: float) -> None:
+        """播放器就绪耗时，反馈给版本选择"""
+        if self.selector is not None:
+            self.selector.report(load_ms)
+
+    def _enter(self, stage: int) -> None:
+        self.stage = stage
+        self.rendition = self.selector.choose(self.question, stage) if self.selector is not None else 0
+
+    def _record(self, action: str) -> None:
+        """追加一条训练记录 (只入队，由后台线程写盘)"""
+        if self.session is not None:
+            self.session.append(self.topic_id, self.question.id, self.stage, action)
@@ -0,0 +1,190 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import flet as ft
+import flet_video as ftv
+
+# ==========================================
+# 播放器池 (Bounded Video Player Pool)
+# ==========================================
+#
+# 每个播放器只绑定一个视频文件，永远不修改它的 playlist (这是早期黑屏/冻结问题的根源)。
+# 所有播放器叠放在同一个 Stack 里：当前播放的不透明，其余透明且暂停。
+# 再次切换到同一个视频 (重复、重试) 时直接 seek(0) + play()，不再新建原生解码器；
+# 预加载的候选视频在后台完成打开和首帧解码，切换时只需改透明度。
+
+
+def _mounted(player: ftv.Video) -> bool:
+    """播放器是否挂载在页面上 (Flet 对未挂载的控件访问 page 会抛出 RuntimeError)"""
+    try:
+        return player.page is not None
+    except RuntimeError:
+        return False
+
+
+async def _control(player: ftv.Video, method: str, *args) -> None:
+    """
+    调用播放器的原生控制方法 (pause / seek / play)。以下情况没有原生播放器可控制，直接跳过：
+    - 所在视图已被移出页面：按下按钮后立即返回菜单，上一个 await 期间路由已切换，
+      继续调用会抛出 RuntimeError 并中断事件处理
+    - 播放器还没推送到界面 (刚创建，或在无界面的基准测试里)
+    """
+    if _mounted(player):
+        await getattr(player, method)(*args)
+
+
+@dataclass
+class _PooledPlayer:
+    player: ftv.Video
+    loaded: bool = False                  # 是否已触发 on_load (解码器就绪)
+    pending_since: Optional[float] = None  # 被激活但尚未就绪时记录激活时刻
+    reused: bool = False                  # 本次激活是否复用了池中的播放器
+
+
+class PlayerPool:
+    """
+    按视频路径复用的有界播放器池。
+    - capacity: 同时存在的播放器数量上限 (当前播放 + 预加载)，超出时淘汰最久未用的
+    - on_ready(src, elapsed_ms, reused): 激活后播放器可以出画面时回调，用于统计切换耗时
+    """
+
+    def __init__(self, capacity: int = 2, on_ready: Optional[Callable[[str, float, bool], None]] = None):
+        self.capacity = max(1, capacity)
+        self.on_ready = on_ready
+        self.stack = ft.Stack(expand=True)
+        self._entries: "OrderedDict[str, _PooledPlayer]" = OrderedDict()
+        self._active: Optional[str] = None
+        self._serial = 0
+        self.hits = 0
+        self.misses = 0
+
+    # --- 播放器创建 ---
+
+    def _create(self, src: str, autoplay: bool) -> _PooledPlayer:
+        self._serial += 1
+        player = ftv.Video(
+            autoplay=autoplay,
+            show_controls=False,
+            playlist=[ftv.VideoMedia(src)],
+            aspect_ratio=16/9,
+            filter_quality=ft.FilterQuality.HIGH,
+            opacity=1 if autoplay else 0,
+            # 铺满 Stack
+            left=0, top=0, right=0, bottom=0,
+            key=f"pooled_video_{self._serial}",
+        )
+        entry = _PooledPlayer(player=player)
+
+        async def on_load(e):
+            entry.loaded = True
+            self._report_ready(src, entry)
+
+        # flet_video 的加载事件名是 on_load；写成其他名字只是普通属性，事件永远不会触发
+        player.on_load = on_load
+        self._entries[src] = entry
+        self.stack.controls.append(player)
+        return entry
+
+    def _report_ready(self, src: str, entry: _PooledPlayer) -> None:
+        if entry.pending_since is None:
+            return
+        elapsed_ms = (time.perf_counter() - entry.pending_since) * 1000
+        entry.pending_since = None
+        if self.on_ready:
+            self.on_ready(src, elapsed_ms, entry.reused)
+
+    # --- 对外接口 ---
+
+    async def activate(self, src: str) -> bool:
+        """
+        切换到 src 对应的播放器并开始播放，返回 True 表示复用了池中的播放器。
+        调用方随后需要推送 stack 所在的容器，把透明度变化发送到界面。
+        """
+        started_at = time.perf_counter()
+
+        previous = self._entries.get(self._active) if self._active else None
+        if previous is not None and self._active != src:
+            previous.player.opacity = 0
+            await _control(previous.player, "pause")
+
+        entry = self._entries.get(src)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(src)
+            entry.reused = True
+            entry.pending_since = started_at
+            entry.player.opacity = 1
+            # 复用时重置播放进度，保证每次都从头播放
+            await _control(entry.player, "seek", ft.Duration(milliseconds=0))
+            await _control(entry.player, "play")
+            if entry.loaded:
+                self._report_ready(src, entry)
+        else:
+            self.misses += 1
+            entry = self._create(src, autoplay=True)
+            entry.pending_since = started_at
+
+        self._active = src
+        self._evict()
+        return entry.reused
+
+    def start(self, src: str) -> None:
+        """页面首次构建时创建第一个播放器 (此时还未挂载，不能调用播放器方法)"""
+        self.misses += 1
+        entry = self._create(src, autoplay=True)
+        entry.pending_since = time.perf_counter()
+        self._active = src
+
+    def preload(self, srcs: List[str]) -> None:
+        """
+        为下一步最可能播放的视频预先创建透明、暂停的播放器 (解码器预打开)。
+        最多占用 capacity - 1 个位置，当前播放器不会被挤掉。
+        """
+        for src in srcs[: self.capacity - 1]:
+            if src not in self._entries:
+                self._create(src, autoplay=False)
+            else:
+                self._entries.move_to_end(src)
+        self._evict()
+
+    def release(self) -> None:
+        """离开播放页时调用：移除所有播放器，释放原生解码器"""
+        if self._entries:
+            print(f"[Pool] {self.report()}")
+        self._entries.clear()
+        self.stack.controls.clear()
+        self._active = None
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.capacity:
+            victim = next((s for s in self._entries if s != self._active), None)
+            if victim is None:
+                break
+            entry = self._entries.pop(victim)
+            self.stack.controls.remove(entry.player)
+
+    # --- 统计 ---
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": self.size,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+    def report(self) -> str:
+        return (f"播放器池 {self.size}/{self.capacity}，命中 {self.hits} 次，"
+                f"未命中 {self.misses} 次，命中率 {self.hit_rate:.0%}")
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ==========================================
+# 1. 状态机预测
+# ==========================================
+
+def predict_next_stages(state_id: int, q_index: int, total_questions: int) -> List[Tuple[int, int]]:
+    """
+    根据播放器当前状态，列出下一步可能播放的 (问题下标, 阶段)，按可能性从高到低排列。
+    - State 0/1: 下一步是本题的 2 (答对) / 1 (重复) / 3 (忘记了)
+    - State 2:   下一题的 State 0
+    - State 3:   重试本题 State 0，或跳到下一题 State 0
+    """
+    has_next = q_index + 1 < total_questions
+    if state_id in (0, 1):
+        return [(q_index, 2), (q_index, 1), (q_index, 3)]
+    if state_id == 2:
+        return [(q_index + 1, 0)] if has_next else []
+    if state_id == 3:
+        return [(q_index, 0)] + ([(q_index + 1, 0)] if has_next else [])
+    return []
+
+
+# ==========================================
+# 2. 页缓存预读
+# ==========================================
+
+def _read_ahead(path: str, limit: int, cancelled: threading.Event) -> int:
+    """
+    把文件开头 limit 字节读进系统页缓存，返回预读的字节数。
+    支持 posix_fadvise 的平台 (Linux/Android) 只发一个 WILLNEED 提示，由内核异步预读；
+    其他平台 (Windows) 分块读入一个复用的小缓冲区，期间可被取消。
+    """
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, limit, os.POSIX_FADV_WILLNEED)
+            return min(limit, os.fstat(f.fileno()).st_size)
+
+        buf = bytearray(256 * 1024)
+        total = 0
+        while total < limit and not cancelled.is_set():
+            n = f.readinto(buf)
+            if not n:
+                break
+            total += n
+        return total
+
+
+def _drop_cache(path: str, limit: int) -> None:
+    """通知内核可以回收该文件的页缓存 (仅 posix_fadvise 可用时生效)"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, limit, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+class VideoPrefetcher:
+    """
+    视频预取器：在后台线程里预读候选视频的开头部分，让切换阶段时解码器能立即拿到数据。
+    - budget_bytes: 预热数据的总上限，超出时按最久未被预测的顺序淘汰
+    - 每次调用 retarget() 都会取消不再是候选的进行中任务
+    """
+
+    def __init__(self, read_ahead_bytes: int = 2 * 1024 * 1024, budget_bytes: int = 8 * 1024 * 1024):
+        self.read_ahead_bytes = read_ahead_bytes
+        self.budget_bytes = budget_bytes
+        self._tasks: Dict[str, Tuple[asyncio.Task, threading.Event]] = {}
+        self._warm: "OrderedDict[str, int]" = OrderedDict()  # path -> 已预读字节数
+        self._warm_bytes = 0
+        self._playing: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    def retarget(self, paths: Iterable[str], playing: Optional[str] = None) -> None:
+        """把预取目标切换为 paths (按优先级排列)，playing 为正在播放的文件，不会被淘汰"""
+        self._playing = playing
+        wanted = [p for p in dict.fromkeys(paths) if p != playing]
+
+        for path in list(self._tasks):
+            if path not in wanted:
+                self._cancel(path)
+
+        for path in wanted:
+            if path in self._warm:
+                self._warm.move_to_end(path)
+            elif path not in self._tasks:
+                cancelled = threading.Event()
+                task = asyncio.create_task(self._warm_file(path, cancelled))
+                self._tasks[path] = (task, cancelled)
+
+    def mark_played(self, path: str) -> bool:
+        """记录一次播放是否命中预取，返回 True 表示该文件已经预热过"""
+        hit = path in self._warm
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return hit
+
+    def cancel_all(self) -> None:
+        """离开播放页时调用：取消所有进行中的预取"""
+        for path in list(self._tasks):
+            self._cancel(path)
+
+    def _cancel(self, path: str) -> None:
+        task, cancelled = self._tasks.pop(path)
+        cancelled.set()
+        task.cancel()
+
+    async def _warm_file(self, path: str, cancelled: threading.Event) -> None:
+        try:
+            n = await asyncio.to_thread(_read_ahead, path, self.read_ahead_bytes, cancelled)
+        except OSError as e:
+            print(f"[Warn] 预取失败: {path} ({e})")
+            return
+        finally:
+            entry = self._tasks.get(path)
+            if entry is not None and entry[1] is cancelled:
+                del self._tasks[path]
+
+        if cancelled.is_set():
+            return
+        self._warm[path] = n
+        self._warm_bytes += n
+        self._evict()
+
+    def _evict(self) -> None:
+        # 保留最近一次预测的文件，淘汰最早的
+        while self._warm_bytes > self.budget_bytes and len(self._warm) > 1:
+            path, n = self._warm.popitem(last=False)
+            self._warm_bytes -= n
+            if path != self._playing:
+                _drop_cache(path, n)
@@ -0,0 +1,194 @@
+import time
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+import data_loader
+import metrics
+from data_loader import Catalog, Topic
+from asset_watcher import AssetWatcher, TopicChange
+
+# ==========================================
+# 进程内共享的话题目录 (Shared Copy-on-Write Catalog)
+# ==========================================
+#
+# Web 模式下每个连接的平板都会调用一次 main.main。目录只在进程内加载一次，
+# 所有会话只读共享同一份快照；热更新时复制一份快照修改后整体替换 (写时复制)，
+# 正在播放的会话手里仍是旧的 Topic 对象，不会看到改了一半的话题。
+# 解析问题列表也一样：生成解析好的 Topic 副本，随新快照发布，已发布的 Topic 从不修改。
+
+# 话题目录变化时通知各会话：(新快照, 本次变化)
+Listener = Callable[[Catalog, List[TopicChange]], Awaitable[None]]
+
+
+class SharedCatalog:
+    """
+    一个 assets 目录对应一个实例。snapshot 是当前快照，发布后不再修改；
+    加载、热更新都生成新的 Catalog 再替换引用 (单次赋值，读者不需要加锁)。
+    """
+
+    def __init__(self, assets_dir: str, watch: bool = True):
+        self.assets_dir = assets_dir
+        self._snapshot = Catalog()
+        self.version = 0                 # 每发布一次快照加一
+        self.loaded = False              # 首次加载是否完成
+        self._load_task: Optional[asyncio.Task] = None
+        # 每次发布快照时 set 并换成新的 Event，流式读取的会话等待它
+        self._changed: Optional[asyncio.Event] = None
+        self._listeners: List[Listener] = []
+        # 正在解析的话题 (同一个 Topic 只解析一次，多个会话共同等待解析好的副本)
+        self._resolving: Dict[int, "asyncio.Future[Topic]"] = {}
+        self._watcher = AssetWatcher(assets_dir, self._on_assets_changed) if watch else None
+
+    @property
+    def snapshot(self) -> Catalog:
+        """当前快照 (只读，请不要修改)"""
+        return self._snapshot
+
+    def start(self) -> None:
+        """首次调用时在当前事件循环里启动加载和素材监视，之后的调用直接返回"""
+        if self._load_task is not None:
+            return
+        # 监视线程的初始快照晚于加载开始：把加载开始的时刻交给它，期间改动的文件按新文件处理
+        since_ns = time.time_ns()
+        self._load_task = asyncio.get_running_loop().create_task(self._load())
+        if self._watcher is not None:
+            self._watcher.start(since_ns=since_ns)
+
+    async def wait_loaded(self) -> Catalog:
+        self.start()
+        await asyncio.shield(self._load_task)
+        return self._snapshot
+
+    def _changed_event(self) -> asyncio.Event:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed
+
+    def _publish(self, snapshot: Catalog) -> None:
+        self._snapshot = snapshot
+        self.version += 1
+        changed, self._changed = self._changed, None
+        if changed is not None:
+            changed.set()
+
+    async def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            # 懒加载：启动时只读取话题名称和问题数量
+            async for topic in data_loader.iter_topics(self.assets_dir, lazy=True):
+                if topic.id in self._snapshot:
+                    # 热更新已经先一步加入了该话题 (版本更新)
+                    continue
+                snapshot = self._snapshot.copy()
+                snapshot.add(topic)
+                self._publish(snapshot)
+        finally:
+            self.loaded = True
+            # 唤醒还在等待的流式读取
+            self._publish(self._snapshot)
+        metrics.record("catalog.shared.load", (time.perf_counter() - started) * 1000)
+
+    async def topic_stream(self) -> AsyncIterator[Topic]:
+        """
+        渐进式读取话题：先产出已加载的，再随着加载逐个产出，首次加载完成后结束。
+        供加载期间打开的菜单使用；加载完成后打开的会话直接读 snapshot 即可。
+        """
+        self.start()
+        # 按 id 记录已产出的话题：热更新或解析会替换、移除快照里的话题，
+        # 按下标续读会漏掉或重复产出
+        seen: Set[str] = set()
+        while True:
+            changed = self._changed_event()
+            # 先读 loaded 再取快照：产出期间加载完成时再读一轮，不漏掉最后发布的话题
+            loaded = self.loaded
+            for topic in self._snapshot.topics:
+                if topic.id not in seen:
+                    seen.add(topic.id)
+                    yield topic
+            if loaded:
+                return
+            await changed.wait()
+
+    async def resolve(self, topic: Topic) -> Topic:
+        """
+        在线程里解析话题的问题列表，返回解析好的 Topic (传入的 Topic 不变，调用方改用返回值)；
+        多个会话同时进入同一话题时只扫描一次
+        """
+        if topic.is_resolved:
+            return topic
+        key = id(topic)
+        fut = self._resolving.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._resolve(topic))
+            self._resolving[key] = fut
+            fut.add_done_callback(lambda _: self._resolving.pop(key, None))
+        return await asyncio.shield(fut)
+
+    async def _resolve(self, topic: Topic) -> Topic:
+        resolved = await asyncio.to_thread(topic.resolved)
+        if self._snapshot.get(topic.id) is not topic:
+            # 等待期间热更新已经换掉了该话题，解析结果只给本次调用方使用
+            return resolved
+        snapshot = self._snapshot.copy()
+        if resolved.question_count:
+            snapshot.upsert(resolved)
+        else:
+            snapshot.remove(topic.id)
+        self._publish(snapshot)
+        if resolved.question_count != topic.question_count:
+            # 懒加载的计数与解析结果不一致 (例如文件在两次检查之间被删除或清空)：
+            # 通知各会话刷新菜单，没有有效问题的话题从菜单中移除
+            print(f"[Warn] 话题 {topic.id} 解析后有 {resolved.question_count} 个问题 "
+                  f"(加载时计为 {topic.question_count})")
+            await self._notify(snapshot, [TopicChange(topic_id=topic.id, topic=resolved)])
+        return resolved
+
+    # --- 热更新 ---
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """注册变化通知，返回取消注册的函数 (会话关闭时调用)"""
+        self._listeners.append(listener)
+
+        def unsubscribe():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+        return unsubscribe
+
+    async def _on_assets_changed(self, changes: List[TopicChange]) -> None:
+        snapshot = self._snapshot.copy()
+        for change in changes:
+            new = change.topic if change.topic and change.topic.question_count else None
+            if new is not None:
+                snapshot.upsert(new)
+            else:
+                snapshot.remove(change.topic_id)
+            print(f"[Watch] 话题 {change.topic_id} 已更新: 新增 {len(change.added)}, "
+                  f"删除 {len(change.removed)}, 改名 {len(change.renamed)}")
+        self._publish(snapshot)
+        await self._notify(snapshot, changes)
+
+    async def _notify(self, snapshot: Catalog, changes: List[TopicChange]) -> None:
+        for listener in list(self._listeners):
+            try:
+                await listener(snapshot, changes)
+            except Exception as e:
+                # 会话已断开但没有取消注册，不再通知它
+                print(f"[Warn] 会话刷新失败，已取消通知: {e}")
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+    def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+
+
+_instances: Dict[str, SharedCatalog] = {}
+
+
+def get(assets_dir: str = "assets") -> SharedCatalog:
+    """进程内共享的目录实例 (首次调用时开始加载，必须在事件循环里调用)"""
+    shared = _instances.get(assets_dir)
+    if shared is None:
+        shared = _instances[assets_dir] = SharedCatalog(assets_dir)
+    shared.start()
+    return shared
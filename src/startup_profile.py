@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# ==========================================
+# 启动分析 (Startup Profiling)
+# ==========================================
+#
+# GONGGONG_PROFILE_STARTUP=1          统计每个模块的导入耗时和启动各阶段 (首屏、目录加载) 的时刻，
+#                                     目录加载完成后在控制台打印报告
+# GONGGONG_PROFILE_STARTUP_FILE=路径   同时把报告写成 JSON，便于在不同提交之间对比
+#
+# main.py 必须最先导入本模块，之后的导入才会被统计。未开启时不安装任何钩子。
+
+ENABLED = os.environ.get("GONGGONG_PROFILE_STARTUP", "") not in ("", "0")
+DUMP_PATH = os.environ.get("GONGGONG_PROFILE_STARTUP_FILE", "")
+
+# 本模块被导入的时刻，近似为进程启动 (解释器自身的启动时间不计入)
+_started = time.perf_counter()
+# 模块名 -> (自身耗时, 含子模块的累计耗时)，毫秒
+_imports: Dict[str, Tuple[float, float]] = {}
+# 启动阶段 -> 距离启动的毫秒数 (只记录第一次，Web 模式下后连接的会话不覆盖)
+_marks: Dict[str, float] = {}
+_local = threading.local()
+_reported = False
+
+
+class _TimedLoader:
+    """包装真正的 loader，只在 exec_module 前后计时，其余属性全部转发"""
+
+    def __init__(self, loader, name: str):
+        self._loader = loader
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        # 每个线程各自一个导入栈 (后台预热会在线程里导入)
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        frame = [time.perf_counter(), 0.0]
+        stack.append(frame)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            stack.pop()
+            total = (time.perf_counter() - frame[0]) * 1000
+            _imports[self._name] = (total - frame[1], total)
+            if stack:
+                stack[-1][1] += total
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class _TimingFinder:
+    """放在 sys.meta_path 最前面，找到模块后把它的 loader 换成计时包装"""
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, name)
+                return spec
+        return None
+
+
+def install() -> None:
+    if not any(isinstance(f, _TimingFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+def mark(name: str) -> None:
+    """记录一个启动阶段 (距离启动的耗时)"""
+    if not ENABLED or name in _marks:
+        return
+    elapsed = (time.perf_counter() - _started) * 1000
+    _marks[name] = elapsed
+    import metrics
+    metrics.record(f"startup.{name}", elapsed)
+
+
+def report(top: int = 15) -> Optional[dict]:
+    """打印启动报告 (只打印一次)，并在配置了路径时写成 JSON"""
+    global _reported
+    if not ENABLED or _reported:
+        return None
+    _reported = True
+
+    imports = sorted(_imports.items(), key=lambda item: -item[1][1])
+    top_level = {name: times for name, times in imports if "." not in name}
+    data = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_total_ms": round(sum(self_ms for self_ms, _ in _imports.values()), 3),
+        "marks_ms": {name: round(ms, 3) for name, ms in _marks.items()},
+        "imports_ms": {
+            name: {"self": round(self_ms, 3), "cumulative": round(total_ms, 3)}
+            for name, (self_ms, total_ms) in imports
+        },
+        "loaded": sorted(top_level),
+    }
+
+    print(f"[Startup] 模块导入共 {data['import_total_ms']:.1f} ms ({len(_imports)} 个模块)")
+    for name, (self_ms, total_ms) in list(top_level.items())[:top]:
+        print(f"[Startup]   {name:<28} 累计 {total_ms:8.1f} ms  自身 {self_ms:7.1f} ms")
+    for name, ms in _marks.items():
+        print(f"[Startup] {name}: {ms:.1f} ms")
+
+    if DUMP_PATH:
+        tmp_path = DUMP_PATH + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, DUMP_PATH)
+        except OSError as e:
+            print(f"[Warn] 启动报告写入失败: {e}")
+    return data
+
+
+def loaded_modules() -> List[str]:
+    """已统计到的模块名 (用于检查某个依赖是否被提前导入)"""
+    return sorted(_imports)
+
+
+if ENABLED:
+    install()
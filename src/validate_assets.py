@@ -0,0 +1,226 @@
+"""
+素材完整性校验：用进程池并行检查目录里的每个视频，生成可信清单 (assets/.manifest.json)。
+
+检查项：文件大小、MP4 盒子结构 (截断的上传会在这里暴露)、是否有视频轨 (hdlr 'vide')、
+mvhd 中的时长，以及块偏移是否落在文件内。同一阶段有多个版本时逐个检查，未通过的版本不写进清单；
+四个阶段都至少有一个版本通过的问题才写进清单。运行时 data_loader 直接按清单构建这些话题，
+不再逐个检查文件。
+
+用法: python validate_assets.py [assets目录] [--workers N] [--dry-run]
+  有视频未通过校验时退出码为 1；--dry-run 只报告，不写清单。
+"""
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import data_loader
+from data_loader import MANIFEST_FILENAME, MANIFEST_VERSION, STAGE_COUNT, VIDEO_NAME_PATTERN
+from mp4box import Mp4Error, Box, find, read_boxes, walk
+
+# moov 超过这个大小视为异常 (正常的短视频索引只有几十 KB)
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class VideoCheck:
+    path: str
+    ok: bool
+    reason: str = ""
+    size: int = 0
+    duration_ms: int = 0
+
+
+def _mvhd_duration_ms(moov: bytes, box: Box) -> int:
+    """从 mvhd 读取时长 (毫秒)；version 0 为 32 位字段，version 1 为 64 位"""
+    pos = box.payload_offset
+    version = moov[pos]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", moov, pos + 4 + 16)
+    else:
+        timescale, duration = struct.unpack_from(">II", moov, pos + 4 + 8)
+    if timescale == 0:
+        raise Mp4Error("mvhd 的 timescale 为 0")
+    return duration * 1000 // timescale
+
+
+def _max_chunk_offset(moov: bytes, box: Box) -> int:
+    """stco/co64 中最大的块偏移"""
+    pos = box.payload_offset + 4
+    (count,) = struct.unpack_from(">I", moov, pos)
+    fmt, width = (">I", 4) if box.type == b"stco" else (">Q", 8)
+    if pos + 4 + count * width > box.end:
+        raise Mp4Error(f"{box.type.decode()} 条目数 {count} 超出盒子范围")
+    return max((struct.unpack_from(fmt, moov, pos + 4 + i * width)[0] for i in range(count)), default=0)
+
+
+def check_video(path: str) -> VideoCheck:
+    """校验单个视频 (在子进程中运行，不能依赖全局状态)"""
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return VideoCheck(path, False, "空文件")
+            boxes = read_boxes(f, size)
+            moov_box = find(boxes, b"moov")
+            if moov_box is None:
+                return VideoCheck(path, False, "缺少 moov", size)
+            if find(boxes, b"mdat") is None and find(boxes, b"moof") is None:
+                return VideoCheck(path, False, "缺少 mdat", size)
+            if moov_box.size > MAX_MOOV_BYTES:
+                return VideoCheck(path, False, f"moov 过大 ({moov_box.size} 字节)", size)
+            f.seek(moov_box.offset)
+            moov = f.read(moov_box.size)
+
+        root = Box(b"moov", 0, moov_box.size, moov_box.header_size)
+        duration_ms = None
+        has_video = False
+        for box in walk(moov, root):
+            if box.type == b"mvhd":
+                duration_ms = _mvhd_duration_ms(moov, box)
+            elif box.type == b"hdlr":
+                # 完整盒子头之后: version/flags (4) + pre_defined (4) + handler_type (4)
+                handler = moov[box.payload_offset + 8: box.payload_offset + 12]
+                has_video = has_video or handler == b"vide"
+            elif box.type in (b"stco", b"co64"):
+                if _max_chunk_offset(moov, box) >= size:
+                    return VideoCheck(path, False, "块偏移超出文件 (文件被截断)", size)
+
+        if duration_ms is None:
+            return VideoCheck(path, False, "缺少 mvhd", size)
+        if not has_video:
+            return VideoCheck(path, False, "没有视频轨", size)
+        if duration_ms <= 0:
+            return VideoCheck(path, False, "时长为 0", size)
+        return VideoCheck(path, True, size=size, duration_ms=duration_ms)
+    except (OSError, Mp4Error, struct.error, IndexError) as e:
+        return VideoCheck(path, False, str(e) or type(e).__name__)
+
+
+def validate(assets_dir: str, workers: Optional[int] = None) -> Dict:
+    """
+    校验目录里所有有效问题的视频，返回 {"topics": 清单条目, "failures": [VideoCheck], "stats": {...}}。
+    话题目录的 mtime 和文件名在扫描之前记录，校验期间目录发生变化的话题下次加载时不会被信任。
+    """
+    base = Path(assets_dir)
+    # 目录 mtime 和视频文件名在扫描之前记录：mtime 用于本机快速判断，
+    # 文件名用于素材被复制 (例如打进 APK) 后 mtime 改变时的判断
+    dir_mtimes: Dict[str, int] = {}
+    dir_files: Dict[str, List[str]] = {}
+    for e in os.scandir(base):
+        if e.is_dir() and not e.name.startswith("."):
+            dir_mtimes[e.name] = e.stat().st_mtime_ns
+            with os.scandir(e.path) as files:
+                dir_files[e.name] = sorted(f.name for f in files if VIDEO_NAME_PATTERN.match(f.name))
+    topics = data_loader.load_topics(assets_dir, use_index=False, use_bundle=False, use_manifest=False)
+
+    # 去重后多个阶段可能指向同一个规范文件，只校验一次
+    paths = sorted({
+        q.local_path(t, r)
+        for topic in topics for q in topic.questions
+        for t in range(STAGE_COUNT) for r in range(len(q.rendition_labels(t)))
+    })
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        checks = dict(zip(paths, pool.map(check_video, paths, chunksize=16)))
+    elapsed = time.perf_counter() - started
+
+    entries: Dict[str, dict] = {}
+    failed_questions = 0
+    for topic in topics:
+        rows = []
+        renditions = []
+        for q in topic.questions:
+            # 每个阶段通过校验的版本序号 (按清晰度从高到低)
+            passed = [
+                [r for r in range(len(q.rendition_labels(t))) if checks[q.local_path(t, r)].ok]
+                for t in range(STAGE_COUNT)
+            ]
+            if not all(passed):
+                failed_questions += 1
+                continue
+            best = [stage[0] for stage in passed]
+            # [id, [文件名 x4], [字节数 x4], [时长毫秒 x4]]，前三项与目录索引的格式相同
+            rows.append([
+                q.id,
+                [q.rendition_name(t, r) for t, r in enumerate(best)],
+                [q.size(t, r) for t, r in enumerate(best)],
+                [checks[q.local_path(t, r)].duration_ms for t, r in enumerate(best)],
+            ])
+            # 其他通过校验的版本，格式与目录索引的 renditions 相同: [id, type_id, 文件名, 字节数]
+            renditions.extend(
+                [q.id, t, q.rendition_name(t, r), q.size(t, r)]
+                for t, stage in enumerate(passed) for r in stage[1:]
+            )
+        if rows and topic.id in dir_mtimes:
+            entries[topic.id] = {
+                "mtime_ns": dir_mtimes[topic.id],
+                "name": topic.name,
+                "question_count": len(rows),
+                "questions": rows,
+                "files": dir_files[topic.id],
+            }
+            if renditions:
+                entries[topic.id]["renditions"] = renditions
+
+    failures = [c for c in checks.values() if not c.ok]
+    return {
+        "topics": entries,
+        "failures": failures,
+        "stats": {
+            "videos": len(paths),
+            "failed_videos": len(failures),
+            "failed_questions": failed_questions,
+            "trusted_topics": len(entries),
+            "seconds": round(elapsed, 3),
+        },
+    }
+
+
+def write_manifest(assets_dir: str, entries: Dict[str, dict]) -> str:
+    """原子写入可信清单 (先写临时文件再替换)"""
+    path = Path(assets_dir) / MANIFEST_FILENAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    data = {
+        "version": MANIFEST_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "topics": entries,
+    }
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="并行校验 assets 中的视频并生成可信清单")
+    parser.add_argument("assets_dir", nargs="?", default="assets", help="素材目录 (默认 assets)")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--dry-run", action="store_true", help="只报告，不写清单")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.assets_dir):
+        print(f"Warning: Assets directory '{args.assets_dir}' not found.")
+        return 2
+
+    result = validate(args.assets_dir, args.workers)
+    for check in sorted(result["failures"], key=lambda c: c.path):
+        print(f"[Warn] 校验失败: {Path(check.path).as_posix()} ({check.reason})")
+
+    stats = result["stats"]
+    print(f"校验完成: 视频 {stats['videos']} 个, 失败 {stats['failed_videos']} 个, "
+          f"剔除问题 {stats['failed_questions']} 个, 可信话题 {stats['trusted_topics']} 个, "
+          f"耗时 {stats['seconds']:.1f} 秒")
+    if not args.dry_run:
+        print(f"[Manifest] 已写入: {write_manifest(args.assets_dir, result['topics'])}")
+    return 1 if stats["failed_videos"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+import os
+import re
+import time
+import socket
+import asyncio
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from pathlib import Path
+
+from data_loader import VIDEO_NAME_PATTERN, Question, read_aliases
+from bundle import Bundle, BundleError, find_bundle, open_bundle
+
+# ==========================================
+# 本地视频 HTTP 服务 (Range / Keep-Alive / sendfile)
+# ==========================================
+#
+# 以浏览器模式 (AppView.WEB_BROWSER) 运行时，页面拿不到 file:// 地址，
+# 由这个进程内的 asyncio 服务把 assets 里的视频按 HTTP 提供给各个平板的浏览器。
+# GONGGONG_VIDEO_HOST  监听地址，默认 127.0.0.1；病房内其他平板访问时设为 0.0.0.0
+# GONGGONG_VIDEO_PORT  监听端口，默认 0 (自动分配)
+# GONGGONG_VIDEO_PUBLIC_HOST  写进视频 URL 的主机名，默认自动探测局域网地址
+
+URL_PREFIX = "/v/"
+MAX_HEADER_BYTES = 16 * 1024
+# 空闲连接保留时间 (秒)，超时后关闭
+KEEP_ALIVE_TIMEOUT = 15.0
+CACHE_CONTROL = "public, max-age=300"
+# 资源定位结果的缓存时间 (秒)：播放时 Range 请求很密集，期间不重复 stat 文件、读取别名表
+RESOLVE_TTL = 2.0
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# URL 中的话题 id 和文件名都不能含路径分隔符 (Windows 上 "\\" 同样是分隔符) 和 NUL
+_UNSAFE_CHARS = frozenset(c for c in ("/", "\\", os.sep, os.altsep, "\0") if c)
+
+_REASONS = {
+    200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request",
+    404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable",
+}
+
+
+def _lan_address() -> str:
+    """探测本机的局域网地址 (UDP connect 不会真正发包)，失败时退回 127.0.0.1"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            s.connect(("10.255.255.255", 1))
+            return s.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+
+
+def parse_range(header: str, length: int) -> Optional[Tuple[int, int]]:
+    """
+    解析单个区间的 Range 头，返回 [start, end] (闭区间)。
+    格式不支持 (例如多区间) 时返回 None 表示发送整个文件；
+    区间无法满足时抛出 ValueError (对应 416)。
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), length - 1) if last else length - 1
+    elif last:
+        # bytes=-N：最后 N 个字节
+        start = max(0, length - int(last))
+        end = length - 1
+    else:
+        return None
+    if start >= length or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _Resource:
+    """一个可以被服务的视频：文件路径 + 在文件中的区间 (打包文件中的视频只占其中一段)"""
+    __slots__ = ("path", "offset", "length", "mtime", "etag")
+
+    def __init__(self, path: str, offset: int, length: int, mtime_ns: int):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.mtime = mtime_ns / 1e9
+        self.etag = f'"{length:x}-{mtime_ns:x}-{offset:x}"'
+
+
+class VideoServer:
+    """
+    把 assets_dir 下的视频 (或打包文件里的视频) 通过 HTTP 提供出去。
+    URL 形如 http://主机:端口/v/<topic_id>/<文件名>，文件名必须符合 data_loader 的命名规则。
+    响应体通过 loop.sendfile 发送 (支持时为零拷贝)，不会把整个文件读进内存。
+    """
+
+    def __init__(self, assets_dir: str, host: str = "127.0.0.1", port: int = 0,
+                 public_host: Optional[str] = None):
+        self.assets_dir = os.path.abspath(assets_dir)
+        # 解析符号链接后的素材目录，最终打开的文件必须位于其中
+        self._real_root = os.path.realpath(self.assets_dir)
+        self.host = host
+        self.port = port
+        self.public_host = public_host
+        self.base_url = ""
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._bundle: Optional[Bundle] = None
+        self._topic_names: Dict[str, str] = {}
+        # URL 路径 -> (定位时刻, 资源)，只缓存找得到的资源
+        self._resources: Dict[str, Tuple[float, _Resource]] = {}
+        # 统计
+        self.requests = 0
+        self.bytes_sent = 0
+        self.active_connections = 0
+
+    async def start(self) -> None:
+        bundle_path = find_bundle(self.assets_dir)
+        if bundle_path:
+            try:
+                # 与目录加载共用同一个映射
+                self._bundle = open_bundle(bundle_path)
+            except (OSError, BundleError) as e:
+                print(f"[Video] 打包文件不可用，只提供目录中的视频: {e}")
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        public = self.public_host or (_lan_address() if self.host in ("0.0.0.0", "") else self.host)
+        self.base_url = f"http://{public}:{self.port}"
+        print(f"[Video] 视频服务已启动: {self.base_url}{URL_PREFIX}")
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        # 打包文件由 open_bundle 在进程内共享 (目录仍在使用)，这里只放开引用
+        self._bundle = None
+        self._resources.clear()
+
+    # --- URL ---
+
+    def url_for(self, q: Question, type_id: int, rendition: int = 0) -> Optional[str]:
+        name = q.rendition_name(type_id, rendition)
+        if name is None:
+            return None
+        # 话题 id 就是前缀目录名；同一话题共享同一个前缀字符串，按前缀缓存
+        prefix = q.paths.local
+        topic = self._topic_names.get(prefix)
+        if topic is None:
+            topic = self._topic_names[prefix] = quote(os.path.basename(os.path.normpath(prefix)))
+        return f"{self.base_url}{URL_PREFIX}{topic}/{quote(name)}"
+
+    # --- 资源定位 ---
+
+    def _resolve(self, url_path: str) -> Optional[_Resource]:
+        """定位 URL 对应的资源；RESOLVE_TTL 秒内重复请求同一地址 (Range 分段) 直接复用上次的结果"""
+        now = time.monotonic()
+        cached = self._resources.get(url_path)
+        if cached is not None and now - cached[0] < RESOLVE_TTL:
+            return cached[1]
+        resource = self._locate(url_path)
+        if resource is None:
+            self._resources.pop(url_path, None)
+        else:
+            self._resources[url_path] = (now, resource)
+        return resource
+
+    def _locate(self, url_path: str) -> Optional[_Resource]:
+        if not url_path.startswith(URL_PREFIX):
+            return None
+        parts = unquote(url_path[len(URL_PREFIX):]).split("/")
+        if len(parts) != 2:
+            return None
+        topic_id, name = parts
+        # 不允许越出 assets 目录：两段都不能含分隔符 (例如 %5C..%5C)；
+        # %00 解码出的 NUL 会让 os.stat 抛出 ValueError，一并提前拒绝
+        if (not topic_id or topic_id.startswith(".") or not VIDEO_NAME_PATTERN.match(name)
+                or not _UNSAFE_CHARS.isdisjoint(topic_id) or not _UNSAFE_CHARS.isdisjoint(name)):
+            return None
+
+        if self._bundle is not None:
+            try:
+                # 文件没变时返回同一个实例；重新打包后换成新的映射 (偏移随之更新)
+                self._bundle = open_bundle(self._bundle.path)
+            except (OSError, BundleError) as e:
+                print(f"[Video] 打包文件不可用，只提供目录中的视频: {e}")
+                self._bundle = None
+        if self._bundle is not None:
+            located = self._bundle.locate(topic_id, name)
+            if located is not None:
+                return _Resource(self._bundle.path, located[0], located[1], self._bundle.signature[1])
+
+        # 去重后的文件由别名表指向共享的规范文件 (读取结果按 mtime 缓存)
+        target = read_aliases(Path(self.assets_dir)).get(topic_id, {}).get(name)
+        if target is not None:
+            path = os.path.join(self.assets_dir, target)
+        else:
+            path = os.path.join(self.assets_dir, topic_id, name)
+        if not self._inside_root(path):
+            return None
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        return _Resource(path, 0, st.st_size, st.st_mtime_ns)
+
+    def _inside_root(self, path: str) -> bool:
+        """解析符号链接和 ".." 之后仍在素材目录内 (别名表或链接指向目录外时拒绝)"""
+        try:
+            real = os.path.realpath(path)
+            return os.path.commonpath([real, self._real_root]) == self._real_root
+        except (OSError, ValueError):
+            # 不同盘符 (Windows) 或路径含 NUL
+            return False
+
+    # --- HTTP ---
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.active_connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    break
+                keep_alive = await self._handle_request(head.decode("latin-1"), writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, OSError):
+            # 浏览器拖动进度条时会直接断开旧连接，属于正常情况
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _handle_request(self, head: str, writer: asyncio.StreamWriter) -> bool:
+        """处理一个请求，返回是否保持连接"""
+        self.requests += 1
+        lines = head.split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            await self._send_status(writer, 400, keep_alive=False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        if method not in ("GET", "HEAD"):
+            await self._send_status(writer, 405, keep_alive, {"Allow": "GET, HEAD"})
+            return keep_alive
+
+        resource = self._resolve(target.split("?", 1)[0])
+        if resource is None:
+            await self._send_status(writer, 404, keep_alive)
+            return keep_alive
+
+        common = {
+            "Accept-Ranges": "bytes",
+            "ETag": resource.etag,
+            "Last-Modified": formatdate(resource.mtime, usegmt=True),
+            "Cache-Control": CACHE_CONTROL,
+            "Access-Control-Allow-Origin": "*",
+        }
+        if self._not_modified(headers, resource):
+            await self._send_status(writer, 304, keep_alive, common)
+            return keep_alive
+
+        start, end = 0, resource.length - 1
+        status = 200
+        range_header = headers.get("range")
+        if range_header and self._if_range_matches(headers.get("if-range"), resource):
+            try:
+                parsed = parse_range(range_header, resource.length)
+            except ValueError:
+                common["Content-Range"] = f"bytes */{resource.length}"
+                await self._send_status(writer, 416, keep_alive, common)
+                return keep_alive
+            if parsed is not None:
+                start, end = parsed
+                status = 206
+                common["Content-Range"] = f"bytes {start}-{end}/{resource.length}"
+
+        count = end - start + 1 if resource.length else 0
+        common["Content-Type"] = "video/mp4"
+        common["Content-Length"] = str(count)
+        self._write_head(writer, status, keep_alive, common)
+        await writer.drain()
+        if method == "GET" and count:
+            with open(resource.path, "rb") as f:
+                loop = asyncio.get_running_loop()
+                # 支持时走 os.sendfile 零拷贝，否则 asyncio 自动退回分块读写
+                sent = await loop.sendfile(writer.transport, f, resource.offset + start, count)
+            self.bytes_sent += sent
+        return keep_alive
+
+    @staticmethod
+    def _not_modified(headers: Dict[str, str], resource: _Resource) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            return if_none_match == "*" or resource.etag in [t.strip() for t in if_none_match.split(",")]
+        since = headers.get("if-modified-since")
+        if since:
+            try:
+                return int(resource.mtime) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _if_range_matches(if_range: Optional[str], resource: _Resource) -> bool:
+        """没有 If-Range，或者 If-Range 与当前版本一致时才按 Range 返回部分内容"""
+        if if_range is None:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return if_range == resource.etag
+        try:
+            return int(resource.mtime) <= parsedate_to_datetime(if_range).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _write_head(writer: asyncio.StreamWriter, status: int, keep_alive: bool, headers: Dict[str, str]) -> None:
+        lines = [f"HTTP/1.1 {status} {_REASONS[status]}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_status(self, writer: asyncio.StreamWriter, status: int, keep_alive: bool,
+                           headers: Optional[Dict[str, str]] = None) -> None:
+        headers = dict(headers or {})
+        headers["Content-Length"] = "0"
+        self._write_head(writer, status, keep_alive, headers)
+        await writer.drain()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "active_connections": self.active_connections,
+        }
+
+
+# ==========================================
+# 进程内共享的服务实例
+# ==========================================
+
+_server: Optional[VideoServer] = None
+_start_lock: Optional[asyncio.Lock] = None
+
+
+def current() -> Optional[VideoServer]:
+    """已启动的视频服务；原生运行 (file:// 可用) 时为 None"""
+    return _server
+
+
+async def ensure_started(assets_dir: str) -> VideoServer:
+    """启动进程内唯一的视频服务 (多个浏览器会话共用)，已启动时直接返回"""
+    global _server, _start_lock
+    if _start_lock is None:
+        _start_lock = asyncio.Lock()
+    async with _start_lock:
+        if _server is None:
+            server = VideoServer(
+                assets_dir,
+                host=os.environ.get("GONGGONG_VIDEO_HOST", "127.0.0.1"),
+                port=int(os.environ.get("GONGGONG_VIDEO_PORT", "0")),
+                public_host=os.environ.get("GONGGONG_VIDEO_PUBLIC_HOST") or None,
+            )
+            await server.start()
+            _server = server
+    return _server
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Set
+
+import flet as ft
+
+# ==========================================
+# 路由级视图缓存 (Route-level View Cache)
+# ==========================================
+
+@dataclass
+class ViewHooks:
+    """
+    挂在 ft.View.data 上的回调，供视图缓存在复用/淘汰视图时调用。
+    - reset:   复用前把视图恢复到初始状态 (例如播放页回到第一题)
+    - release: 视图被淘汰或失效时释放资源 (例如播放器池)
+    - refresh: 话题目录变化时就地刷新视图内容 (例如菜单)，参数为新的话题列表，
+               返回改动过的控件，由调用方合并推送
+    """
+    reset: Optional[Callable[[], None]] = None
+    release: Optional[Callable[[], None]] = None
+    refresh: Optional[Callable[[list], Sequence[ft.Control]]] = None
+
+
+def _hooks(view: ft.View) -> Optional[ViewHooks]:
+    return view.data if isinstance(view.data, ViewHooks) else None
+
+
+class ViewCache:
+    """
+    按路由缓存 ft.View，避免每次导航都重建整棵控件树。
+    - 菜单 "/" 常驻缓存，只在话题目录变化时显式失效
+    - 播放页按 LRU 保留最近 max_players 个，超出时淘汰并释放资源
+    """
+
+    def __init__(self, max_players: int = 3):
+        self.max_players = max(1, max_players)
+        self._menu: Optional[ft.View] = None
+        self._players: "OrderedDict[str, ft.View]" = OrderedDict()
+        self._stale: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, route: str) -> Optional[ft.View]:
+        """取出缓存的视图；播放页会先调用 reset 钩子恢复初始状态"""
+        if route in self._stale:
+            self._stale.discard(route)
+            self.invalidate(route)
+
+        if route == "/":
+            view = self._menu
+        else:
+            view = self._players.get(route)
+            if view is not None:
+                self._players.move_to_end(route)
+                hooks = _hooks(view)
+                if hooks and hooks.reset:
+                    hooks.reset()
+
+        if view is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return view
+
+    def put(self, route: str, view: ft.View) -> ft.View:
+        if route == "/":
+            self._menu = view
+            return view
+
+        self._players[route] = view
+        self._players.move_to_end(route)
+        while len(self._players) > self.max_players:
+            _, evicted = self._players.popitem(last=False)
+            self._release(evicted)
+        return view
+
+    def peek(self, route: str) -> Optional[ft.View]:
+        """查看缓存的视图而不触发 reset，也不计入命中统计"""
+        return self._menu if route == "/" else self._players.get(route)
+
+    def mark_stale(self, route: str) -> None:
+        """
+        标记某个路由已过期：正在显示的视图不受影响，
+        下次导航到该路由时才丢弃并重建 (避免打断正在播放的话题)
+        """
+        if self.peek(route) is not None:
+            self._stale.add(route)
+
+    def invalidate(self, route: Optional[str] = None) -> None:
+        """让某个路由 (或全部，route=None) 的缓存失效，下次访问时重建"""
+        if route is None:
+            self._menu = None
+            self._stale.clear()
+            for view in self._players.values():
+                self._release(view)
+            self._players.clear()
+        elif route == "/":
+            self._menu = None
+        else:
+            view = self._players.pop(route, None)
+            if view is not None:
+                self._release(view)
+
+    @staticmethod
+    def _release(view: ft.View) -> None:
+        hooks = _hooks(view)
+        if hooks and hooks.release:
+            hooks.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "menu_cached": int(self._menu is not None),
+            "players_cached": len(self._players),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
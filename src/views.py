@@ -1,60 +1,131 @@
 import flet as ft
-import flet_video as ftv
-from typing import List, Callable, Awaitable
+from collections import OrderedDict
+from typing import List, Callable, Awaitable, AsyncIterator, Optional, Tuple
 from data_loader import Topic, Question
-import pathlib
-import platform
+from device_profile import RenditionSelector, detect
+from prefetch import VideoPrefetcher
+from player_engine import PlayerEngine
+from view_cache import ViewHooks
+import metrics
+import journal
+import video_server
 import os
+import time
+import asyncio
+import importlib
+import startup_profile
+
+# 诊断模式：设置环境变量 GONGGONG_DEBUG=1 后显示黄色调试框并打印切换日志
+DEBUG = os.environ.get("GONGGONG_DEBUG", "") == "1"
+
+# 菜单每页显示的话题数 (3 列 x 4 行)
+MENU_PAGE_SIZE = 12
+
+# 菜单显示后在后台预先导入播放页依赖 (flet_video)，设置 GONGGONG_WARMUP=0 关闭
+WARMUP = os.environ.get("GONGGONG_WARMUP", "1") != "0"
+
+# 播放页依赖 (player_pool -> flet_video) 在第一次进入播放页或后台预热时才导入，不拖慢首屏
+PLAYER_MODULE = "player_pool"
+
+
+async def warm_up_player() -> None:
+    """在线程里导入播放页依赖；导入锁保证与 get_player_view 的导入不会重复执行"""
+    started = time.perf_counter()
+    await asyncio.to_thread(importlib.import_module, PLAYER_MODULE)
+    startup_profile.mark("player_warm")
+    print(f"[Perf] 播放页依赖预热完成: {(time.perf_counter() - started) * 1000:.0f} ms")
 
 # ==========================================
 # 1. 辅助函数 (智能跨平台路径处理)
 # ==========================================
 
-def _get_video_src(raw_path: str) -> str:
+def _get_video_src(q: Question, type_id: int, rendition: int = 0) -> Optional[str]:
     """
     全平台通用的绝对物理路径策略
-    无论在 Windows 还是 Android，直接读取脚本所在目录的物理文件
+    使用 data_loader 加载时解析好的话题目录 URI 前缀 + 文件名 (切换阶段时零系统调用)，
+    URI 格式的路径 (file:///...) 对 Android 的 ExoPlayer 最安全，也能正确转义空格。
+    浏览器模式下 file:// 不可用，改用本地视频服务的 http:// 地址。
+    rendition 为版本序号 (由 RenditionSelector 按设备档位挑选)
     """
-    # 获取当前脚本 (views.py) 的父目录作为基准目录
-    current_dir = pathlib.Path(__file__).parent.resolve()
-    # 使用 current_dir.joinpath(raw_path) 拼接出文件的完整绝对路径
-    full_path = current_dir.joinpath(raw_path).resolve()
-    # 打印 DEBUG 日志到控制台
-    print(f"DEBUG: Target={full_path} | Exists={full_path.exists()}")
-    # 返回 URI 格式的路径 (file:///...)，这对 Android 的 ExoPlayer 最安全
-    return full_path.as_uri()
-
-def get_menu_view(page: ft.Page, topics: List[Topic], on_topic_click: Callable[[Topic], Awaitable[None]]):
-    """主菜单：展示所有可用的话题"""
-    topic_buttons = []
+    server = video_server.current()
+    if server is not None:
+        return server.url_for(q, type_id, rendition)
+    uri = q.uri(type_id, rendition)
+    if DEBUG and uri is not None:
+        print(f"DEBUG: Target={q.local_path(type_id, rendition)}")
+    return uri
+
+def _get_local_path(q: Question, type_id: int, rendition: int = 0) -> Optional[str]:
+    """返回视频的本地绝对路径 (用于预取)"""
+    return q.local_path(type_id, rendition)
+
+def _build_topic_tile(topic: Topic, on_click) -> ft.Container:
+    """构建菜单中单个话题的卡片按钮"""
+    return ft.Container(
+        content=ft.FilledButton(
+            content=ft.Column(
+                [
+                    ft.Icon(ft.Icons.VIDEO_LIBRARY, size=40),
+                    ft.Text(topic.name, size=20, weight=ft.FontWeight.BOLD),
+                    ft.Text(f"包含 {topic.question_count} 个环节", size=12),
+                ],
+                alignment=ft.MainAxisAlignment.CENTER,
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            ),
+            style=ft.ButtonStyle(
+                shape=ft.RoundedRectangleBorder(radius=10),
+                padding=20,
+            ),
+            on_click=on_click,
+            height=160,
+        ),
+        padding=10,
+    )
 
+def get_menu_view(
+    page: ft.Page,
+    topics: List[Topic],
+    on_topic_click: Callable[[Topic], Awaitable[None]],
+    topic_stream: Optional[AsyncIterator[Topic]] = None,
+):
+    """
+    主菜单：分页展示所有可用的话题
+    每页只构建 MENU_PAGE_SIZE 个卡片，翻页时按需创建，话题再多控件树和推送量也保持不变。
+    传入 topic_stream 时，先用 topics 中已有的话题画出菜单，
+    再在后台逐个追加 stream 产出的话题 (渐进式加载)
+    """
     def create_click_handler(t: Topic):
         async def handler(e):
             await on_topic_click(t)
         return handler
 
-    for topic in topics:
-        btn = ft.Container(
-            content=ft.FilledButton(
-                content=ft.Column(
-                    [
-                        ft.Icon(ft.Icons.VIDEO_LIBRARY, size=40),
-                        ft.Text(topic.name, size=20, weight=ft.FontWeight.BOLD),
-                        ft.Text(f"包含 {len(topic.questions)} 个环节", size=12),
-                    ],
-                    alignment=ft.MainAxisAlignment.CENTER,
-                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                ),
-                style=ft.ButtonStyle(
-                    shape=ft.RoundedRectangleBorder(radius=10),
-                    padding=20,
-                ),
-                on_click=create_click_handler(topic),
-                height=160,
-            ),
-            padding=10,
-        )
-        topic_buttons.append(btn)
+    # 菜单自己持有一份话题顺序 (只是引用列表)，流式加载和热更新都只改这里
+    entries: List[Topic] = list(topics)
+    known_ids = {t.id for t in entries}
+    current_page = 0
+
+    # 最近用过的 (Topic, 问题数, 卡片)，Topic 对象和问题数都没变的卡片直接复用 (懒加载的话题解析后
+    # 问题数可能改变)；只保留当前页和前后各一页
+    tiles: "OrderedDict[str, Tuple[Topic, int, ft.Container]]" = OrderedDict()
+
+    def tile_for(topic: Topic) -> ft.Container:
+        cached = tiles.get(topic.id)
+        if cached is None or cached[0] is not topic or cached[1] != topic.question_count:
+            cached = (topic, topic.question_count, _build_topic_tile(topic, create_click_handler(topic)))
+            tiles[topic.id] = cached
+        tiles.move_to_end(topic.id)
+        while len(tiles) > MENU_PAGE_SIZE * 3:
+            tiles.popitem(last=False)
+        return cached[2]
+
+    def page_count() -> int:
+        return max(1, (len(entries) + MENU_PAGE_SIZE - 1) // MENU_PAGE_SIZE)
+
+    # 加载提示：仅在渐进式加载期间显示
+    loading_hint = ft.Row(
+        [ft.ProgressRing(width=16, height=16, stroke_width=2), ft.Text("正在加载话题...", size=14)],
+        visible=topic_stream is not None,
+    )
 
     menu_grid = ft.GridView(
         expand=True,
@@ -63,11 +134,60 @@ def get_menu_view(page: ft.Page, topics: List[Topic], on_topic_click: Callable[[
         child_aspect_ratio=1.0,
         spacing=10,
         run_spacing=10,
-        controls=topic_buttons,
     )
 
-    return ft.View(
+    page_label = ft.Text(size=18)
+    btn_prev = ft.FilledButton(content=ft.Text("上一页"), icon=ft.Icons.CHEVRON_LEFT, height=50)
+    btn_next = ft.FilledButton(content=ft.Text("下一页"), icon=ft.Icons.CHEVRON_RIGHT, height=50)
+    pager = ft.Row([btn_prev, page_label, btn_next], alignment=ft.MainAxisAlignment.CENTER, spacing=20)
+
+    def update_pager():
+        total_pages = page_count()
+        page_label.value = f"第 {current_page + 1} / {total_pages} 页"
+        btn_prev.disabled = current_page == 0
+        btn_next.disabled = current_page >= total_pages - 1
+        pager.visible = total_pages > 1
+
+    def render_page():
+        """只把当前页的话题放进网格 (调用方负责推送 menu_grid 和 pager)"""
+        nonlocal current_page
+        current_page = min(current_page, page_count() - 1)
+        start = current_page * MENU_PAGE_SIZE
+        menu_grid.controls = [tile_for(t) for t in entries[start:start + MENU_PAGE_SIZE]]
+        update_pager()
+
+    async def on_prev_click(e):
+        nonlocal current_page
+        if current_page > 0:
+            current_page -= 1
+            render_page()
+            metrics.page_update(page, menu_grid, pager)
+
+    async def on_next_click(e):
+        nonlocal current_page
+        if current_page < page_count() - 1:
+            current_page += 1
+            render_page()
+            metrics.page_update(page, menu_grid, pager)
+
+    btn_prev.on_click = on_prev_click
+    btn_next.on_click = on_next_click
+    render_page()
+
+    def refresh(new_topics: List[Topic]):
+        """话题目录热更新后就地刷新当前页，返回改动过的控件 (调用方负责推送)"""
+        entries[:] = new_topics
+        known_ids.clear()
+        known_ids.update(t.id for t in entries)
+        for topic_id in list(tiles):
+            if topic_id not in known_ids:
+                del tiles[topic_id]
+        render_page()
+        return menu_grid, pager
+
+    menu_view = ft.View(
         route="/",
+        data=ViewHooks(refresh=refresh),
         controls=[
             ft.SafeArea(
                 content=ft.Column(
@@ -76,8 +196,10 @@ def get_menu_view(page: ft.Page, topics: List[Topic], on_topic_click: Callable[[
                             content=ft.Text("请选择一个回忆话题", size=32, weight=ft.FontWeight.BOLD),
                             padding=ft.padding.only(left=10, top=20, bottom=10)
                         ),
+                        loading_hint,
                         ft.Divider(),
                         menu_grid,
+                        pager,
                     ],
                     expand=True,
                 ),
@@ -86,20 +208,62 @@ def get_menu_view(page: ft.Page, topics: List[Topic], on_topic_click: Callable[[
         ],
     )
 
+    def push(*controls: ft.Control):
+        # 加载期间用户可能已进入播放页：菜单不在屏幕上时不推送，切回菜单时随路由一起更新
+        if menu_view in page.views:
+            metrics.page_update(page, *controls)
+
+    async def fill_from_stream():
+        # 合并刷新：第一个话题立即显示，之后最多每 100ms 推送一次；
+        # 新话题落在其他页时只更新页码，不改动网格，也只推送页码
+        last_flush = 0.0
+        grid_dirty = False
+        async for topic in topic_stream:
+            if topic.id in known_ids:
+                continue
+            entries.append(topic)
+            known_ids.add(topic.id)
+            if (len(entries) - 1) // MENU_PAGE_SIZE == current_page:
+                menu_grid.controls.append(tile_for(topic))
+                grid_dirty = True
+            update_pager()
+            now = time.monotonic()
+            if now - last_flush >= 0.1:
+                last_flush = now
+                push(*((menu_grid, pager) if grid_dirty else (pager,)))
+                grid_dirty = False
+        loading_hint.visible = False
+        push(*((loading_hint, menu_grid, pager) if grid_dirty else (loading_hint, pager)))
+
+    if topic_stream is not None:
+        page.run_task(fill_from_stream)
+
+    return menu_view
+
 # ==========================================
 # 3. 播放器视图 (Player View - Core Logic)
 # ==========================================
 
-def get_player_view(page: ft.Page, topic: Topic):
-    """核心播放页面"""
-    current_q_index = 0
-    questions: List[Question] = topic.questions
-    total_questions = len(questions)
+def get_player_view(page: ft.Page, topic: Topic, selector: Optional[RenditionSelector] = None):
+    """
+    核心播放页面。selector 挑选每个阶段播放的视频版本，同一会话的播放页共用一个，
+    加载耗时的统计才能跨话题延续；不传时按当前设备新建。
+    """
+    # 预热已完成时只是一次字典查找
+    from player_pool import PlayerPool
+
+    # 状态机 (问题/阶段切换、训练记录、视频版本选择) 在 PlayerEngine 里，这里只负责渲染
+    if selector is None:
+        selector = RenditionSelector(detect(page))
+    # 训练记录：每次按钮动作都追加一条，重新进入话题时从上次停留的问题继续
+    engine = PlayerEngine(topic.id, topic.questions, selector, journal.current())
 
     # --- UI Controls Definition ---
     
     # 新增调试控件
-    debug_text = ft.Text(value="初始化...", color=ft.Colors.RED, size=12, selectable=True)
+    debug_text = ft.Text(value="初始化...", color=ft.Colors.RED, size=12, selectable=True, visible=DEBUG)
+    # 计时统计浮层 (GONGGONG_METRICS=overlay)，与调试信息共用黄色框
+    metrics_text = ft.Text(value="暂无统计", size=11, selectable=True, visible=metrics.OVERLAY)
     
     # [关键修改] 定义一个容器，而不是直接定义 Video
     # 稍后我们将把 Video 组件动态塞入这个容器
@@ -172,119 +336,168 @@ def get_player_view(page: ft.Page, topic: Topic):
         alignment=ft.MainAxisAlignment.CENTER,
     )
 
-    title_text = ft.Text(f"当前进度: 1 / {total_questions}", size=18)
+    title_text = ft.Text(f"当前进度: 1 / {engine.total}", size=18)
+
+    # 引擎的按钮动作 -> 按钮
+    buttons = {
+        journal.ACTION_REPEAT: btn_repeat,
+        journal.ACTION_FORGET: btn_forget,
+        journal.ACTION_CORRECT: btn_correct,
+        journal.ACTION_NEXT: btn_next,
+        journal.ACTION_FINISH: btn_finish,
+        journal.ACTION_RETRY: btn_retry,
+        journal.ACTION_SKIP: btn_skip,
+    }
+
+    # 预取器：状态机的下一步是已知的，提前把候选视频读进页缓存
+    prefetcher = VideoPrefetcher()
+    # 当前切换的描述和按下按钮的时刻，用于首帧耗时日志
+    transition_label = ""
+    transition_prefetched = False
+    transition_started = time.perf_counter()
+
+    def on_player_ready(src: str, elapsed_ms: float, reused: bool):
+        """播放器池回调：记录从按下按钮到播放器就绪 (首帧可播放) 的耗时"""
+        hit = "命中" if transition_prefetched else "未命中"
+        origin = "复用" if reused else "新建"
+        print(f"[Perf] {transition_label} 首帧就绪: {elapsed_ms:.0f} ms (预取{hit}, 播放器{origin})")
+        metrics.record("player.ready.reused" if reused else "player.ready.created", elapsed_ms)
+        metrics.record("player.press_to_ready", (time.perf_counter() - transition_started) * 1000)
+        # 加载耗时反馈给版本选择：持续偏慢时改播更低的版本
+        engine.report_load(elapsed_ms)
+
+    # 播放器池：当前播放器 + 预加载的下一步候选，按视频复用，不再每次新建 Video
+    player_pool = PlayerPool(capacity=2, on_ready=on_player_ready)
 
     # --- Logic ---
 
-    async def update_ui_state(state_id: int):
-        nonlocal current_q_index
-        if current_q_index >= total_questions:
-            return
+    def schedule_prefetch(playing_path: Optional[str]):
+        """
+        按状态机预测下一步可能播放的视频：
+        所有候选都预读进页缓存，最可能的候选额外预加载到播放器池
+        """
+        candidate_paths = []
+        candidate_srcs = []
+        for candidate_q, stage, rendition in engine.candidates():
+            src = _get_video_src(candidate_q, stage, rendition)
+            if src:
+                candidate_paths.append(_get_local_path(candidate_q, stage, rendition))
+                candidate_srcs.append(src)
+        prefetcher.retarget(candidate_paths, playing=playing_path)
+        player_pool.preload(candidate_srcs)
+
+    def show_progress():
+        title_text.value = f"当前进度: {min(engine.q_index + 1, engine.total)} / {engine.total}"
 
-        q = questions[current_q_index]
-        raw_path = q.videos.get(state_id)
+    async def update_ui_state(*changed: ft.Control):
+        """
+        把引擎的当前状态渲染出来。只推送本次改动的控件：视频容器、按钮行，
+        以及调用方额外改动的控件 (changed，例如进度文字)，合并为一次 page.update。
+        """
+        nonlocal transition_label, transition_prefetched, transition_started
+        transition_started = time.perf_counter()
+
+        q, state_id, rendition = engine.question, engine.stage, engine.rendition
+        src = _get_video_src(q, state_id, rendition)
         
-        if raw_path:
-            src = _get_video_src(raw_path)
-            print(f"Switching video to: {src}")
-            
-            # 更新调试信息：将 URI 还原为普通路径，检测文件是否存在
-            # 去掉 file:/// 前缀
-            if src.startswith('file:///'):
-                file_path = src[8:]  # 移除 'file:///'
-            else:
-                file_path = src
-            exists = os.path.exists(file_path)
-            debug_text.value = f"文件存在: {exists}\n路径: {file_path}"
-            debug_text.update()
-            
-            # [关键修复] 暴力重绘策略
-            # 不更新旧 Video，而是创建一个全新的 Video 组件
-            # 这样能强制浏览器/Android 重新加载资源
-            new_player = ftv.Video(
-                expand=True,
-                autoplay=True,      # 新组件创建即播放
-                show_controls=False,
-                playlist=[ftv.VideoMedia(src)],
-                aspect_ratio=16/9,
-                filter_quality=ft.FilterQuality.HIGH,
-                # 即使是新组件，最好也加个 key 确保唯一性 (可选，但推荐)
-                key=f"video_{q.id}_{state_id}_{current_q_index}"
-            )
+        if src:
+            local_path = _get_local_path(q, state_id, rendition)
+            transition_label = f"Q{q.id} State {state_id}"
+            transition_prefetched = prefetcher.mark_played(local_path)
+
+            if DEBUG:
+                # 文件存在性和大小已在加载时检查过，这里只展示结果
+                print(f"Switching video to: {src}")
+                debug_text.value = f"文件大小: {q.size(state_id, rendition) or '未知'} 字节\n路径: {local_path}"
             
-            # 将容器内容替换为新播放器
-            video_container.content = new_player
-            # 注意：新组件不需要 await video.play()，因为有 autoplay=True
+            # 从播放器池取出 (或新建) 该视频的播放器并从头播放
+            # 每个播放器只绑定一个视频，不修改 playlist，保留"新视频用新组件"的可靠性
+            await player_pool.activate(src)
+            video_container.content = player_pool.stack
+            schedule_prefetch(local_path)
         else:
             print(f"Error: Missing video for State {state_id} in Question {q.id}")
             video_container.content = ft.Text("视频缺失", color=ft.Colors.RED)
 
-        controls_row.controls.clear()
-
-        if state_id == 0 or state_id == 1:
-            controls_row.controls = [btn_repeat, btn_forget, btn_correct]
-        elif state_id == 2:
-            if current_q_index < total_questions - 1:
-                controls_row.controls = [btn_next]
-            else:
-                controls_row.controls = [btn_finish]
-        elif state_id == 3:
-            controls_row.controls = [btn_retry, btn_skip]
+        dirty = [video_container, controls_row, *changed]
+        if DEBUG:
+            dirty.append(debug_text)
+        controls_row.controls = [buttons[action] for action in engine.actions]
 
-        page.update()
+        metrics.record("player.switch", (time.perf_counter() - transition_started) * 1000)
+        if metrics.OVERLAY:
+            metrics_text.value = "\n".join(metrics.summary_lines())
+            dirty.append(metrics_text)
+        metrics.page_update(page, *dirty)
 
     # --- Handlers ---
-    
-    async def on_repeat_click(e): await update_ui_state(1)
-    async def on_forget_click(e): await update_ui_state(3)
-    async def on_correct_click(e): await update_ui_state(2)
-    async def on_retry_click(e): await update_ui_state(0)
-    
-    async def on_next_or_skip_click(e):
-        nonlocal current_q_index
-        if current_q_index < total_questions - 1:
-            current_q_index += 1
-            title_text.value = f"当前进度: {current_q_index + 1} / {total_questions}"
-            await update_ui_state(0)
-    
-    async def on_finish_click(e): 
-        # 离开前清空视频，防止后台声音
-        video_container.content = None 
-        await page.push_route("/")
 
-    async def on_back_nav_click(e): 
+    def handler_for(action: str):
+        async def handler(e):
+            q_index = engine.q_index
+            if not engine.press(action):
+                return
+            if engine.finished:
+                release_players()
+                await page.push_route("/")
+            elif engine.q_index != q_index:
+                show_progress()
+                await update_ui_state(title_text)
+            else:
+                await update_ui_state()
+        return handler
+
+    def release_players():
+        # 清空视频并释放播放器池，防止后台声音
         video_container.content = None
+        player_pool.release()
+        prefetcher.cancel_all()
+
+    async def on_back_nav_click(e): 
+        release_players()
         await page.push_route("/")
 
     # Bind handlers
-    btn_repeat.on_click = on_repeat_click
-    btn_forget.on_click = on_forget_click
-    btn_correct.on_click = on_correct_click
-    btn_retry.on_click = on_retry_click
-    btn_next.on_click = on_next_or_skip_click
-    btn_skip.on_click = on_next_or_skip_click
-    btn_finish.on_click = on_finish_click
+    for action, button in buttons.items():
+        button.on_click = handler_for(action)
 
     # --- Initialization ---
-    
-    if total_questions > 0:
-        first_q = questions[0]
+
+    def show_start_question():
+        """
+        把页面恢复到起始问题的 State 0 (首次构建和视图缓存复用时调用，此时视图尚未挂载)。
+        起始问题是训练记录里上次停留的问题，没有记录时为第一题。
+        """
+        nonlocal transition_label
+        started = engine.start()
+        show_progress()
+        if not started:
+            # 话题没有可播放的问题 (路由会先退回菜单，这里只是不让加载圈一直转)
+            video_container.content = ft.Text("视频缺失", color=ft.Colors.RED)
+            controls_row.controls = []
+            return
+
+        start_q = engine.question
         # 初始加载第一个视频
-        if 0 in first_q.videos:
-            init_src = _get_video_src(first_q.videos[0])
+        init_src = _get_video_src(start_q, 0, engine.rendition)
+        if init_src:
             # 直接创建初始 Video
-            video_container.content = ftv.Video(
-                expand=True,
-                autoplay=True,
-                show_controls=False,
-                playlist=[ftv.VideoMedia(init_src)],
-                aspect_ratio=16/9,
-                filter_quality=ft.FilterQuality.HIGH
-            )
+            transition_label = f"Q{start_q.id} State 0"
+            player_pool.start(init_src)
+            video_container.content = player_pool.stack
+            schedule_prefetch(_get_local_path(start_q, 0, engine.rendition))
         
-        controls_row.controls = [btn_repeat, btn_forget, btn_correct]
+        controls_row.controls = [buttons[action] for action in engine.actions]
+
+    def reset():
+        # 视图被缓存复用：先释放上一次留下的播放器 (例如通过系统返回键离开)，再回到第一题
+        release_players()
+        show_start_question()
+
+    show_start_question()
 
     return ft.View(
+        data=ViewHooks(reset=reset, release=release_players),
         route=f"/play/{topic.id}",
         padding=0,
         controls=[
@@ -303,9 +516,10 @@ def get_player_view(page: ft.Page, topic: Topic):
                             ),
                             padding=10
                         ),
-                        # 调试信息容器（黄色背景）
+                        # 调试信息 / 计时统计容器（黄色背景），仅诊断模式或统计浮层开启时显示
                         ft.Container(
-                            content=debug_text,
+                            content=ft.Column([debug_text, metrics_text], spacing=2),
+                            visible=DEBUG or metrics.OVERLAY,
                             bgcolor=ft.Colors.YELLOW_100,
                             padding=5,
                             border_radius=5,
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 应用代码是 src 下的平铺模块 (flet 以 src 为入口目录)，测试直接按模块名导入
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
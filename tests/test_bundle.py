@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+import data_loader
+from bundle import _HEADER, Bundle, BundleError, build_bundle, open_bundle
+from create_files import generate_assets
+
+
+@pytest.fixture
+def assets_dir(tmp_path, monkeypatch):
+    # file:// 路径相对当前目录计算，测试在临时目录里运行
+    monkeypatch.chdir(tmp_path)
+    generate_assets("assets", 3, 4, incomplete_ratio=0.25, seed=1, verbose=False)
+    return "assets"
+
+
+def test_round_trip(assets_dir, tmp_path):
+    expected = data_loader.load_topics(assets_dir, use_index=False, use_bundle=False)
+    out = str(tmp_path / "videos.ggb")
+    stats = build_bundle(assets_dir, out)
+    assert stats["topics"] == len(expected)
+
+    with Bundle(out, cache_dir=str(tmp_path / "cache")) as bundle:
+        topics = {t.id: t for t in bundle.topics()}
+        assert sorted(topics) == sorted(t.id for t in expected)
+        # 只读索引，还没有解包任何视频
+        assert not os.path.exists(bundle.cache_root)
+
+        for topic in expected:
+            packed = topics[topic.id]
+            assert packed.question_count == topic.question_count
+            for q in topic.questions:
+                for name in q.names:
+                    offset, length = bundle.locate(topic.id, name)
+                    assert offset % 4096 == 0
+                    with open(os.path.join(assets_dir, topic.id, name), "rb") as f:
+                        assert bundle.read_range(offset, length) == f.read()
+
+            # 解析时才解包该话题，内容与原始文件一致
+            resolved = packed.resolve()
+            assert [q.id for q in resolved] == [q.id for q in topic.questions]
+            for q in resolved:
+                for name in q.names:
+                    with open(os.path.join(packed.path, name), "rb") as a, \
+                            open(os.path.join(assets_dir, topic.id, name), "rb") as b:
+                        assert a.read() == b.read()
+
+
+def test_empty_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("assets")
+    out = str(tmp_path / "videos.ggb")
+    assert build_bundle("assets", out)["videos"] == 0
+
+    with Bundle(out) as bundle:
+        assert bundle.topics() == []
+        assert bundle.locate("t1", "q1_0_ask.mp4") is None
+
+    # 旧版本打包的空文件没有把数据区补齐到 data_offset，同样可以打开
+    with open(out, "r+b") as f:
+        f.truncate(_HEADER.size)
+    with Bundle(out) as bundle:
+        assert bundle.topic_ids == []
+
+
+def test_open_bundle_reuses_until_rebuilt(assets_dir, tmp_path):
+    out = str(tmp_path / "videos.ggb")
+    build_bundle(assets_dir, out)
+    first = open_bundle(out)
+    assert open_bundle(out) is first
+
+    # 重新打包 (mtime 粒度可能很粗，手动推后，保证签名变化)
+    build_bundle(assets_dir, out)
+    os.utime(out, ns=(first.signature[1], first.signature[1] + 1_000_000_000))
+    second = open_bundle(out)
+    try:
+        assert second is not first
+        # 旧映射已经关闭
+        with pytest.raises(ValueError):
+            first.read_range(0, 8)
+    finally:
+        second.close()
+
+
+def test_rejects_garbage(tmp_path):
+    path = tmp_path / "videos.ggb"
+    path.write_bytes(b"GGBUNDLE" + bytes(64))
+    with pytest.raises(BundleError):
+        Bundle(str(path))
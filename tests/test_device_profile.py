@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from data_loader import Rendition, TopicPaths, question_from_renditions
+from device_profile import PROFILES, RenditionSelector
+
+
+def _question():
+    """阶段 0 有原始版本 + 1080p/720p/480p 四个版本，其余阶段只有一个版本"""
+    paths = TopicPaths(Path("assets/t1"), Path("/"))
+    stages = [
+        [Rendition(f"q1_0_ask{suffix}.mp4", 10) for suffix in ("@480p", "", "@1080p", "@720p")],
+        [Rendition("q1_1_repeat.mp4", 10)],
+        [Rendition("q1_2_praise.mp4", 10)],
+        [Rendition("q1_3_guide.mp4", 10)],
+    ]
+    return question_from_renditions(1, paths, stages)
+
+
+def test_choose_by_profile():
+    q = _question()
+    assert q.rendition_labels(0) == ("", "1080p", "720p", "480p")
+    assert RenditionSelector(PROFILES["desktop"]).choose(q, 0) == 0
+    assert RenditionSelector(PROFILES["tablet"]).choose(q, 0) == 2
+    assert RenditionSelector(PROFILES["low"]).choose(q, 0) == 3
+    # 只有一个版本的阶段恒为 0
+    assert RenditionSelector(PROFILES["low"]).choose(q, 1) == 0
+
+
+def test_steps_down_when_slow_and_back_when_fast(capsys):
+    q = _question()
+    selector = RenditionSelector(PROFILES["desktop"], slow_ms=1000, fast_ms=300, window=3)
+    selector.report(5000)
+    selector.report(5000)
+    # 窗口未满时不调整
+    assert selector.step_down == 0
+
+    selector.report(5000)
+    assert selector.step_down == 1 and selector.choose(q, 0) == 1
+    for _ in range(3):
+        selector.report(2000)
+    assert selector.step_down == 2 and selector.choose(q, 0) == 2
+
+    # 平均不算慢、但也不是全部够快：保持不变
+    for ms in (100, 100, 900):
+        selector.report(ms)
+    assert selector.step_down == 2
+
+    for _ in range(3):
+        selector.report(100)
+    assert selector.step_down == 1 and selector.choose(q, 0) == 1
+    for _ in range(6):
+        selector.report(100)
+    # 最多回到档位起点
+    assert selector.step_down == 0 and selector.choose(q, 0) == 0
+    assert "降低一档" in capsys.readouterr().out
+
+
+def test_step_down_is_bounded():
+    q = _question()
+    selector = RenditionSelector(PROFILES["tablet"], window=1, max_step_down=1)
+    for _ in range(5):
+        selector.report(10_000)
+    assert selector.step_down == 1
+    # 已经是最低版本时不再越界
+    assert selector.choose(q, 0) == 3
@@ -0,0 +1,81 @@
+import struct
+
+import pytest
+
+from create_files import _box, _full_box, mp4_stub
+from faststart import analyze, make_faststart
+from mp4box import Mp4Error
+from validate_assets import check_video
+
+
+def _chunk_offsets(data: bytes, box_type: bytes):
+    """按类型找到 stco/co64 并读出所有块偏移 (测试文件里每种只有一个)"""
+    pos = data.index(box_type) - 4
+    (count,) = struct.unpack_from(">I", data, pos + 12)
+    fmt, width = (">I", 4) if box_type == b"stco" else (">Q", 8)
+    return [struct.unpack_from(fmt, data, pos + 16 + i * width)[0] for i in range(count)]
+
+
+def test_moves_moov_and_shifts_stco(tmp_path):
+    payload = b"frame-data" * 50
+    path = tmp_path / "q1_0_ask.mp4"
+    path.write_bytes(mp4_stub(payload, faststart=False))
+    assert analyze(str(path)).status == "needs_faststart"
+    (before,) = _chunk_offsets(path.read_bytes(), b"stco")
+
+    assert make_faststart(str(path)) is True
+    data = path.read_bytes()
+    assert analyze(str(path)).status == "ok"
+    (after,) = _chunk_offsets(data, b"stco")
+    assert after > before
+    assert data[after:after + len(payload)] == payload
+    # 与直接生成的 faststart 布局逐字节一致
+    assert data == mp4_stub(payload, faststart=True)
+    assert make_faststart(str(path)) is False
+
+
+def test_shifts_co64_and_keeps_offsets_outside_mdat(tmp_path):
+    ftyp = _box(b"ftyp", b"isom" + struct.pack(">I", 0x200))
+    first, second = b"A" * 64, b"B" * 32
+    first_offset = len(ftyp) + 8
+    second_offset = first_offset + len(first) + 8
+    stbl = _box(b"stbl", _full_box(b"stco", 0, 0, struct.pack(">II", 1, first_offset))
+                + _full_box(b"co64", 0, 0, struct.pack(">IQQ", 2, second_offset, 0)))
+    moov = _box(b"moov", _box(b"trak", _box(b"mdia", _box(b"minf", stbl))))
+    path = tmp_path / "q1_0_ask.mp4"
+    path.write_bytes(ftyp + _box(b"mdat", first) + _box(b"mdat", second) + moov)
+
+    assert make_faststart(str(path)) is True
+    data = path.read_bytes()
+    assert data.index(b"moov") < data.index(b"mdat")
+    (stco,) = _chunk_offsets(data, b"stco")
+    co64 = _chunk_offsets(data, b"co64")
+    assert stco == first_offset + len(moov) and data[stco:stco + len(first)] == first
+    assert co64[0] == second_offset + len(moov) and data[co64[0]:co64[0] + len(second)] == second
+    # 指向 mdat 之前的偏移不在移动范围内，保持原值
+    assert co64[1] == 0
+
+
+def test_invalid_file_raises(tmp_path):
+    path = tmp_path / "q1_0_ask.mp4"
+    path.write_bytes(b"not an mp4")
+    with pytest.raises(Mp4Error):
+        make_faststart(str(path))
+    assert path.read_bytes() == b"not an mp4"
+
+
+def test_udta_with_zero_terminator(tmp_path):
+    # 手机 / QuickTime 录制的 udta 以 4 字节的 0 结尾，不是合法的子盒子
+    payload = b"frame-data" * 50
+    stub = mp4_stub(payload, faststart=False)
+    moov_at = stub.index(b"moov") - 4
+    udta = _box(b"udta", _box(b"\xa9nam", b"\x00\x05\x55\xc4title") + bytes(4))
+    path = tmp_path / "q1_0_ask.mp4"
+    path.write_bytes(stub[:moov_at] + _box(b"moov", stub[moov_at + 8:] + udta))
+
+    assert check_video(str(path)).ok
+    assert make_faststart(str(path)) is True
+    data = path.read_bytes()
+    (offset,) = _chunk_offsets(data, b"stco")
+    assert data[offset:offset + len(payload)] == payload
+    assert check_video(str(path)).ok
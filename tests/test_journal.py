@@ -0,0 +1,85 @@
+import os
+
+import journal
+from journal import Journal, read_events
+
+
+def _files(directory):
+    return sorted(name for name in os.listdir(directory) if not name.endswith(".tmp"))
+
+
+def test_write_compact_resume(tmp_path):
+    j = Journal(str(tmp_path), compact_bytes=1, flush_interval=0)
+    j.append("t1", 1, 0, journal.ACTION_START)
+    j.append("t1", 2, 1, journal.ACTION_CORRECT)
+    j.append("t2", 5, 0, journal.ACTION_START)
+    # 界面线程里立即可见，不等写盘
+    assert j.resume_point("t1") == (2, 1)
+    j.close()
+
+    # 每批写完都超过 compact_bytes，已经压缩进快照，只剩最新一代的空日志
+    assert journal.SNAPSHOT_FILENAME in _files(tmp_path)
+    assert list(read_events(str(tmp_path))) == []
+
+    reopened = Journal(str(tmp_path))
+    try:
+        assert reopened.resume_point("t1") == (2, 1)
+        assert reopened.resume_point("t2") == (5, 0)
+        stats = reopened.stats()
+        assert stats["t1"].sessions == 1 and stats["t1"].correct == 1
+    finally:
+        reopened.close()
+
+
+def test_replay_without_compaction(tmp_path):
+    j = Journal(str(tmp_path), flush_interval=0)
+    j.append("t1", 3, 2, journal.ACTION_START)
+    j.append("t1", 3, 2, journal.ACTION_FINISH)
+    j.close()
+    assert [e.action for e in read_events(str(tmp_path))] == [journal.ACTION_START, journal.ACTION_FINISH]
+
+    reopened = Journal(str(tmp_path))
+    try:
+        # 完成话题后不再续播
+        assert reopened.resume_point("t1") is None
+        assert reopened.stats()["t1"].finished == 1
+    finally:
+        reopened.close()
+
+
+def test_torn_tail_is_skipped(tmp_path):
+    j = Journal(str(tmp_path), flush_interval=0)
+    j.append("t1", 1, 0, journal.ACTION_START)
+    j.close()
+    with open(tmp_path / "journal.0.log", "a", encoding="utf-8") as f:
+        f.write("123\tt1\t9")
+
+    reopened = Journal(str(tmp_path), flush_interval=0)
+    reopened.append("t1", 2, 0, journal.ACTION_NEXT)
+    reopened.close()
+    assert [e.question_id for e in read_events(str(tmp_path))] == [1, 2]
+
+
+def test_compacts_by_event_count(tmp_path):
+    j = Journal(str(tmp_path), flush_interval=0, compact_events=3)
+    for q in range(3):
+        j.append("t1", q, 0, journal.ACTION_NEXT)
+    j.close()
+    assert list(read_events(str(tmp_path))) == []
+    assert journal.SNAPSHOT_FILENAME in _files(tmp_path)
+
+
+def test_compacts_by_age(tmp_path):
+    with open(tmp_path / "journal.0.log", "w", encoding="utf-8") as f:
+        f.write(journal.Event(1.0, "t1", 1, 0, journal.ACTION_START).to_line())
+    j = Journal(str(tmp_path), flush_interval=0, compact_age=60)
+    j.append("t1", 2, 0, journal.ACTION_NEXT)
+    j.close()
+    assert list(read_events(str(tmp_path))) == []
+
+    reopened = Journal(str(tmp_path))
+    try:
+        assert reopened.stats()["t1"].sessions == 1
+        assert reopened.resume_point("t1") == (2, 0)
+    finally:
+        reopened.close()
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("flet_video")
+
+from player_pool import PlayerPool
+
+
+def _ready_recorder():
+    calls = []
+    return calls, lambda src, elapsed_ms, reused: calls.append((src, elapsed_ms, reused))
+
+
+def test_load_event_marks_player_ready():
+    calls, on_ready = _ready_recorder()
+    pool = PlayerPool(capacity=2, on_ready=on_ready)
+    pool.start("file:///a.mp4")
+    player = pool.stack.controls[0]
+    # 必须挂在 flet_video 真正派发的事件上
+    assert player.on_load is not None
+
+    asyncio.run(player.on_load(None))
+    entry = pool._entries["file:///a.mp4"]
+    assert entry.loaded
+    assert len(calls) == 1
+    src, elapsed_ms, reused = calls[0]
+    assert src == "file:///a.mp4" and elapsed_ms >= 0 and reused is False
+
+
+def test_preloaded_player_reports_on_activation():
+    calls, on_ready = _ready_recorder()
+    pool = PlayerPool(capacity=2, on_ready=on_ready)
+    pool.start("file:///a.mp4")
+    pool.preload(["file:///b.mp4"])
+    preloaded = pool.stack.controls[1]
+
+    async def run():
+        # 预加载的播放器先就绪：没有激活时不回调
+        await preloaded.on_load(None)
+        assert calls == []
+        # 激活时已经就绪，立即回调
+        assert await pool.activate("file:///b.mp4") is True
+
+    asyncio.run(run())
+    assert [(src, reused) for src, _, reused in calls] == [("file:///b.mp4", True)]
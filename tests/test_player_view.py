@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("flet_video")
+
+import data_loader
+import views
+from bench_suite import _HeadlessPage
+from create_files import generate_assets
+
+
+@pytest.fixture
+def topic(tmp_path, monkeypatch):
+    # file:// 路径相对当前目录计算，测试在临时目录里运行
+    monkeypatch.chdir(tmp_path)
+    generate_assets("assets", 1, 3, verbose=False)
+    (topic,) = data_loader.load_topics("assets", use_index=False, use_bundle=False)
+    topic.resolve()
+    return topic
+
+
+def _active_player(view):
+    """视图里当前不透明的播放器 (播放器池叠放在同一个 Stack 里)"""
+    import flet_video as ftv
+
+    stack = [view]
+    while stack:
+        control = stack.pop()
+        if isinstance(control, ftv.Video) and control.opacity == 1:
+            return control
+        stack.extend(getattr(control, "controls", None) or [])
+        content = getattr(control, "content", None)
+        if content is not None:
+            stack.append(content)
+    raise AssertionError("播放页里没有正在播放的播放器")
+
+
+def _load_active(topic, selector=None):
+    """构建播放页并触发当前播放器的加载事件，与 flet_video 派发 on_load 一样"""
+    async def run():
+        page = _HeadlessPage()
+        view = views.get_player_view(page, topic, selector)
+        page.views.append(view)
+        try:
+            await _active_player(view).on_load(None)
+        finally:
+            view.data.release()
+
+    asyncio.run(run())
+
+
+def test_load_event_logs_first_frame(topic, capsys):
+    _load_active(topic)
+    assert "State 0 首帧就绪" in capsys.readouterr().out
+
+
+def test_load_time_reaches_rendition_selector(topic):
+    from device_profile import PROFILES, RenditionSelector
+
+    # 任何耗时都算慢，窗口只有一次：一次加载事件就应降一档
+    selector = RenditionSelector(PROFILES["desktop"], slow_ms=-1, window=1)
+    _load_active(topic, selector)
+    assert selector.step_down == 1
+
+
+def test_load_event_records_latency_metrics(topic, monkeypatch):
+    import metrics
+
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    metrics.reset()
+    try:
+        _load_active(topic)
+        recorded = metrics.snapshot()
+    finally:
+        metrics.reset()
+    # 首次进入话题新建播放器；按下按钮 (这里是构建播放页) 到就绪的耗时单独记录
+    assert recorded["player.ready.created"]["count"] == 1
+    assert recorded["player.press_to_ready"]["count"] == 1
+    assert "player.ready.reused" not in recorded
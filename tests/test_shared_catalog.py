@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from create_files import generate_assets
+from data_loader import Catalog, Topic
+from shared_catalog import SharedCatalog
+
+
+@pytest.fixture
+def assets_dir(tmp_path, monkeypatch):
+    # 索引缓存和 file:// 路径都相对当前目录，测试在临时目录里运行
+    monkeypatch.chdir(tmp_path)
+    generate_assets("assets", 3, 2, verbose=False)
+    return "assets"
+
+
+def test_resolve_publishes_copy(assets_dir):
+    async def run():
+        shared = SharedCatalog(assets_dir, watch=False)
+        await shared.wait_loaded()
+        lazy = shared.snapshot.topics[0]
+        old_snapshot = shared.snapshot
+        resolved, again = await asyncio.gather(shared.resolve(lazy), shared.resolve(lazy))
+        return lazy, old_snapshot, resolved, again, shared.snapshot
+
+    lazy, old_snapshot, resolved, again, snapshot = asyncio.run(run())
+    assert resolved is again
+    assert not lazy.is_resolved
+    assert old_snapshot.get(lazy.id) is lazy
+    assert resolved.is_resolved and len(resolved.questions) == resolved.question_count == 2
+    assert snapshot.get(lazy.id) is resolved
+    assert [t.id for t in snapshot.topics] == [t.id for t in old_snapshot.topics]
+
+
+def test_topic_stream_yields_each_id_once(assets_dir):
+    async def run():
+        shared = SharedCatalog(assets_dir, watch=False)
+        # 不启动真正的加载，手动发布快照，模拟加载和热更新交替
+        shared._load_task = asyncio.get_running_loop().create_future()
+        t0, t1, t2 = (Topic(f"t{i}", f"t{i}", 1) for i in range(3))
+        shared._publish(Catalog([t0]))
+        stream = shared.topic_stream()
+        yielded = [(await stream.__anext__()).id]
+        # 热更新把 t0 换成新版本并排到 t1 之后：按下标续读会重复产出 t0、漏掉 t1
+        shared._publish(Catalog([t1, Topic("t0", "t0", 2)]))
+        yielded.append((await stream.__anext__()).id)
+        shared._publish(Catalog([t1, Topic("t0", "t0", 2), t2]))
+        shared.loaded = True
+        shared._publish(shared.snapshot)
+        yielded += [topic.id async for topic in stream]
+        return yielded
+
+    assert asyncio.run(run()) == ["t0", "t1", "t2"]
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from video_server import VideoServer, parse_range
+
+PAYLOAD = bytes(range(256)) * 8
+
+
+@pytest.fixture
+def assets_dir(tmp_path):
+    topic = tmp_path / "t1"
+    topic.mkdir()
+    (topic / "q1_0_ask.mp4").write_bytes(PAYLOAD)
+    return tmp_path
+
+
+async def _request(server, path, **headers):
+    """发一个 HTTP/1.1 请求，返回 (状态码, 响应头, 响应体)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    lines = [f"GET {path} HTTP/1.1", "Host: test", "Connection: close"]
+    lines += [f"{k.replace('_', '-')}: {v}" for k, v in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    parsed = {}
+    for line in header_lines:
+        key, value = line.split(":", 1)
+        parsed[key.strip().lower()] = value.strip()
+    return int(status_line.split(" ")[1]), parsed, body
+
+
+def _serve(assets_dir, scenario):
+    async def run():
+        server = VideoServer(str(assets_dir), host="127.0.0.1", port=0, public_host="127.0.0.1")
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=0-5000", 1000) == (0, 999)
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_full_and_range_response(assets_dir):
+    async def scenario(server):
+        full = await _request(server, "/v/t1/q1_0_ask.mp4")
+        part = await _request(server, "/v/t1/q1_0_ask.mp4", Range="bytes=10-19")
+        return full, part
+
+    (status, headers, body), (p_status, p_headers, p_body) = _serve(assets_dir, scenario)
+    assert status == 200 and body == PAYLOAD
+    assert headers["accept-ranges"] == "bytes"
+    assert p_status == 206
+    assert p_headers["content-range"] == f"bytes 10-19/{len(PAYLOAD)}"
+    assert p_body == PAYLOAD[10:20]
+
+
+def test_unsatisfiable_range(assets_dir):
+    async def scenario(server):
+        return await _request(server, "/v/t1/q1_0_ask.mp4", Range=f"bytes={len(PAYLOAD)}-")
+
+    status, headers, body = _serve(assets_dir, scenario)
+    assert status == 416
+    assert headers["content-range"] == f"bytes */{len(PAYLOAD)}"
+    assert body == b""
+
+
+def test_if_none_match(assets_dir):
+    async def scenario(server):
+        _, headers, _ = await _request(server, "/v/t1/q1_0_ask.mp4")
+        cached = await _request(server, "/v/t1/q1_0_ask.mp4", If_None_Match=headers["etag"])
+        stale = await _request(server, "/v/t1/q1_0_ask.mp4", If_None_Match='"other"')
+        return cached, stale
+
+    (status, _, body), (stale_status, _, stale_body) = _serve(assets_dir, scenario)
+    assert status == 304 and body == b""
+    assert stale_status == 200 and stale_body == PAYLOAD
+
+
+def test_rejects_bad_paths(assets_dir):
+    async def scenario(server):
+        paths = ["/v/t1%00/q1_0_ask.mp4", "/v/t1/q1_0_%00ask.mp4", "/v/..%2F/q1_0_ask.mp4", "/v/../t1/q1_0_ask.mp4", "/v/t1/missing.txt"]
+        return [(await _request(server, p))[0] for p in paths]
+
+    assert _serve(assets_dir, scenario) == [404] * 5
+
+
+def test_rejects_backslash_traversal(assets_dir, tmp_path):
+    # 目录外放一个名字合规的视频：Windows 上 "\\" 是分隔符，q1_0_a\..\..\x.mp4 会解析到这里
+    (tmp_path.parent / "x.mp4").write_bytes(b"secret")
+    (assets_dir / "t1" / "q1_0_a\\..\\..\\x.mp4").write_bytes(b"secret")
+
+    async def scenario(server):
+        paths = ["/v/t1/q1_0_a%5C..%5C..%5Cx.mp4", "/v/t1%5C..%5C..%5C/q1_0_ask.mp4"]
+        return [(await _request(server, p))[0] for p in paths]
+
+    assert _serve(assets_dir, scenario) == [404, 404]
+
+
+def test_rejects_symlink_outside_assets(assets_dir, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside") / "q1_0_ask.mp4"
+    outside.write_bytes(b"secret")
+    try:
+        (assets_dir / "t1" / "q2_0_ask.mp4").symlink_to(outside)
+    except (OSError, NotImplementedError):
+        pytest.skip("当前系统不能创建符号链接")
+
+    async def scenario(server):
+        return (await _request(server, "/v/t1/q2_0_ask.mp4"))[0]
+
+    assert _serve(assets_dir, scenario) == 404